@@ -0,0 +1,159 @@
+"""
+Module description:
+Candidate masks served on demand from sparse matrices.
+
+A mask answers the question "can this item be recommended to this user?" without materializing the dense
+users x items boolean matrix: rows and row blocks are densified only when they are requested, so the memory footprint
+stays proportional to the number of stored interactions.
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+import typing as t
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class CandidateMask(object):
+    """
+    Users x items boolean mask backed by a CSR matrix.
+
+    In exclusion mode the stored entries are the items that must NOT be recommended (e.g., the training interactions,
+    so the mask flags all the unrated items). In inclusion mode the stored entries are the only candidate items
+    (e.g., test items plus sampled negatives in sampled evaluation protocols).
+
+    Indexing follows the NumPy semantics of the dense mask it replaces:
+    mask[user] -> 1-D row, mask[start:stop] -> 2-D block, mask[user, item] -> bool,
+    mask[users, items] -> 1-D array of the (users[j], items[j]) pairs.
+    """
+
+    def __init__(self, matrix: sp.spmatrix, exclude: bool = True):
+        matrix = matrix.tocsr()
+        self._matrix = matrix if matrix.has_sorted_indices else matrix.sorted_indices()
+        self._exclude = exclude
+        self.shape = self._matrix.shape
+        self.dtype = np.dtype(bool)
+        self.ndim = 2
+
+    @classmethod
+    def exclusion(cls, matrix: sp.spmatrix) -> "CandidateMask":
+        """
+        Mask of the items that are not stored in the matrix (e.g., unrated items of the training matrix)
+        """
+        return cls(matrix, exclude=True)
+
+    @classmethod
+    def inclusion(cls, matrix: sp.spmatrix) -> "CandidateMask":
+        """
+        Mask of the items that are stored in the matrix (e.g., sampled candidate items)
+        """
+        return cls(matrix, exclude=False)
+
+    @property
+    def exclude(self) -> bool:
+        return self._exclude
+
+    @property
+    def matrix(self) -> sp.csr_matrix:
+        """
+        The underlying sparse matrix of stored (excluded or included) items
+        """
+        return self._matrix
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            row, col = key
+            if isinstance(row, (int, np.integer)) and isinstance(col, (int, np.integer)):
+                return self.contains(row, col)
+            if isinstance(row, (list, np.ndarray)) and isinstance(col, (list, np.ndarray)):
+                return self.contains_pairs(np.asarray(row), np.asarray(col))
+            return self[row][..., col]
+        if isinstance(key, (int, np.integer)):
+            return self.row(key)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.shape[0])
+            if step == 1:
+                return self.block(start, stop)
+            return self.rows(np.arange(start, stop, step))
+        return self.rows(np.asarray(key))
+
+    def contains(self, user: int, item: int) -> bool:
+        indices = self._stored(user)
+        position = np.searchsorted(indices, item)
+        stored = position < len(indices) and indices[position] == item
+        return bool(stored != self._exclude)
+
+    def contains_pairs(self, users: np.ndarray, items: np.ndarray) -> np.ndarray:
+        """
+        Mask values of the (users[j], items[j]) pairs
+        """
+        n_items = self.shape[1]
+        stored_keys = np.repeat(np.arange(self.shape[0], dtype=np.int64), np.diff(self._matrix.indptr)) * n_items + \
+            self._matrix.indices
+        keys = users.astype(np.int64) * n_items + items
+        position = np.minimum(np.searchsorted(stored_keys, keys), max(len(stored_keys) - 1, 0))
+        stored = (stored_keys[position] == keys) if len(stored_keys) else np.zeros(keys.shape, dtype=bool)
+        return stored != self._exclude
+
+    def row(self, user: int) -> np.ndarray:
+        """
+        Dense boolean row of a single user
+        """
+        row = np.full(self.shape[1], self._exclude, dtype=bool)
+        row[self._stored(user)] = not self._exclude
+        return row
+
+    def block(self, start: int, stop: int) -> np.ndarray:
+        """
+        Dense boolean block of the users in [start, stop)
+        """
+        return self._densify(self._matrix.indptr[start:stop + 1], self._matrix.indices)
+
+    def rows(self, users: t.Sequence[int]) -> np.ndarray:
+        """
+        Dense boolean block of an arbitrary list of users
+        """
+        sub_matrix = self._matrix[users]
+        return self._densify(sub_matrix.indptr, sub_matrix.indices)
+
+    def candidates(self, user: int) -> np.ndarray:
+        """
+        Private identifiers of the candidate items of a user
+        """
+        stored = self._stored(user)
+        if self._exclude:
+            return np.setdiff1d(np.arange(self.shape[1]), stored, assume_unique=True)
+        return stored
+
+    def nonzero(self) -> t.Tuple[np.ndarray, np.ndarray]:
+        """
+        Coordinates of the candidate pairs. In exclusion mode the output is as large as the dense complement
+        """
+        if not self._exclude:
+            return self._matrix.nonzero()
+        rows, cols = [], []
+        for user in range(self.shape[0]):
+            items = self.candidates(user)
+            rows.append(np.full(len(items), user, dtype=items.dtype))
+            cols.append(items)
+        if not rows:
+            return np.array([], dtype=int), np.array([], dtype=int)
+        return np.concatenate(rows), np.concatenate(cols)
+
+    def toarray(self) -> np.ndarray:
+        return self.block(0, self.shape[0])
+
+    def _stored(self, user: int) -> np.ndarray:
+        return self._matrix.indices[self._matrix.indptr[user]:self._matrix.indptr[user + 1]]
+
+    def _densify(self, indptr: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        dense = np.full((len(indptr) - 1, self.shape[1]), self._exclude, dtype=bool)
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        dense[rows, indices[indptr[0]:indptr[-1]]] = not self._exclude
+        return dense
@@ -0,0 +1,189 @@
+"""
+Module description:
+Vectorized construction of the indexed data structures of a dataset object.
+
+User and item identifiers are factorized once into integer codes, and every structure (sparse matrices, id maps,
+train/test dictionaries) is derived from the code arrays, instead of filtering the dataframe user by user.
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+import typing as t
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+IndexedSplit = namedtuple("IndexedSplit", ["user_codes", "items", "ratings"])
+IndexedSplit.__doc__ = """
+Test or validation rows of the training users, grouped by private user code (row order is preserved inside a group)
+"""
+
+
+class ColumnarBuilder(object):
+    """
+    Columnar index of a training dataframe.
+
+    Users keep the order of their first appearance in the training set (as pandas ``unique`` does), items are sorted
+    unless an explicit item catalog is provided (e.g., the items aligned with the visual features).
+    """
+
+    def __init__(self, train: pd.DataFrame, items: t.Optional[t.Iterable] = None):
+        """
+        Constructor of ColumnarBuilder
+        :param train: training dataframe with userId, itemId, rating columns
+        :param items: optional item catalog. Training rows whose item is not in the catalog are discarded
+        """
+        user_codes, users = pd.factorize(train["userId"], sort=False)
+        if items is None:
+            item_codes, items = pd.factorize(train["itemId"], sort=True)
+        else:
+            items = pd.Index(list(items))
+            item_codes = items.get_indexer(train["itemId"])
+
+        ratings = train["rating"].to_numpy()
+        valid = item_codes >= 0
+        if not valid.all():
+            user_codes, item_codes, ratings = user_codes[valid], item_codes[valid], ratings[valid]
+
+        self.users = np.asarray(users)
+        self.items = np.asarray(items)
+        self.user_codes = user_codes.astype(np.int32)
+        self.item_codes = item_codes.astype(np.int32)
+        self.ratings = ratings
+        self._unique_pairs = None
+
+    @classmethod
+    def from_csr(cls, users: np.ndarray, items: np.ndarray, indptr: np.ndarray, indices: np.ndarray,
+                 ratings: np.ndarray) -> "ColumnarBuilder":
+        """
+        Restores a builder from the CSR arrays of its distinct user-item pairs (see to_csr_arrays)
+        """
+        builder = cls.__new__(cls)
+        builder.users = users
+        builder.items = items
+        builder.user_codes = np.repeat(np.arange(len(users), dtype=np.int32), np.diff(indptr))
+        builder.item_codes = indices
+        builder.ratings = ratings
+        builder._unique_pairs = (builder.user_codes, builder.item_codes, builder.ratings)
+        return builder
+
+    def to_csr_arrays(self) -> t.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        indptr, indices and ratings (in their original dtype) of the distinct user-item pairs
+        """
+        matrix = self._to_csr(*self.unique_pairs)
+        return matrix.indptr, matrix.indices, matrix.data
+
+    @property
+    def num_users(self) -> int:
+        return len(self.users)
+
+    @property
+    def num_items(self) -> int:
+        return len(self.items)
+
+    @property
+    def transactions(self) -> int:
+        return len(self.unique_pairs[0])
+
+    @property
+    def unique_pairs(self) -> t.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        User codes, item codes and ratings of the distinct user-item pairs, sorted by user and item.
+        As for a dictionary, the last occurrence of a repeated pair wins.
+        """
+        if self._unique_pairs is None:
+            keys = self.user_codes.astype(np.int64) * max(self.num_items, 1) + self.item_codes
+            _, last = np.unique(keys[::-1], return_index=True)
+            last = len(keys) - 1 - last
+            self._unique_pairs = (self.user_codes[last], self.item_codes[last], self.ratings[last])
+        return self._unique_pairs
+
+    def private_users(self) -> t.Dict:
+        return dict(enumerate(self.users.tolist()))
+
+    def public_users(self) -> t.Dict:
+        return {u: p for p, u in enumerate(self.users.tolist())}
+
+    def private_items(self) -> t.Dict:
+        return dict(enumerate(self.items.tolist()))
+
+    def public_items(self) -> t.Dict:
+        return {i: p for p, i in enumerate(self.items.tolist())}
+
+    def build_sparse(self) -> sp.csr_matrix:
+        rows, cols, _ = self.unique_pairs
+        return self._to_csr(rows, cols, np.ones(len(rows), dtype=np.float32))
+
+    def build_sparse_ratings(self) -> sp.csr_matrix:
+        rows, cols, ratings = self.unique_pairs
+        return self._to_csr(rows, cols, ratings.astype(np.float32))
+
+    def build_train_dict(self) -> t.Dict:
+        """
+        Training dictionary in the form {user: {item: rating}} with public identifiers
+        """
+        return self._group(self.user_codes, self.items[self.item_codes], self.ratings, self.users)
+
+    def build_i_train_dict(self) -> t.Dict:
+        """
+        Training dictionary in the form {user: {item: rating}} with private identifiers
+        """
+        return self._group(self.user_codes, self.item_codes, self.ratings, np.arange(self.num_users))
+
+    def index(self, dataframe: pd.DataFrame) -> IndexedSplit:
+        """
+        Indexes a test or validation dataframe on the training users.
+        Rows of users unknown to the training set are discarded, items are kept as they are.
+        :param dataframe: test or validation dataframe
+        """
+        user_codes = pd.Index(self.users).get_indexer(dataframe["userId"])
+        known = user_codes >= 0
+        user_codes = user_codes[known]
+        order = np.argsort(user_codes, kind="stable")
+        return IndexedSplit(user_codes[order].astype(np.int32), dataframe["itemId"].to_numpy()[known][order],
+                            dataframe["rating"].to_numpy()[known][order])
+
+    def build_dict(self, split: t.Union[pd.DataFrame, IndexedSplit]) -> t.Dict:
+        """
+        Dictionary in the form {user: {item: rating}} with public identifiers, for every training user
+        :param split: test or validation dataframe, or its IndexedSplit
+        """
+        split = split if isinstance(split, IndexedSplit) else self.index(split)
+        return self._group(split.user_codes, split.items, split.ratings, self.users)
+
+    def build_bool_sparse(self, split: t.Union[pd.DataFrame, IndexedSplit]) -> sp.csr_matrix:
+        """
+        Boolean users x items matrix of the pairs whose user and item are both known to the training set
+        :param split: test or validation dataframe, or its IndexedSplit
+        """
+        split = split if isinstance(split, IndexedSplit) else self.index(split)
+        item_codes = pd.Index(self.items).get_indexer(split.items)
+        known = item_codes >= 0
+        matrix = sp.csr_matrix((np.ones(known.sum(), dtype=bool), (split.user_codes[known], item_codes[known])),
+                               dtype='bool', shape=(self.num_users, self.num_items))
+        matrix.sum_duplicates()
+        return matrix
+
+    def _to_csr(self, rows, cols, data) -> sp.csr_matrix:
+        idx_dtype = np.int32 if len(rows) < np.iinfo(np.int32).max else np.int64
+        indptr = np.zeros(self.num_users + 1, dtype=idx_dtype)
+        np.cumsum(np.bincount(rows, minlength=self.num_users), out=indptr[1:])
+        return sp.csr_matrix((data, cols.astype(idx_dtype), indptr), shape=(self.num_users, self.num_items))
+
+    def _group(self, codes: np.ndarray, keys: np.ndarray, values: np.ndarray, owners: np.ndarray) -> t.Dict:
+        """
+        Groups keys and values by code preserving the row order inside each group, so repeated keys behave as in
+        sequential dictionary insertions
+        """
+        order = np.argsort(codes, kind="stable")
+        bounds = np.zeros(len(owners) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(owners)), out=bounds[1:])
+        keys = keys[order].tolist()
+        values = values[order].tolist()
+        return {owner: dict(zip(keys[start:stop], values[start:stop]))
+                for owner, start, stop in zip(owners.tolist(), bounds[:-1].tolist(), bounds[1:].tolist())}
@@ -13,10 +13,13 @@ import typing as t
 import pandas as pd
 import scipy.sparse as sp
 from collections import Counter
+from collections.abc import Sequence
 from types import SimpleNamespace
 import logging as pylog
 
 from elliot.utils import logging
+from elliot.dataset.columnar_builder import ColumnarBuilder
+from elliot.dataset.candidate_mask import CandidateMask
 from elliot.splitter.base_splitter import Splitter
 from elliot.prefiltering.standard_prefilters import PreFilter
 
@@ -153,11 +156,15 @@ class KnowledgeChainsLoader:
 
         return tuple_list
 
-    def generate_dataobjects(self) -> t.List[object]:
+    def generate_dataobjects(self, requirements: t.Optional[t.Iterable[str]] = None) -> t.List[object]:
+        """
+        Builds the dataset objects of every test and validation fold.
+        Every structure is built eagerly, so the requirements of the recommenders are not used
+        """
         data_list = []
         for train_val, test in self.tuple_list:
             # testset level
-            if isinstance(train_val, list):
+            if isinstance(train_val, Sequence):
                 # validation level
                 val_list = []
                 for train, val in train_val:
@@ -321,79 +328,55 @@ class KnowledgeChainsDataObject:
         self.side_information_data = side_information_data
         self.args = args
         self.kwargs = kwargs
-        self.train_dict = self.dataframe_to_dict(data_tuple[0])
+        self._builder = ColumnarBuilder(data_tuple[0])
+        self.train_dict = self._builder.build_train_dict()
 
-        self.users = list(self.train_dict.keys())
-        self.num_users = len(self.users)
-        self.items = list({k for a in self.train_dict.values() for k in a.keys()})
-        self.num_items = len(self.items)
+        self.users = self._builder.users.tolist()
+        self.num_users = self._builder.num_users
+        self.items = self._builder.items.tolist()
+        self.num_items = self._builder.num_items
 
         self.features = list({f for i in self.items for f in self.side_information_data.feature_map[i]})
         self.factors = len(self.features)
-        self.private_users = {p: u for p, u in enumerate(self.users)}
-        self.public_users = {v: k for k, v in self.private_users.items()}
-        self.private_items = {p: i for p, i in enumerate(self.items)}
-        self.public_items = {v: k for k, v in self.private_items.items()}
+        self.private_users = self._builder.private_users()
+        self.public_users = self._builder.public_users()
+        self.private_items = self._builder.private_items()
+        self.public_items = self._builder.public_items()
         self.private_features = {p: f for p, f in enumerate(self.features)}
         self.public_features = {v: k for k, v in self.private_features.items()}
-        self.transactions = sum(len(v) for v in self.train_dict.values())
+        self.transactions = self._builder.transactions
+        self.log_statistics()
 
-        self.i_train_dict = {self.public_users[user]: {self.public_items[i]: v for i, v in items.items()}
-                                for user, items in self.train_dict.items()}
+        self.i_train_dict = self._builder.build_i_train_dict()
 
         self.sp_i_train = self.build_sparse()
         self.sp_i_train_ratings = self.build_sparse_ratings()
 
         if len(data_tuple) == 2:
-            self.test_dict = self.build_dict(data_tuple[1], self.users)
+            self.test_dict = self.build_dict(data_tuple[1])
         else:
-            self.val_dict = self.build_dict(data_tuple[1], self.users)
-            self.test_dict = self.build_dict(data_tuple[2], self.users)
+            self.val_dict = self.build_dict(data_tuple[1])
+            self.test_dict = self.build_dict(data_tuple[2])
 
-        self.allunrated_mask = np.where((self.sp_i_train.toarray() == 0), True, False)
+        self.allunrated_mask = CandidateMask.exclusion(self.sp_i_train)
 
     def dataframe_to_dict(self, data):
-        users = list(data['userId'].unique())
-
         "Conversion to Dictionary"
-        ratings = {}
-        for u in users:
-            sel_ = data[data['userId'] == u]
-            ratings[u] = dict(zip(sel_['itemId'], sel_['rating']))
-        n_users = len(ratings.keys())
-        n_items = len({k for a in ratings.values() for k in a.keys()})
-        transactions = sum([len(a) for a in ratings.values()])
-        sparsity = 1 - (transactions / (n_users * n_items))
-        self.logger.info(f"Statistics\tUsers:\t{n_users}\tItems:\t{n_items}\tTransactions:\t{transactions}\t"
+        return ColumnarBuilder(data).build_train_dict()
+
+    def log_statistics(self):
+        sparsity = 1 - (self.transactions / (self.num_users * self.num_items))
+        self.logger.info(f"Statistics\tUsers:\t{self.num_users}\tItems:\t{self.num_items}\tTransactions:\t{self.transactions}\t"
                          f"Sparsity:\t{sparsity}")
-        return ratings
 
-    def build_dict(self, dataframe, users):
-        ratings = {}
-        for u in users:
-            sel_ = dataframe[dataframe['userId'] == u]
-            ratings[u] = dict(zip(sel_['itemId'], sel_['rating']))
-        return ratings
+    def build_dict(self, dataframe):
+        return self._builder.build_dict(dataframe)
 
     def build_sparse(self):
-
-        rows_cols = [(u, i) for u, items in self.i_train_dict.items() for i in items.keys()]
-        rows = [u for u, _ in rows_cols]
-        cols = [i for _, i in rows_cols]
-        data = sp.csr_matrix((np.ones_like(rows), (rows, cols)), dtype='float32',
-                             shape=(len(self.users), len(self.items)))
-        return data
+        return self._builder.build_sparse()
 
     def build_sparse_ratings(self):
-        rows_cols_ratings = [(u, i, r) for u, items in self.i_train_dict.items() for i, r in items.items()]
-        rows = [u for u, _, _ in rows_cols_ratings]
-        cols = [i for _, i, _ in rows_cols_ratings]
-        ratings = [r for _, _, r in rows_cols_ratings]
-
-        data = sp.csr_matrix((ratings, (rows, cols)), dtype='float32',
-                             shape=(len(self.users), len(self.items)))
-
-        return data
+        return self._builder.build_sparse_ratings()
 
     def get_test(self):
         return self.test_dict
@@ -18,10 +18,15 @@ import typing as t
 import logging as pylog
 
 from elliot.dataset.abstract_dataset import AbstractDataset
+from elliot.dataset.columnar_builder import ColumnarBuilder
+from elliot.dataset.candidate_mask import CandidateMask
+from elliot.dataset.dataset_cache import DataSetCache, data_tuples, has_test_fold_lists
+from elliot.dataset.shared_matrix import SHARED_MEMORY, share_csr
 from elliot.splitter.base_splitter import Splitter
 from elliot.prefiltering.standard_prefilters import PreFilter
 from elliot.negative_sampling.negative_sampling import NegativeSampler
 from elliot.utils import logging
+from elliot.utils.lazy import lazy_property
 
 from elliot.dataset.modular_loaders.loader_coordinator_mixin import LoaderCoordinator
 
@@ -43,8 +48,18 @@ class DataSetLoader(LoaderCoordinator):
         self.kwargs = kwargs
         self.config = config
         self.column_names = ['userId', 'itemId', 'rating', 'timestamp']
+        self.data_tuples = None
         if config.config_test:
             return
+
+        cache = self.get_cache()
+        if cache is not None and cache.exists():
+            self.logger.info(f"Loading indexed data from cache {cache.path}")
+            self.data_tuples = cache.load()
+            self.side_information = SimpleNamespace()
+            self.check_folds(cache.test_fold_lists())
+            return
+
         if config.data_config.strategy == "fixed":
             path_train_data = config.data_config.train_path
             path_val_data = getattr(config.data_config, "validation_path", None)
@@ -113,12 +128,36 @@ class DataSetLoader(LoaderCoordinator):
         else:
             raise Exception("Strategy option not recognized")
 
-        if isinstance(self.tuple_list[0][1], list):
+        self.check_folds(has_test_fold_lists(self.tuple_list))
+
+        if cache is not None:
+            self.logger.info(f"Storing indexed data in cache {cache.path}")
+            self.data_tuples = cache.store(self.tuple_list)
+
+    def check_folds(self, test_fold_lists: bool):
+        """
+        Paired TTest and Wilcoxon Test are disabled for the splittings with lists of test folds
+        :param test_fold_lists: whether the test split of the first fold is a list (see has_test_fold_lists)
+        """
+        if test_fold_lists:
             self.logger.warning("You are using a splitting strategy with folds. "
                                 "Paired TTest and Wilcoxon Test are not available!")
             self.config.evaluation.paired_ttest = False
             self.config.evaluation.wilcoxon_test = False
 
+    def get_cache(self) -> t.Optional[DataSetCache]:
+        """
+        Dataset cache configured with the data_config cache_folder option.
+        Side information is not cached, so experiments that load it bypass the cache.
+        """
+        cache_folder = getattr(self.config.data_config, "cache_folder", None)
+        if not cache_folder:
+            return None
+        if self.config.data_config.side_information:
+            self.logger.warning("Dataset cache is not available with side information. The cache will be ignored")
+            return None
+        return DataSetCache(cache_folder, self.config)
+
     def check_timestamp(self, d: pd.DataFrame) -> pd.DataFrame:
         if all(d["timestamp"].isna()):
             d = d.drop(columns=["timestamp"]).reset_index(drop=True)
@@ -141,23 +180,28 @@ class DataSetLoader(LoaderCoordinator):
 
         return tuple_list
 
-    def generate_dataobjects(self) -> t.List[object]:
+    def generate_dataobjects(self, requirements: t.Optional[t.Iterable[str]] = None) -> t.List[object]:
+        """
+        Builds the dataset objects of every test and validation fold
+        :param requirements: DataSet attributes the recommenders need (see BaseRecommenderModel.data_requirements).
+        They are built in advance, the other lazy attributes only on first access. All of them if None
+        """
         data_list = []
-        for p1, (train_val, test) in enumerate(self.tuple_list):
+        for p1, fold in enumerate(self.data_tuples or data_tuples(self.tuple_list)):
             # testset level
-            if isinstance(train_val, list):
+            val_list = []
+            for p2, data_tuple in enumerate(fold):
                 # validation level
-                val_list = []
-                for p2, (train, val) in enumerate(train_val):
+                if len(data_tuple) == 3:
                     self.logger.info(f"Test Fold {p1} - Validation Fold {p2}")
-                    single_dataobject = DataSet(self.config, (train,val,test), self.side_information, self.args, self.kwargs)
-                    val_list.append(single_dataobject)
-                data_list.append(val_list)
-            else:
-                self.logger.info(f"Test Fold {p1}")
-                single_dataobject = DataSet(self.config, (train_val, test), self.side_information, self.args,
-                                                              self.kwargs)
-                data_list.append([single_dataobject])
+                else:
+                    self.logger.info(f"Test Fold {p1}")
+                single_dataobject = DataSet(self.config, data_tuple, self.side_information, self.args, self.kwargs)
+                single_dataobject.materialize(requirements)
+                if getattr(self.config.data_config, "share_memory", None):
+                    single_dataobject.share_memory(self.config.data_config.share_memory)
+                val_list.append(single_dataobject)
+            data_list.append(val_list)
         return data_list
 
     def generate_dataobjects_mock(self) -> t.List[object]:
@@ -177,8 +221,13 @@ class DataSetLoader(LoaderCoordinator):
 class DataSet(AbstractDataset):
     """
     Load train and test dataset
+
+    The training structures listed in lazy_attributes are built on first access and cached
     """
 
+    lazy_attributes = ("train_dict", "i_train_dict", "private_users", "public_users", "private_items",
+                       "public_items", "sp_i_train", "sp_i_train_ratings", "allunrated_mask")
+
     def __init__(self, config, data_tuple, side_information_data, *args, **kwargs):
         """
         Constructor of DataSet
@@ -191,95 +240,103 @@ class DataSet(AbstractDataset):
         self.args = args
         self.kwargs = kwargs
 
+        # the training set is either a dataframe or the indexed builder restored from the dataset cache
+        self._builder = data_tuple[0] if isinstance(data_tuple[0], ColumnarBuilder) else ColumnarBuilder(data_tuple[0])
+
         if self.config.align_side_with_train == True:
-            self.side_information = self.align_with_training(train=data_tuple[0], side_information_data=side_information_data)
+            self.side_information = self.align_with_training(train=self._builder, side_information_data=side_information_data)
         else:
             self.side_information = side_information_data
 
-        self.train_dict = self.dataframe_to_dict(data_tuple[0])
-
-        self.users = list(self.train_dict.keys())
-        self.items = list({k for a in self.train_dict.values() for k in a.keys()})
-        self.num_users = len(self.users)
-        self.num_items = len(self.items)
-        self.transactions = sum(len(v) for v in self.train_dict.values())
+        self.users = self._builder.users.tolist()
+        self.items = self._builder.items.tolist()
+        self.num_users = self._builder.num_users
+        self.num_items = self._builder.num_items
+        self.transactions = self._builder.transactions
 
         sparsity = 1 - (self.transactions / (self.num_users * self.num_items))
         self.logger.info(f"Statistics\tUsers:\t{self.num_users}\tItems:\t{self.num_items}\tTransactions:\t{self.transactions}\t"
                          f"Sparsity:\t{sparsity}")
 
-        self.private_users = {p: u for p, u in enumerate(self.users)}
-        self.public_users = {v: k for k, v in self.private_users.items()}
-        self.private_items = {p: i for p, i in enumerate(self.items)}
-        self.public_items = {v: k for k, v in self.private_items.items()}
-
-        self.i_train_dict = {self.public_users[user]: {self.public_items[i]: v for i, v in items.items()}
-                                for user, items in self.train_dict.items()}
-
-        self.sp_i_train = self.build_sparse()
-        self.sp_i_train_ratings = self.build_sparse_ratings()
-
         if len(data_tuple) == 2:
-            self.test_dict = self.build_dict(data_tuple[1], self.users)
+            self.test_dict = self.build_dict(data_tuple[1])
             if hasattr(config, "negative_sampling"):
                 val_neg_samples, test_neg_samples = NegativeSampler.sample(config, self.public_users, self.public_items,
                                                                            self.private_users, self.private_items,
                                                                            self.sp_i_train, None, self.test_dict)
-                sp_i_test = self.to_bool_sparse(self.test_dict)
+                sp_i_test = self._builder.build_bool_sparse(data_tuple[1])
                 test_candidate_items = test_neg_samples + sp_i_test
-                self.test_mask = np.where((test_candidate_items.toarray() == True), True, False)
+                self.test_mask = CandidateMask.inclusion(test_candidate_items)
         else:
-            self.val_dict = self.build_dict(data_tuple[1], self.users)
-            self.test_dict = self.build_dict(data_tuple[2], self.users)
+            self.val_dict = self.build_dict(data_tuple[1])
+            self.test_dict = self.build_dict(data_tuple[2])
             if hasattr(config, "negative_sampling"):
                 val_neg_samples, test_neg_samples = NegativeSampler.sample(config, self.public_users, self.public_items,
                                                                            self.private_users, self.private_items,
                                                                            self.sp_i_train, self.val_dict, self.test_dict)
-                sp_i_val = self.to_bool_sparse(self.val_dict)
-                sp_i_test = self.to_bool_sparse(self.test_dict)
+                sp_i_val = self._builder.build_bool_sparse(data_tuple[1])
+                sp_i_test = self._builder.build_bool_sparse(data_tuple[2])
                 val_candidate_items = val_neg_samples + sp_i_val
-                self.val_mask = np.where((val_candidate_items.toarray() == True), True, False)
+                self.val_mask = CandidateMask.inclusion(val_candidate_items)
                 test_candidate_items = test_neg_samples + sp_i_test
-                self.test_mask = np.where((test_candidate_items.toarray() == True), True, False)
+                self.test_mask = CandidateMask.inclusion(test_candidate_items)
 
-        self.allunrated_mask = np.where((self.sp_i_train.toarray() == 0), True, False)
+    @lazy_property
+    def train_dict(self) -> t.Dict:
+        return self._builder.build_train_dict()
 
-    def dataframe_to_dict(self, data):
-        users = list(data['userId'].unique())
+    @lazy_property
+    def i_train_dict(self) -> t.Dict:
+        return self._builder.build_i_train_dict()
 
-        "Conversion to Dictionary"
-        ratings = {}
-        for u in users:
-            sel_ = data[data['userId'] == u]
-            ratings[u] = dict(zip(sel_['itemId'], sel_['rating']))
-        return ratings
-
-    def build_dict(self, dataframe, users):
-        ratings = {}
-        for u in users:
-            sel_ = dataframe[dataframe['userId'] == u]
-            ratings[u] = dict(zip(sel_['itemId'], sel_['rating']))
-        return ratings
+    @lazy_property
+    def private_users(self) -> t.Dict:
+        return self._builder.private_users()
 
-    def build_sparse(self):
+    @lazy_property
+    def public_users(self) -> t.Dict:
+        return self._builder.public_users()
 
-        rows_cols = [(u, i) for u, items in self.i_train_dict.items() for i in items.keys()]
-        rows = [u for u, _ in rows_cols]
-        cols = [i for _, i in rows_cols]
-        data = sp.csr_matrix((np.ones_like(rows), (rows, cols)), dtype='float32',
-                             shape=(len(self.users), len(self.items)))
-        return data
+    @lazy_property
+    def private_items(self) -> t.Dict:
+        return self._builder.private_items()
 
-    def build_sparse_ratings(self):
-        rows_cols_ratings = [(u, i, r) for u, items in self.i_train_dict.items() for i, r in items.items()]
-        rows = [u for u, _, _ in rows_cols_ratings]
-        cols = [i for _, i, _ in rows_cols_ratings]
-        ratings = [r for _, _, r in rows_cols_ratings]
+    @lazy_property
+    def public_items(self) -> t.Dict:
+        return self._builder.public_items()
 
-        data = sp.csr_matrix((ratings, (rows, cols)), dtype='float32',
-                             shape=(len(self.users), len(self.items)))
+    @lazy_property
+    def sp_i_train(self) -> sp.csr_matrix:
+        return self.build_sparse()
 
-        return data
+    @lazy_property
+    def sp_i_train_ratings(self) -> sp.csr_matrix:
+        return self.build_sparse_ratings()
+
+    @lazy_property
+    def allunrated_mask(self) -> CandidateMask:
+        return CandidateMask.exclusion(self.sp_i_train)
+
+    def materialize(self, requirements: t.Optional[t.Iterable[str]] = None):
+        """
+        Builds the lazy attributes in advance
+        :param requirements: names of the attributes to build (all the lazy attributes if None)
+        """
+        for name in self.lazy_attributes if requirements is None else requirements:
+            getattr(self, name)
+
+    def dataframe_to_dict(self, data):
+        "Conversion to Dictionary"
+        return ColumnarBuilder(data).build_train_dict()
+
+    def build_dict(self, dataframe):
+        return self._builder.build_dict(dataframe)
+
+    def build_sparse(self):
+        return self._builder.build_sparse()
+
+    def build_sparse_ratings(self):
+        return self._builder.build_sparse_ratings()
 
     def get_test(self):
         return self.test_dict
@@ -287,23 +344,30 @@ class DataSet(AbstractDataset):
     def get_validation(self):
         return self.val_dict if hasattr(self, 'val_dict') else None
 
-    def to_bool_sparse(self, test_dict):
-        i_test = [(self.public_users[user], self.public_items[i])
-                  for user, items in test_dict.items() if user in self.public_users.keys()
-                  for i in items.keys() if i in self.public_items.keys()]
-        rows = [u for u, _ in i_test]
-        cols = [i for _, i in i_test]
-        i_test = sp.csr_matrix((np.ones_like(rows), (rows, cols)), dtype='bool',
-                               shape=(len(self.public_users.keys()), len(self.public_items.keys())))
-        return i_test
+    def share_memory(self, backend: str = SHARED_MEMORY, folder: t.Optional[str] = None):
+        """
+        Moves the interaction matrices and the candidate masks to process-shareable storage.
+        Pickling the dataset for a worker process then sends the handles of the matrices instead of their content
+        :param backend: "shared_memory" or "mmap"
+        :param folder: folder of the memory-mapped files (mmap backend only, a temporary folder if None)
+        """
+        # lazy matrices that have not been built yet are left lazy
+        for name in ("sp_i_train", "sp_i_train_ratings"):
+            if name in self.__dict__:
+                setattr(self, name, share_csr(self.__dict__[name], backend, folder))
+        if "allunrated_mask" in self.__dict__:
+            self.allunrated_mask = CandidateMask.exclusion(self.sp_i_train)
+        for name in ("val_mask", "test_mask"):
+            mask = getattr(self, name, None)
+            if mask is not None:
+                setattr(self, name, CandidateMask(share_csr(mask.matrix, backend, folder), mask.exclude))
 
     def align_with_training(self, train, side_information_data):
         """Alignment with training"""
         def equal(a, b, c):
             return len(a) == len(b) == len(c)
-        train_dict = self.dataframe_to_dict(train)
-        users = set(train_dict.keys())
-        items = set({k for a in train_dict.values() for k in a.keys()})
+        users = set(train.users.tolist())
+        items = set(train.items.tolist())
         users_items = []
         side_objs = []
         for k, v in side_information_data.__dict__.items():
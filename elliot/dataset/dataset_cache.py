@@ -0,0 +1,192 @@
+"""
+Module description:
+On-disk cache of the filtered, split and indexed data of a DataSetLoader.
+
+Each test/validation fold is stored as a folder of NumPy arrays: the public user and item identifiers (the id maps),
+the CSR arrays of the training interactions, and the test/validation rows indexed on the training users.
+Numeric arrays are memory-mapped on load, so a cached experiment skips reading, prefiltering, splitting and indexing.
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+import hashlib
+import json
+import os
+import shutil
+import typing as t
+from collections.abc import Sequence
+from types import SimpleNamespace
+
+import numpy as np
+
+from elliot.dataset.columnar_builder import ColumnarBuilder, IndexedSplit
+
+_meta_file = "meta.json"
+_chunk_size = 1 << 20
+
+
+class DataSetCache(object):
+    """
+    Cache of the indexed data tuples of a DataSetLoader.
+
+    The key is a hash of the content of the input files together with the data_config, prefiltering, splitting,
+    binarize and random_seed configuration, so any change to the data or to the preprocessing pipeline leads to a new
+    cache entry.
+    """
+
+    def __init__(self, folder: str, config: SimpleNamespace, mmap_mode: t.Optional[str] = "r"):
+        """
+        Constructor of DataSetCache
+        :param folder: root folder of the cache entries
+        :param config: experiment namespace
+        :param mmap_mode: mode used to memory-map the numeric arrays on load (None loads them in memory)
+        """
+        self.config = config
+        self.mmap_mode = mmap_mode
+        self.key = self.compute_key()
+        self.path = os.path.join(os.path.abspath(folder), self.key)
+
+    def compute_key(self) -> str:
+        digest = hashlib.sha1()
+        for path in self.input_files():
+            digest.update(path.encode())
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(_chunk_size), b""):
+                    digest.update(chunk)
+        digest.update(json.dumps(self.signature(), sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def input_files(self) -> t.List[str]:
+        data_config = self.config.data_config
+        if data_config.strategy == "fixed":
+            paths = [data_config.train_path, getattr(data_config, "validation_path", None), data_config.test_path]
+        elif data_config.strategy == "dataset":
+            paths = [data_config.dataset_path]
+        elif data_config.strategy == "hierarchy":
+            paths = sorted(os.path.join(root, name) for root, _, names in os.walk(data_config.root_folder)
+                           for name in names)
+        else:
+            raise Exception("Strategy option not recognized")
+        return [os.path.abspath(p) for p in paths if p]
+
+    def signature(self) -> t.Dict:
+        """
+        The part of the configuration that determines the content of the data tuples
+        """
+        data_config = {k: v for k, v in vars(self.config.data_config).items() if k not in ("cache_folder", "dataloader")}
+        return {"data_config": _plain(data_config),
+                "prefiltering": _plain(getattr(self.config, "prefiltering", None)),
+                "splitting": _plain(getattr(self.config, "splitting", None)),
+                "binarize": getattr(self.config, "binarize", False),
+                "random_seed": getattr(self.config, "random_seed", None)}
+
+    def exists(self) -> bool:
+        return os.path.isfile(os.path.join(self.path, _meta_file))
+
+    def store(self, tuple_list: t.List) -> t.List[t.List[t.Tuple]]:
+        """
+        Indexes and stores the tuple list of a loader
+        :param tuple_list: list of (train_val, test) tuples, where train_val is a training dataframe or a list of
+        (train, val) dataframes
+        :return: the indexed data tuples, grouped by test fold
+        """
+        folds = [[self.index(data_tuple) for data_tuple in fold] for fold in data_tuples(tuple_list)]
+        temp_path = f"{self.path}.tmp{os.getpid()}"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        for p1, fold in enumerate(folds):
+            for p2, data_tuple in enumerate(fold):
+                self._write(os.path.join(temp_path, f"{p1}_{p2}"), data_tuple)
+        with open(os.path.join(temp_path, _meta_file), "w") as file:
+            json.dump({"folds": [len(fold) for fold in folds], "test_fold_lists": has_test_fold_lists(tuple_list),
+                       "signature": self.signature()}, file, default=str, indent=2)
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(temp_path, self.path)
+        return folds
+
+    def folds(self) -> t.List[int]:
+        """
+        :return: the number of validation folds of every test fold (1 without validation)
+        """
+        return self._meta()["folds"]
+
+    def test_fold_lists(self) -> bool:
+        """
+        :return: whether the stored tuple list had lists of test folds (see has_test_fold_lists)
+        """
+        return self._meta().get("test_fold_lists", False)
+
+    def _meta(self) -> t.Dict:
+        with open(os.path.join(self.path, _meta_file)) as file:
+            return json.load(file)
+
+    def load(self) -> t.List[t.List[t.Tuple]]:
+        """
+        :return: the indexed data tuples, grouped by test fold
+        """
+        return [[self._read(os.path.join(self.path, f"{p1}_{p2}")) for p2 in range(n_val)]
+                for p1, n_val in enumerate(self.folds())]
+
+    @staticmethod
+    def index(data_tuple: t.Tuple) -> t.Tuple:
+        builder = ColumnarBuilder(data_tuple[0])
+        return (builder,) + tuple(builder.index(split) for split in data_tuple[1:])
+
+    def _write(self, folder: str, data_tuple: t.Tuple):
+        os.makedirs(folder)
+        builder = data_tuple[0]
+        indptr, indices, ratings = builder.to_csr_arrays()
+        arrays = {"users": builder.users, "items": builder.items,
+                  "train_indptr": indptr, "train_indices": indices, "train_ratings": ratings}
+        for name, split in zip(("test",) if len(data_tuple) == 2 else ("val", "test"), data_tuple[1:]):
+            arrays.update({f"{name}_user_codes": split.user_codes, f"{name}_items": split.items,
+                           f"{name}_ratings": split.ratings})
+        for name, array in arrays.items():
+            np.save(os.path.join(folder, f"{name}.npy"), array, allow_pickle=array.dtype == object)
+
+    def _read(self, folder: str) -> t.Tuple:
+        def load(name):
+            path = os.path.join(folder, f"{name}.npy")
+            try:
+                return np.load(path, mmap_mode=self.mmap_mode)
+            except ValueError:
+                # object arrays (e.g., string identifiers) cannot be memory-mapped
+                return np.load(path, allow_pickle=True)
+
+        builder = ColumnarBuilder.from_csr(load("users"), load("items"), load("train_indptr"),
+                                           load("train_indices"), load("train_ratings"))
+        names = ["val", "test"] if os.path.isfile(os.path.join(folder, "val_items.npy")) else ["test"]
+        return (builder,) + tuple(IndexedSplit(load(f"{name}_user_codes"), load(f"{name}_items"),
+                                               load(f"{name}_ratings")) for name in names)
+
+
+def data_tuples(tuple_list: t.List) -> t.Iterator[t.Iterator[t.Tuple]]:
+    """
+    Flattens a loader tuple list into the data tuples of each test fold:
+    (train, test) or (train, val, test).
+    Folds are yielded one at a time, so lazy fold sequences (see FoldList) are materialized only when they are consumed
+    """
+    for train_val, test in tuple_list:
+        if isinstance(train_val, Sequence):
+            yield ((train, val, test) for train, val in train_val)
+        else:
+            yield iter([(train_val, test)])
+
+
+def has_test_fold_lists(tuple_list: t.List) -> bool:
+    """
+    Whether the test split of the first fold of a loader tuple list is a list of folds, the condition on which
+    DataSetLoader disables the statistical tests
+    """
+    return isinstance(tuple_list[0][1], list)
+
+
+def _plain(value):
+    if isinstance(value, SimpleNamespace):
+        return {k: _plain(v) for k, v in vars(value).items()}
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
@@ -13,6 +13,7 @@ import numpy as np
 class Sampler:
     def __init__(self, indexed_ratings, sp_i_train):
         np.random.seed(42)
+        self._nprandom = np.random
         self._indexed_ratings = indexed_ratings
         self._sp_i_train = sp_i_train
         self._users = list(self._indexed_ratings.keys())
@@ -23,7 +24,7 @@ class Sampler:
         self._lui_dict = {u: len(v) for u, v in self._ui_dict.items()}
 
     def step(self, events: int, batch_size: int):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_users = self._nusers
         n_items = self._nitems
         ui_dict = self._ui_dict
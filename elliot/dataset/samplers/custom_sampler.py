@@ -8,39 +8,87 @@ __author__ = 'Vito Walter Anelli, Claudio Pomo'
 __email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
 
 import numpy as np
+import scipy.sparse as sp
 
 
 class Sampler:
+    """
+    Pairwise (user, positive item, negative item) sampler.
+    Every batch is drawn at once: users and positives are sampled as arrays, negatives are checked against the CSR
+    rows of the users in one vectorized lookup, and only the colliding negatives are drawn again.
+    """
+
     def __init__(self, indexed_ratings):
+        """
+        :param indexed_ratings: training dictionary {user: {item: rating}} with private identifiers, or the
+        equivalent users x items sparse matrix
+        """
         np.random.seed(42)
-        self._indexed_ratings = indexed_ratings
-        self._users = list(self._indexed_ratings.keys())
-        self._nusers = len(self._users)
-        self._items = list({k for a in self._indexed_ratings.values() for k in a.keys()})
-        self._nitems = len(self._items)
-        self._ui_dict = {u: list(set(indexed_ratings[u])) for u in indexed_ratings}
-        self._lui_dict = {u: len(v) for u, v in self._ui_dict.items()}
+        self._nprandom = np.random
+        if sp.issparse(indexed_ratings):
+            matrix = sp.csr_matrix(indexed_ratings, dtype=bool)
+        else:
+            rows = np.fromiter((u for u, items in indexed_ratings.items() for _ in items), dtype=np.int64)
+            cols = np.fromiter((i for items in indexed_ratings.values() for i in items), dtype=np.int64)
+            matrix = sp.csr_matrix((np.ones(len(rows), dtype=bool), (rows, cols)),
+                                   shape=(len(indexed_ratings), cols.max() + 1 if len(cols) else 0))
+        matrix.sum_duplicates()
+        self._nusers = matrix.shape[0]
+        self._nitems = len(np.unique(matrix.indices))
+        self._indptr = matrix.indptr.astype(np.int64)
+        self._indices = matrix.indices.astype(np.int64)
+        self._lui = np.diff(self._indptr)
+        self._search_steps = int(self._lui.max()).bit_length() if len(self._lui) else 0
+        # number of negative items preceding every positive item of a row
+        self._gaps = self._indices - (np.arange(len(self._indices)) - np.repeat(self._indptr[:-1], self._lui))
+        # users with at least a positive and a negative item
+        self._sampleable = np.flatnonzero((self._lui > 0) & (self._lui < self._nitems))
 
     def step(self, events: int, batch_size: int):
-        r_int = np.random.randint
-        n_users = self._nusers
-        n_items = self._nitems
-        ui_dict = self._ui_dict
-        lui_dict = self._lui_dict
-
-        def sample():
-            u = r_int(n_users)
-            ui = ui_dict[u]
-            lui = lui_dict[u]
-            if lui == n_items:
-                sample()
-            i = ui[r_int(lui)]
-
-            j = r_int(n_items)
-            while j in ui:
-                j = r_int(n_items)
-            return u, i, j
-
         for batch_start in range(0, events, batch_size):
-            bui, bii, bij = map(np.array, zip(*[sample() for _ in range(batch_start, min(batch_start + batch_size, events))]))
+            bui, bii, bij = self.sample(min(batch_start + batch_size, events) - batch_start)
             yield bui[:, None], bii[:, None], bij[:, None]
+
+    def sample(self, size: int):
+        """
+        Draws size (user, positive item, negative item) triples
+        """
+        r_int = self._nprandom.randint
+        n_items = self._nitems
+
+        u = self._sampleable[r_int(len(self._sampleable), size=size)]
+        i = self._indices[self._indptr[u] + r_int(self._lui[u])]
+
+        j = r_int(n_items, size=size)
+        # users with more positive than negative items draw the rank of the negative item among their negatives
+        dense = np.flatnonzero(self._lui[u] * 2 > n_items)
+        if len(dense):
+            rank = r_int(n_items - self._lui[u[dense]])
+            j[dense] = rank + self._count_below(u[dense], rank + 1, self._gaps)
+        collisions = np.flatnonzero(self._is_positive(u, j))
+        while len(collisions):
+            j[collisions] = r_int(n_items, size=len(collisions))
+            collisions = collisions[self._is_positive(u[collisions], j[collisions])]
+        return u, i, j
+
+    def _count_below(self, users: np.ndarray, values: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """
+        Number of entries of keys lower than values within the training row of every user: a binary search run in
+        lockstep over all the rows
+        """
+        low, high = self._indptr[users], self._indptr[users + 1]
+        last = len(keys) - 1
+        for _ in range(self._search_steps):
+            middle = (low + high) >> 1
+            before = (middle < high) & (keys[np.minimum(middle, last)] < values)
+            low = np.where(before, middle + 1, low)
+            high = np.where(before, high, middle)
+        return low - self._indptr[users]
+
+    def _is_positive(self, users: np.ndarray, items: np.ndarray) -> np.ndarray:
+        """
+        Membership of items in the training rows of users
+        """
+        position = self._indptr[users] + self._count_below(users, items, self._indices)
+        return (position < self._indptr[users + 1]) & \
+               (self._indices[np.minimum(position, len(self._indices) - 1)] == items)
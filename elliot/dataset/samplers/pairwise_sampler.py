@@ -17,12 +17,13 @@ class Sampler:
                  items
                  ):
         np.random.seed(42)
+        self._nprandom = np.random
         self._ratings = ratings
         self._users = users
         self._items = items
 
     def step(self, events: int):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_users = len(self._users)
         n_items = len(self._items)
         users = self._users
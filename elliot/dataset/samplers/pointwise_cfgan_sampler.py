@@ -13,6 +13,7 @@ import numpy as np
 class Sampler:
     def __init__(self, indexed_ratings, sp_i_train, s_zr, s_pm):
         np.random.seed(42)
+        self._nprandom = np.random
         self._indexed_ratings = indexed_ratings
         self._users = list(self._indexed_ratings.keys())
         self._nusers = len(self._users)
@@ -25,7 +26,7 @@ class Sampler:
         self._sp_i_train = sp_i_train
 
     def step(self, events: int, batch_size: int):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_users = self._nusers
         n_items = self._nitems
         ui_dict = self._ui_dict
@@ -13,6 +13,7 @@ import numpy as np
 class Sampler:
     def __init__(self, indexed_ratings, sparse_i_ratings):
         np.random.seed(42)
+        self._nprandom = np.random
         self._sparse_i_ratings = sparse_i_ratings
         self._indexed_ratings = indexed_ratings
         self._users = list(self._indexed_ratings.keys())
@@ -23,7 +24,7 @@ class Sampler:
         self._lui_dict = {u: len(v) for u, v in self._ui_dict.items()}
 
     def step(self, events: int, batch_size: int):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_users = self._nusers
         n_items = self._nitems
         ui_dict = self._ui_dict
@@ -36,7 +37,7 @@ class Sampler:
             lui = lui_dict[u]
             if lui == n_items:
                 sample()
-            np.random.shuffle(boolean_list)
+            self._nprandom.shuffle(boolean_list)
 
             if boolean_list[0]:
                 i = ui[r_int(lui)]
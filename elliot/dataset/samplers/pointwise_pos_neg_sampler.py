@@ -15,6 +15,7 @@ class Sampler:
     def __init__(self, indexed_ratings):
         np.random.seed(42)
         random.seed(42)
+        self._nprandom = np.random
         self._indexed_ratings = indexed_ratings
         self._users = list(self._indexed_ratings.keys())
         self._nusers = len(self._users)
@@ -24,7 +25,7 @@ class Sampler:
         self._lui_dict = {u: len(v) for u, v in self._ui_dict.items()}
 
     def step(self, events: int, batch_size: int):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_users = self._nusers
         n_items = self._nitems
         ui_dict = self._ui_dict
@@ -7,65 +7,59 @@ __version__ = '0.3.1'
 __author__ = 'Felice Antonio Merra, Vito Walter Anelli, Claudio Pomo'
 __email__ = 'felice.merra@poliba.it, vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
 
-import random
 import numpy as np
-import itertools
+import scipy.sparse as sp
+
+from elliot.dataset.samplers import custom_sampler as cs
+from elliot.dataset.samplers.sparse_sampler import to_sparse_tensor
 
 
 class Sampler:
+    """
+    Pointwise sampler of Wide&Deep: every sample is a user, a positive (b = 1) or a negative (b = 0) item, and the
+    sparse encoding s = [user one-hot | item one-hot | item features of every feature type].
+    The item part of s is precomputed once in a CSR feature store, and every batch is assembled by gathering its rows.
+    """
+
     def __init__(self, data):
         np.random.seed(42)
-        random.seed()
+        self._nprandom = np.random
         self._data = data
-        self._indexed_ratings = self._data.i_train_dict
-        self._users = list(self._indexed_ratings.keys())
-        self._nusers = len(self._users)
-        self._items = list({k for a in self._indexed_ratings.values() for k in a.keys()})
-        self._nitems = len(self._items)
-        self._ui_dict = {u: list(set(self._indexed_ratings[u])) for u in self._indexed_ratings}
-        self._lui_dict = {u: len(v) for u, v in self._ui_dict.items()}
-
-        self._nfeatures = len(data.features)
+        self._triples = cs.Sampler(self._data.i_train_dict)
+        self._nusers = data.num_users
+        # [item one-hot | sp_i_features[0] | sp_i_features[1] | ...], the columns are shifted by the user one-hot
+        self._item_store = sp.hstack([sp.identity(data.num_items, dtype=np.float32, format='csr')] +
+                                     list(data.sp_i_features), format='csr', dtype=np.float32)
+        self._item_store.sort_indices()
+        self._nfeatures = self._nusers + self._item_store.shape[1]
 
     def step(self, events: int, batch_size: int):
-        r_int = np.random.randint
-        n_users = self._nusers
-        n_items = self._nitems
-        ui_dict = self._ui_dict
-        lui_dict = self._lui_dict
-        n_features = self._nfeatures
-        sp_i_features = self._data.sp_i_features
-        user_encoder = self._data.user_encoder
-        item_encoder = self._data.item_encoder
-
-        def sample():
-            u = r_int(n_users)
-            u_one_hot = user_encoder.transform([[u]])
-
-            ui = ui_dict[u]
-            lui = lui_dict[u]
-            if lui == n_items:
-                sample()
-            b = random.getrandbits(1)
-            if b:
-                i = ui[r_int(lui)]
-            else:
-                i = r_int(n_items)
-                while i in ui:
-                    i = r_int(n_items)
-
-            i_one_hot = item_encoder.transform([[i]])
-
-            f_one_hot = list(itertools.chain.from_iterable([sp_i_feature.getrow(i).toarray()[0].tolist() for sp_i_feature in sp_i_features]))
+        for batch_start in range(0, events, batch_size):
+            size = min(batch_start + batch_size, events) - batch_start
+            u, pos, neg = self._triples.sample(size)
+            b = self._nprandom.randint(2, size=size)
+            i = np.where(b, pos, neg)
+            yield u, i, to_sparse_tensor(self.encode(u, i)), b
 
-            s = []
-            s += u_one_hot.toarray()[0].tolist()
-            s += i_one_hot.toarray()[0].tolist()
-            s += f_one_hot
+    def encode(self, users: np.ndarray, items: np.ndarray) -> sp.csr_matrix:
+        """
+        Sparse encodings (one row per sample) of the given users and items
+        """
+        store = self._item_store
+        item_nnz = np.diff(store.indptr)[items]
+        indptr = np.zeros(len(users) + 1, dtype=np.int64)
+        np.cumsum(item_nnz + 1, out=indptr[1:])
 
-            return u, i, s, b
+        # the entries of the item rows, gathered without a Python loop
+        starts = store.indptr[items]
+        gathered = np.repeat(starts - np.cumsum(item_nnz) + item_nnz, item_nnz) + np.arange(item_nnz.sum())
+        # every row starts with the user entry, followed by the item entries
+        item_entries = np.ones(indptr[-1], dtype=bool)
+        item_entries[indptr[:-1]] = False
 
-        for batch_start in range(0, events, batch_size):
-            u, i, s, b = map(np.array,
-                             zip(*[sample() for _ in range(batch_start, min(batch_start + batch_size, events))]))
-            yield u, i, s, b
+        indices = np.empty(indptr[-1], dtype=np.int64)
+        indices[indptr[:-1]] = users
+        indices[item_entries] = self._nusers + store.indices[gathered]
+        values = np.ones(indptr[-1], dtype=np.float32)
+        values[item_entries] = store.data[gathered]
+        return sp.csr_matrix((values, indices, indptr), shape=(len(users), self._nfeatures))
@@ -0,0 +1,112 @@
+"""
+Module description:
+Background prefetching of the batches of any sampler.
+
+The batches of an epoch are produced by a daemon thread into a bounded queue while the training loop consumes them,
+so the (GIL-releasing) numerical training step and the Python/NumPy sampling overlap.
+The producer draws from its own generators, never from the global numpy and random ones, which the training loop
+may use at the same time.
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+import copy
+import inspect
+import queue
+import random
+import threading
+
+import numpy as np
+
+_END = object()
+
+
+def prefetch(sampler, depth: int, seed: int = 42):
+    """
+    Wraps sampler in a PrefetchSampler if depth is positive and its step method is a batch generator, otherwise
+    returns it unchanged (e.g., the tf.data pipeline samplers, which prefetch on their own)
+    """
+    if depth and inspect.isgeneratorfunction(getattr(type(sampler), "step", None)):
+        return PrefetchSampler(sampler, int(depth), seed)
+    return sampler
+
+
+class PrefetchSampler:
+    """
+    Wraps a sampler exposing a step(...) batch generator, that draws from its _nprandom (numpy) and _random (random)
+    generators.
+    Every call of step produces its batches from a copy of the sampler with new generators, seeded with seed + epoch,
+    so the batches only depend on the seed and on the epoch number, set by the training loop (set_epoch). The other
+    calls of step in an epoch (e.g., at evaluation time) do not change the batches of the following epochs.
+    Any other attribute is read from the wrapped sampler.
+    """
+
+    def __init__(self, sampler, depth: int = 2, seed: int = 42):
+        """
+        :param sampler: sampler to wrap
+        :param depth: maximum number of batches waiting in the queue
+        :param seed: seed of the first epoch
+        """
+        if depth < 1:
+            raise Exception("The prefetch depth must be a positive integer")
+        self._sampler = sampler
+        self._depth = depth
+        self._seed = seed
+        self._epoch = 0
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__["_sampler"], name)
+
+    def set_epoch(self, epoch: int):
+        """
+        :param epoch: epoch of the training loop, whose seed is used by the following calls of step
+        """
+        self._epoch = epoch
+
+    def step(self, *args, **kwargs):
+        seed = self._seed + self._epoch
+        sampler = copy.copy(self._sampler)
+        sampler._nprandom = np.random.RandomState(seed)
+        sampler._random = random.Random(seed)
+        batches = queue.Queue(maxsize=self._depth)
+        stop = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(sampler, batches, stop, args, kwargs), daemon=True)
+        producer.start()
+        try:
+            while True:
+                batch = batches.get()
+                if batch is _END:
+                    break
+                if isinstance(batch, BaseException):
+                    raise batch
+                yield batch
+        finally:
+            # the consumer stopped early (early stopping, error, or an abandoned generator): release the producer
+            stop.set()
+            while producer.is_alive():
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            producer.join()
+
+    def _produce(self, sampler, batches, stop, args, kwargs):
+        try:
+            for batch in sampler.step(*args, **kwargs):
+                if not self._put(batches, batch, stop):
+                    return
+            self._put(batches, _END, stop)
+        except Exception as e:
+            self._put(batches, e, stop)
+
+    @staticmethod
+    def _put(batches, item, stop) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
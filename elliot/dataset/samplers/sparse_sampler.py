@@ -9,17 +9,41 @@ __email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
 
 import random
 
+import numpy as np
+import tensorflow as tf
+
 
 class Sampler:
-    def __init__(self, sp_i_train
+    def __init__(self, sp_i_train, sparse=False
                  ):
+        """
+        :param sp_i_train: sparse matrix whose rows are sampled
+        :param sparse: if True, batches are tf.SparseTensor (memory proportional to the batch non-zeros) instead of
+        dense arrays
+        """
         random.seed(42)
-        self._train = sp_i_train
+        self._nprandom = np.random
+        self._random = random
+        self._sparse = sparse
+        self._train = sp_i_train.tocsr() if sparse else sp_i_train
 
     def step(self, users: int, batch_size: int):
         train = self._train
-        shuffled_list = random.sample(range(users), users)
+        shuffled_list = self._random.sample(range(users), users)
 
         for start_idx in range(0, users, batch_size):
             end_idx = min(start_idx + batch_size, users)
-            yield train[shuffled_list[start_idx:end_idx]].toarray()
+            if self._sparse:
+                yield to_sparse_tensor(train[shuffled_list[start_idx:end_idx]])
+            else:
+                yield train[shuffled_list[start_idx:end_idx]].toarray()
+
+
+def to_sparse_tensor(matrix) -> tf.SparseTensor:
+    """
+    float32 tf.SparseTensor of a CSR matrix, with the entries in row-major (canonical) order
+    """
+    matrix.sort_indices()
+    rows = np.repeat(np.arange(matrix.shape[0], dtype=np.int64), np.diff(matrix.indptr))
+    indices = np.stack([rows, matrix.indices.astype(np.int64)], axis=1)
+    return tf.SparseTensor(indices, matrix.data.astype(np.float32), matrix.shape)
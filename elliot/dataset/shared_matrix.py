@@ -0,0 +1,177 @@
+"""
+Module description:
+Process-shareable CSR matrices.
+
+The data, indices and indptr arrays of a CSR matrix are moved to shared memory blocks (multiprocessing.shared_memory)
+or to memory-mapped .npy files. The resulting matrix is an ordinary scipy CSR matrix whose pickled form is just a small
+handle: worker processes re-attach the same physical buffers without copying them.
+Plain arrays are shared the same way (share_array, attach_array).
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+import atexit
+import os
+import shutil
+import tempfile
+import typing as t
+import uuid
+from collections import namedtuple
+
+import numpy as np
+import scipy.sparse as sp
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8
+    shared_memory = None
+
+SHARED_MEMORY = "shared_memory"
+MMAP = "mmap"
+
+ArrayHandle = namedtuple("ArrayHandle", ["backend", "name", "dtype", "shape"])
+ArrayHandle.__doc__ = """
+Picklable description of a shared array: name of its shared memory block (or path of its .npy file), dtype and shape
+"""
+
+CSRHandle = namedtuple("CSRHandle", ["backend", "shape", "arrays"])
+CSRHandle.__doc__ = """
+Picklable description of a shared CSR matrix: arrays holds the ArrayHandle of data, indices and indptr
+"""
+
+_components = ("data", "indices", "indptr")
+_owned_blocks = []
+_owned_folders = []
+
+
+class SharedCSRMatrix(sp.csr_matrix):
+    """
+    CSR matrix whose arrays live in shared memory or in memory-mapped files.
+    Pickling sends the handle only; matrices derived from it (e.g., slices, products) are regular in-memory matrices.
+    """
+    _handle = None
+    _segments = ()
+
+    @property
+    def handle(self) -> t.Optional[CSRHandle]:
+        return self._handle
+
+    def __reduce__(self):
+        if self._handle is None:
+            return sp.csr_matrix, ((self.data, self.indices, self.indptr), self.shape)
+        return attach_csr, (self._handle,)
+
+
+def share_array(array: np.ndarray, backend: str = SHARED_MEMORY, folder: t.Optional[str] = None) -> ArrayHandle:
+    """
+    Copies an array to shareable storage, owned by this process until release (or free_arrays)
+    :param array: array to share
+    :param backend: "shared_memory" or "mmap"
+    :param folder: folder of the .npy file for the mmap backend (a temporary folder, removed at exit, if None)
+    :return: the handle of the shared array
+    """
+    array = np.ascontiguousarray(array)
+    if backend == SHARED_MEMORY:
+        if shared_memory is None:
+            raise Exception("shared_memory backend requires Python 3.8 or later. Use the mmap backend")
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        _owned_blocks.append(block)
+        return ArrayHandle(backend, block.name, array.dtype.str, array.shape)
+    elif backend == MMAP:
+        if folder is None:
+            folder = tempfile.mkdtemp(prefix="elliot_shared_")
+            _owned_folders.append(folder)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.abspath(os.path.join(folder, f"{uuid.uuid4().hex}.npy"))
+        np.save(path, array)
+        return ArrayHandle(backend, path, array.dtype.str, array.shape)
+    else:
+        raise Exception(f"Unrecognized shared matrix backend: {backend}")
+
+
+def attach_array(handle: ArrayHandle) -> t.Tuple[np.ndarray, t.Any]:
+    """
+    Zero-copy view of a shared array
+    :return: the array and the shared memory block backing it (None for the mmap backend), which must be kept alive
+    as long as the array is used
+    """
+    if handle.backend == SHARED_MEMORY:
+        block = _open_block(handle.name)
+        return np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=block.buf), block
+    return np.load(handle.name, mmap_mode="r"), None
+
+
+def free_arrays(handles: t.Iterable[ArrayHandle]):
+    """
+    Frees the storage of arrays shared by this process, before release
+    """
+    names = {h.name for h in handles}
+    for block in [b for b in _owned_blocks if b.name in names]:
+        _owned_blocks.remove(block)
+        _free_block(block)
+    for handle in handles:
+        if handle.backend == MMAP and os.path.exists(handle.name):
+            os.remove(handle.name)
+
+
+def share_csr(matrix: sp.spmatrix, backend: str = SHARED_MEMORY, folder: t.Optional[str] = None) -> SharedCSRMatrix:
+    """
+    Copies a sparse matrix to shareable storage
+    :param matrix: sparse matrix
+    :param backend: "shared_memory" or "mmap"
+    :param folder: folder of the .npy files for the mmap backend (a temporary folder, removed at exit, if None)
+    :return: a SharedCSRMatrix backed by the shared storage
+    """
+    matrix = matrix.tocsr()
+    if backend == MMAP and folder is None:
+        folder = tempfile.mkdtemp(prefix="elliot_csr_")
+        _owned_folders.append(folder)
+    arrays = tuple(share_array(getattr(matrix, component), backend, folder) for component in _components)
+    return attach_csr(CSRHandle(backend, matrix.shape, arrays))
+
+
+def attach_csr(handle: CSRHandle) -> SharedCSRMatrix:
+    """
+    Zero-copy view of a shared CSR matrix
+    """
+    arrays, segments = zip(*map(attach_array, handle.arrays))
+    data, indices, indptr = arrays
+    matrix = SharedCSRMatrix((data, indices, indptr), shape=handle.shape, copy=False)
+    matrix._handle = handle
+    matrix._segments = tuple(segment for segment in segments if segment is not None)
+    return matrix
+
+
+def _open_block(name: str):
+    try:
+        # the creating process owns the block: attached processes must not unlink it when they exit
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: worker processes share the resource tracker of their parent, so tracking is harmless
+        return shared_memory.SharedMemory(name=name)
+
+
+def _free_block(block):
+    try:
+        block.close()
+    except BufferError:
+        # views on the block are still alive, the memory is released when they are
+        pass
+    block.unlink()
+
+
+def release():
+    """
+    Frees the shared storage created by this process
+    """
+    while _owned_blocks:
+        _free_block(_owned_blocks.pop())
+    while _owned_folders:
+        shutil.rmtree(_owned_folders.pop(), ignore_errors=True)
+
+
+atexit.register(release)
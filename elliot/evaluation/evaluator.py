@@ -26,12 +26,19 @@ from time import time
 from types import SimpleNamespace
 import logging as pylog
 import numpy as np
+import scipy.sparse as sp
 
 import elliot.dataset.dataset as ds
 from elliot.utils import logging
+from elliot.utils.recommendation_batch import RecommendationBatch
 from . import metrics
 from . import popularity_utils
 from . import relevance
+from .executor import EvaluationExecutor
+from .metrics.base_metric import BaseMetric
+from .metrics.hit_matrix import HitMatrix
+from .metrics.item_exposure import ItemExposure
+from .statistical_significance import UserMetricArray
 
 
 class Evaluator(object):
@@ -51,6 +58,8 @@ class Evaluator(object):
             raise Exception("Cutoff values must be smaller than recommendation list length (top_k)")
         self._rel_threshold = data.config.evaluation.relevance_threshold
         self._paired_ttest = self._data.config.evaluation.paired_ttest
+        self._streaming = getattr(data.config.evaluation, "streaming", False)
+        self._workers = getattr(data.config.evaluation, "workers", 1)
         self._metrics = metrics.parse_metrics(data.config.evaluation.simple_metrics)
         self._complex_metrics = getattr(data.config.evaluation, "complex_metrics", dict())
         #TODO integrate complex metrics in validation metric (the problem is that usually complex metrics generate a complex name that does not match with the base name when looking for the loss value)
@@ -60,7 +69,7 @@ class Evaluator(object):
         #     raise Exception("Validation metric must be in list of general metrics")
         self._test = data.get_test()
 
-        self._pop = popularity_utils.Popularity(self._data)
+        self._pop = popularity_utils.get_popularity(self._data)
 
         self._evaluation_objects = SimpleNamespace(relevance=relevance.Relevance(self._test, self._rel_threshold),
                                                    pop=self._pop,
@@ -74,38 +83,56 @@ class Evaluator(object):
                                                            num_items=self._data.num_items,
                                                            data = self._data,
                                                            additional_metrics=self._complex_metrics)
-        self._needed_recommendations = self._compute_needed_recommendations()
+        self._needed_recommendations, self._needed_ranked_recommendations = self._compute_needed_recommendations()
+        self._ranked_items = self._compute_ranked_items() \
+            if any(m.values_from_ranks is not None for m in self._metrics) else None
+        self._train_sizes = np.diff(self._data.sp_i_train.indptr) if self._ranked_items is not None else None
+        self._expects_positions = False
+        self._executor = EvaluationExecutor(self._workers, self._data, self._params,
+                                            [eval_objs for _, eval_objs in self._get_test_data()]) \
+            if self._workers > 1 else None
 
     def eval(self, recommendations):
         """
         Runtime Evaluation of Accuracy Performance (top-k)
+        Every split is evaluated at all the cutoffs in a single pass over the recommendation lists
+        :param recommendations: validation and test recommendations, as RecommendationBatch objects or
+        {user: [(item, score), ...]} dictionaries. The metrics without a vectorized implementation read a
+        RecommendationBatch through its dictionary view
         :return:
         """
-        result_dict = {}
-        for k in self._k:
-            val_results, val_statistical_results, test_results, test_statistical_results = self.eval_at_k(recommendations, k)
-            local_result_dict ={"val_results": val_results,
-                                "val_statistical_results": val_statistical_results,
-                                "test_results": test_results,
-                                "test_statistical_results": test_statistical_results}
-            result_dict[k] = local_result_dict
-        return result_dict
+        return self._eval_at_cutoffs(recommendations, self._k)
 
     def eval_at_k(self, recommendations, k):
-        val_test = ["Validation", "Test"]
-        result_list = []
-        for p, (test_data, eval_objs) in enumerate(self._get_test_data()):
-            if eval_objs is not None:
-                eval_objs.cutoff = k
-            results, statistical_results = self._process_test_data(recommendations[p], test_data, eval_objs, val_test[p])
-            result_list.append((results, statistical_results))
-
-        if (not result_list[0][0]):
-            return result_list[1][0], result_list[1][1], result_list[1][0], result_list[1][1]
-        elif (not result_list[1][0]):
-            return result_list[0][0], result_list[0][1], result_list[0][0], result_list[0][1]
-        else:
-            return result_list[0][0], result_list[0][1], result_list[1][0], result_list[1][1]
+        local_result_dict = self._eval_at_cutoffs(recommendations, [k])[k]
+        return local_result_dict["val_results"], local_result_dict["val_statistical_results"], \
+            local_result_dict["test_results"], local_result_dict["test_statistical_results"]
+
+    @property
+    def streaming(self) -> bool:
+        """
+        Whether the recommenders should feed the evaluation block by block (evaluation: streaming: True)
+        """
+        return self._streaming
+
+    def stream(self):
+        """
+        Streaming evaluation: the recommendations are added block by block (add), as they are produced, and the
+        results are computed at the end (results), in the format of eval
+        """
+        return EvaluationStream(self, self._k)
+
+    def close(self):
+        """
+        Stops the worker processes of the parallel evaluation (evaluation: workers), at the end of the model run
+        """
+        if self._executor is not None:
+            self._executor.close()
+
+    def _eval_at_cutoffs(self, recommendations, cutoffs):
+        stream = EvaluationStream(self, cutoffs)
+        stream.add(recommendations)
+        return stream.results()
 
     def _get_test_data(self):
         return [(self._val if hasattr(self, '_val') else None,
@@ -114,49 +141,262 @@ class Evaluator(object):
                  self._evaluation_objects if hasattr(self, '_evaluation_objects') else None)
                 ]
 
-    def _process_test_data(self, recommendations, test_data, eval_objs, val_test):
-        if (not test_data) or (not eval_objs):
-            return None, None
-        else:
-            recommendations = {u: recs for u, recs in recommendations.items() if test_data.get(u, [])}
-            rounding_factor = 5
-            eval_start_time = time()
-
-            metric_objects = [m(recommendations, self._data.config, self._params, eval_objs) for m in self._metrics]
-            for metric in self._complex_metrics:
-                metric_objects.extend(metrics.parse_metric(metric["metric"])(recommendations, self._data.config,
-                                                                             self._params, eval_objs, metric).get())
-            results = {m.name(): m.eval() for m in metric_objects}
-
-            str_results = {k: str(round(v, rounding_factor)) for k, v in results.items()}
-            # res_print = "\t".join([":".join(e) for e in str_results.items()])
-            self.logger.info("")
-            self.logger.info(f"{val_test} Evaluation results")
-            self.logger.info(f"Cut-off: {eval_objs.cutoff}")
-            self.logger.info(f"Eval Time: {time() - eval_start_time}")
-            self.logger.info(f"Results")
-            [self.logger.info("\t".join(e)) for e in str_results.items()]
-
-            statistical_results = {}
-            if self._paired_ttest:
-                statistical_results = {metric_object.name(): metric_object.eval_user_metric()
-                                       for metric_object in
-                                       [m(recommendations, self._data.config, self._params, eval_objs) for m
-                                        in self._metrics]
-                                       if isinstance(metric_object, metrics.StatisticalMetric)}
-            return results, statistical_results
 
     def _compute_needed_recommendations(self):
-        full_recommendations_metrics = any([m.needs_full_recommendations() for m in self._metrics])
+        """
+        Length of the needed recommendation lists, without and with the full-ranking positions of the relevant items
+        """
+        full_recommendations_metrics = [m for m in self._metrics if m.needs_full_recommendations()]
         full_recommendations_additional_metrics = any([metrics.parse_metric(metric["metric"]).needs_full_recommendations() for metric in self._complex_metrics])
         if full_recommendations_metrics:
             self.logger.warn("At least one basic metric requires full length recommendations")
         if full_recommendations_additional_metrics:
             self.logger.warn("At least one additional metric requires full length recommendations", None, 1, None)
         if full_recommendations_metrics or full_recommendations_metrics:
-            return self._data.num_items
+            ranked = all(m.values_from_ranks is not None for m in full_recommendations_metrics)
+            return self._data.num_items, self._data.config.top_k if ranked else self._data.num_items
+        else:
+            return self._data.config.top_k, self._data.config.top_k
+
+    def _compute_ranked_items(self):
+        """
+        Relevant items of the validation and test splits, as a users x items CSR matrix of private ids
+        """
+        users, items = [], []
+        for test_data, eval_objs in self._get_test_data():
+            if test_data and eval_objs:
+                index = eval_objs.relevance.index
+                split_users = np.array([self._data.public_users.get(u, -1) for u in index.users], dtype=np.int64)
+                split_items = np.array([self._data.public_items.get(i, -1) for i in index.items], dtype=np.int64)
+                users.append(np.repeat(split_users, index.n_relevant))
+                items.append(split_items[index.indices])
+        users, items = np.concatenate(users), np.concatenate(items)
+        known = (users >= 0) & (items >= 0)
+        ranked_items = sp.csr_matrix((np.ones(np.count_nonzero(known), dtype=bool), (users[known], items[known])),
+                                     shape=(self._data.num_users, self._data.num_items))
+        ranked_items.sum_duplicates()
+        return ranked_items
+
+    def get_needed_recommendations(self, full_ranking: bool = False):
+        """
+        Length of the recommendation lists needed by the metrics
+        :param full_ranking: whether the recommender reports the full-ranking positions of the items of
+        get_ranked_items, so the metrics computed from them (values_from_ranks) do not need full length lists
+        """
+        # the recommendations must then carry the positions, see SplitAccumulator.add
+        self._expects_positions = full_ranking and self._ranked_items is not None and \
+            self._needed_ranked_recommendations != self._needed_recommendations
+        return self._needed_ranked_recommendations if full_ranking else self._needed_recommendations
+
+    def get_ranked_items(self):
+        """
+        Items whose full-ranking positions the recommenders should report along with the top-k lists (see
+        RecommendationBatch.item_positions), as a users x items CSR matrix of private ids.
+        None when no metric is computed from the positions.
+        """
+        return self._ranked_items
+
+
+class EvaluationStream(object):
+    """
+    Evaluation of the validation and test recommendations of blocks of users.
+    Every block is evaluated when it is added: the metrics with a vectorized implementation (user_values_from_hits,
+    value_from_exposure) keep only the per-user values and the item exposure histograms, so the recommendations of
+    the block can be released. The other metrics (and the complex ones) need all the recommendation lists, which are
+    kept until the results are computed.
+    """
+
+    def __init__(self, evaluator: Evaluator, cutoffs):
+        self._evaluator = evaluator
+        self._cutoffs = cutoffs
+        self._splits = [SplitAccumulator(evaluator, p, test_data, eval_objs, cutoffs) if test_data and eval_objs
+                        else None for p, (test_data, eval_objs) in enumerate(evaluator._get_test_data())]
+
+    def add(self, recommendations):
+        """
+        :param recommendations: validation and test recommendations of a block of users
+        """
+        for split, split_recommendations in zip(self._splits, recommendations):
+            if split is not None:
+                split.add(split_recommendations)
+
+    def results(self):
+        """
+        Results of the recommendations added so far, by cutoff
+        """
+        val_test = ["Validation", "Test"]
+        split_results = [split.results(val_test[p]) if split is not None else None
+                         for p, split in enumerate(self._splits)]
+
+        result_dict = {}
+        for k in self._cutoffs:
+            result_list = [split[k] if split is not None else (None, None) for split in split_results]
+            if (not result_list[0][0]):
+                result_list = [result_list[1], result_list[1]]
+            elif (not result_list[1][0]):
+                result_list = [result_list[0], result_list[0]]
+            local_result_dict ={"val_results": result_list[0][0],
+                                "val_statistical_results": result_list[0][1],
+                                "test_results": result_list[1][0],
+                                "test_statistical_results": result_list[1][1]}
+            result_dict[k] = local_result_dict
+        return result_dict
+
+
+class SplitAccumulator(object):
+    """
+    Metric accumulators of a split (validation or test): per-user values of the metrics computed from the hits (and
+    from the full-ranking positions of the relevant items, when the recommendations carry them), item exposure
+    histograms, and the recommendations needed by the other metrics
+    """
+
+    def __init__(self, evaluator: Evaluator, split: int, test_data, eval_objs, cutoffs):
+        self._evaluator = evaluator
+        self._split = split
+        self._data = evaluator._data
+        self._test_data = test_data
+        self._eval_objs = eval_objs
+        self._cutoffs = cutoffs
+        self._hit_metrics = [m for m in evaluator._metrics if m.user_values_from_hits is not None]
+        self._rank_metrics = [m for m in evaluator._metrics if m.values_from_ranks is not None and
+                              m not in self._hit_metrics]
+        self._exposure_metrics = [m for m in evaluator._metrics if m.value_from_exposure is not None and
+                                  m not in self._hit_metrics + self._rank_metrics]
+        # the rank metrics join the hit ones when the first block carries the positions (see _set_ranked)
+        self._set_ranked(False)
+        self._first_block = True
+
+        self._users = []
+        self._exposure = ItemExposure(self._data.num_items, cutoffs, self._data.public_items) \
+            if self._exposure_metrics else None
+        self._recommendations = []
+
+    def _set_ranked(self, ranked: bool):
+        self._ranked = ranked
+        self._matrix_metrics = self._hit_metrics + (self._rank_metrics if ranked else [])
+        self._keep_recommendations = bool(self._evaluator._complex_metrics) or \
+            len(self._matrix_metrics) + len(self._exposure_metrics) < len(self._evaluator._metrics)
+        self._user_values = {cutoff: {m: [] for m in self._matrix_metrics} for cutoff in self._cutoffs}
+
+    def add(self, recommendations):
+        if self._first_block and len(recommendations):
+            self._first_block = False
+            self._set_ranked(self._rank_metrics != [] and isinstance(recommendations, RecommendationBatch) and
+                             recommendations.item_positions is not None)
+            if self._rank_metrics and not self._ranked and self._evaluator._expects_positions:
+                raise Exception(f"Metrics {[m.name() for m in self._rank_metrics]} need full length recommendation "
+                                f"lists or the full-ranking positions of the relevant items: the recommender "
+                                f"requested top-k lists only, but its recommendations do not carry the positions "
+                                f"(see RecMixin.merge_recommendations and get_needed_recommendations)")
+        if isinstance(recommendations, RecommendationBatch):
+            recommendations = recommendations.select(np.fromiter((bool(self._test_data.get(u, []))
+                                                                  for u in recommendations),
+                                                                 dtype=bool, count=len(recommendations)))
         else:
-            return self._data.config.top_k
+            recommendations = {u: recs for u, recs in recommendations.items() if self._test_data.get(u, [])}
+
+        # the metrics supporting it are computed from the hits of the recommendations, matched once for all cutoffs
+        if self._matrix_metrics:
+            hits = HitMatrix(recommendations, self._eval_objs.relevance.index, max(self._cutoffs),
+                             self._evaluator._train_sizes if self._ranked else None)
+            self._users.append(hits.private_users if hits.private_users is not None else
+                               np.fromiter(map(self._data.public_users.get, hits.users), dtype=np.int64,
+                                           count=len(hits.users)))
+            for cutoff in self._cutoffs:
+                for m in self._hit_metrics:
+                    self._user_values[cutoff][m].append(m.user_values_from_hits(hits, cutoff))
+                for m in self._matrix_metrics[len(self._hit_metrics):]:
+                    self._user_values[cutoff][m].append(m.values_from_ranks(hits, cutoff))
+        if self._exposure is not None:
+            self._exposure.add(recommendations)
+        if self._keep_recommendations:
+            self._recommendations.append(recommendations)
 
-    def get_needed_recommendations(self):
-        return self._needed_recommendations
+    def results(self, val_test):
+        """
+        Results of the split at every cutoff
+        :return: {cutoff: (results, statistical_results)}
+        """
+        evaluator, eval_objs = self._evaluator, self._eval_objs
+        recommendations = RecommendationBatch.concatenate(self._recommendations)
+        sharded_metrics = self._evaluate_sharded(recommendations)
+        n_other_metrics = len(evaluator._metrics) - len(self._matrix_metrics) - len(self._exposure_metrics) + \
+            len(evaluator._complex_metrics)
+        if isinstance(recommendations, RecommendationBatch) and \
+                len(sharded_metrics) < n_other_metrics * len(self._cutoffs):
+            # the other metrics read the dictionary format, built once for all of them
+            recommendations = dict(recommendations.items())
+        users = np.concatenate(self._users) if self._users else np.zeros(0, dtype=np.int64)
+        rounding_factor = 5
+
+        cutoff_results = {}
+        for cutoff in self._cutoffs:
+            eval_start_time = time()
+            eval_objs.cutoff = cutoff
+            results = {}
+            statistical_results = {}
+            # every metric is computed once: the per-user values give both the result and the statistical arrays
+            for m in evaluator._metrics:
+                if m in self._matrix_metrics:
+                    values = np.concatenate(self._user_values[cutoff][m]) if self._users else np.zeros(0)
+                    results[m.name()] = np.average(values)
+                    # the values of the non statistical metrics (AUC) are not per-user
+                    if evaluator._paired_ttest and issubclass(m, metrics.StatisticalMetric):
+                        statistical_results[m.name()] = UserMetricArray(users, values)
+                    continue
+                if m in self._exposure_metrics:
+                    results[m.name()] = m.value_from_exposure(self._exposure, cutoff)
+                    continue
+                metric_object = sharded_metrics[(cutoff, m)][0] if (cutoff, m) in sharded_metrics else \
+                    m(recommendations, self._data.config, evaluator._params, eval_objs)
+                statistical = isinstance(metric_object, metrics.StatisticalMetric)
+                if statistical and type(metric_object).eval is BaseMetric.eval:
+                    user_values = metric_object.eval_user_metric()
+                    results[metric_object.name()] = np.average(list(user_values.values()))
+                else:
+                    results[metric_object.name()] = metric_object.eval()
+                    user_values = metric_object.eval_user_metric() if statistical and evaluator._paired_ttest \
+                        else None
+                if statistical and evaluator._paired_ttest:
+                    statistical_results[metric_object.name()] = UserMetricArray.from_dict(user_values,
+                                                                                          self._data.public_users)
+            for n, metric in enumerate(evaluator._complex_metrics):
+                metric_objects = sharded_metrics[(cutoff, n)] if (cutoff, n) in sharded_metrics else \
+                    metrics.parse_metric(metric["metric"])(recommendations, self._data.config, evaluator._params,
+                                                           eval_objs, metric).get()
+                results.update({m.name(): m.eval() for m in metric_objects})
+
+            str_results = {k: str(round(v, rounding_factor)) for k, v in results.items()}
+            # res_print = "\t".join([":".join(e) for e in str_results.items()])
+            evaluator.logger.info("")
+            evaluator.logger.info(f"{val_test} Evaluation results")
+            evaluator.logger.info(f"Cut-off: {eval_objs.cutoff}")
+            evaluator.logger.info(f"Eval Time: {time() - eval_start_time}")
+            evaluator.logger.info(f"Results")
+            [evaluator.logger.info("\t".join(e)) for e in str_results.items()]
+
+            cutoff_results[cutoff] = (results, statistical_results)
+        return cutoff_results
+
+    def _evaluate_sharded(self, recommendations):
+        """
+        Metrics computed in parallel on shards of users (evaluation: workers), see EvaluationExecutor
+        :return: metric objects by cutoff and metric (class of the simple metrics, position of the complex ones)
+        """
+        executor = self._evaluator._executor
+        if executor is None or not len(recommendations):
+            return {}
+        keys, tasks = [], []
+        for cutoff in self._cutoffs:
+            for m in self._evaluator._metrics:
+                if m not in self._matrix_metrics + self._exposure_metrics and executor.shardable(m):
+                    keys.append((cutoff, m))
+                    tasks.append((m, cutoff, None))
+            for n, metric in enumerate(self._evaluator._complex_metrics):
+                metric_class = metrics.parse_metric(metric["metric"])
+                if executor.shardable(metric_class):
+                    keys.append((cutoff, n))
+                    tasks.append((metric_class, cutoff, metric))
+        if not tasks:
+            return {}
+        return dict(zip(keys, executor.evaluate(self._split, tasks, recommendations)))
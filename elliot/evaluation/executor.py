@@ -0,0 +1,193 @@
+"""
+Module description:
+Parallel evaluation of the metrics without a vectorized implementation.
+
+The users of a split are divided in contiguous shards. Every worker process builds a metric on the recommendations of a
+shard and returns its partial state (map); the states of the shards are then merged in user order (reduce), following
+the protocol of BaseMetric (partial, merge). The pool of workers lives as long as the executor, and the recommendation
+arrays are moved to shared memory at every evaluation, so the workers read them without copying them.
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+import atexit
+import multiprocessing as mp
+import typing as t
+import weakref
+from itertools import islice
+from types import SimpleNamespace
+
+import numpy as np
+
+from elliot.dataset.shared_matrix import MMAP, SHARED_MEMORY, attach_array, free_arrays, share_array, shared_memory
+from elliot.utils.recommendation_batch import RecommendationBatch
+from .metrics.base_metric import BaseMetric
+from .metrics.metrics_utils import ProxyStatisticalMetric
+from .metrics.statistical_array_metric import StatisticalMetric
+
+# state of the worker processes (see _init_worker)
+_worker = None
+
+# executors with a running pool, closed at exit
+_open_executors = weakref.WeakSet()
+
+
+class EvaluationExecutor(object):
+    """
+    Pool of worker processes computing metrics on shards of users (evaluation: workers).
+
+    The pool is started on the first evaluation and reused by the following ones (e.g., the validation of every
+    epoch), until close: the configuration and the evaluation objects of the splits reach the workers once, when
+    they start, and every evaluation sends only the recommendations.
+    """
+
+    def __init__(self, workers: int, data, params, eval_objs: t.List[t.Optional[SimpleNamespace]]):
+        """
+        :param workers: number of worker processes
+        :param data: dataset of the evaluated recommendations
+        :param eval_objs: evaluation objects of every split (None for the missing ones)
+        """
+        self._workers = workers
+        self._initargs = (data, params, eval_objs)
+        self._config = data.config
+        self._params = params
+        self._eval_objs = eval_objs
+        self._pool = None
+
+    @staticmethod
+    def shardable(metric_class) -> bool:
+        """
+        Whether a metric can be computed on shards of users: it implements the map/reduce protocol, or it is the average
+        of its per-user values
+        """
+        return metric_class.merge is not None or \
+            (issubclass(metric_class, StatisticalMetric) and metric_class.eval is BaseMetric.eval)
+
+    def evaluate(self, split: int, tasks: t.List[t.Tuple[t.Any, int, t.Optional[t.Dict]]],
+                 recommendations) -> t.List[t.List[BaseMetric]]:
+        """
+        Metrics of a split, computed in parallel
+        :param split: position of the split in the evaluation objects
+        :param tasks: metric class, cutoff and additional data (None for the simple metrics) of every metric
+        :param recommendations: recommendations of the split, as a RecommendationBatch or a dictionary
+        :return: the metric objects (as get) of every task
+        """
+        n_shards = max(min(self._workers, len(recommendations)), 1)
+        bounds = np.linspace(0, len(recommendations), n_shards + 1).astype(int).tolist()
+        shards = list(zip(bounds[:-1], bounds[1:]))
+
+        shared, handles = _share(recommendations, shards)
+        try:
+            # every shard is evaluated by a single worker, that builds its dictionary view once for all the tasks
+            shard_states = self._get_pool().map(_map_shard, [(split, tasks, shared_shard) for shared_shard in shared],
+                                                chunksize=1)
+        finally:
+            free_arrays(handles)
+
+        results = []
+        for n, (metric_class, cutoff, additional_data) in enumerate(tasks):
+            metric = _build(metric_class, {}, self._config, self._params, self._eval_objs[split], cutoff,
+                            additional_data)
+            results.append(_reduce(metric, [states[n] for states in shard_states]))
+        return results
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = mp.Pool(self._workers, initializer=_init_worker, initargs=self._initargs)
+            _open_executors.add(self)
+        return self._pool
+
+    def close(self):
+        """
+        Stops the worker processes, if started. A following evaluation starts them again
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        _open_executors.discard(self)
+
+
+def _close_all():
+    for executor in list(_open_executors):
+        executor.close()
+
+
+atexit.register(_close_all)
+
+
+def _build(metric_class, recommendations, config, params, eval_objs, cutoff, additional_data):
+    eval_objs = SimpleNamespace(**vars(eval_objs))
+    eval_objs.cutoff = cutoff
+    if additional_data is None:
+        return metric_class(recommendations, config, params, eval_objs)
+    return metric_class(recommendations, config, params, eval_objs, additional_data)
+
+
+def _reduce(metric: BaseMetric, states: t.List) -> t.List[BaseMetric]:
+    if metric.merge is not None:
+        return metric.merge(states)
+    user_values = {}
+    for state in states:
+        user_values.update(state)
+    return [ProxyStatisticalMetric(name=metric.name(), val=np.average(list(user_values.values())),
+                                   user_val=user_values)]
+
+
+############## Shared recommendations ##############
+
+def _share(recommendations, shards: t.List[t.Tuple[int, int]]):
+    """
+    Picklable form of the recommendations of every shard: the arrays of a RecommendationBatch are moved to shared
+    memory, and every shard refers to its rows; a dictionary is split in the dictionaries of the shards
+    :return: the shareable recommendations of the shards and the handles of the shared arrays
+    """
+    if not isinstance(recommendations, RecommendationBatch):
+        items = iter(recommendations.items())
+        return [dict(islice(items, stop - start)) for start, stop in shards], []
+    backend = SHARED_MEMORY if shared_memory is not None else MMAP
+    handles = [share_array(a, backend) for a in (recommendations.user_ids, recommendations.item_ids,
+                                                 recommendations.scores, recommendations.lengths)]
+    return [(handles, shard) for shard in shards], handles
+
+
+def _init_worker(data, params, eval_objs):
+    global _worker
+    _worker = SimpleNamespace(data=data, config=data.config, params=params, eval_objs=eval_objs)
+
+
+def _read_shard(shared) -> t.Dict:
+    """
+    Dictionary view of the recommendations of a shard
+    """
+    if isinstance(shared, dict):
+        return shared
+    handles, (start, stop) = shared
+    arrays, segments = zip(*map(attach_array, handles))
+    user_ids, item_ids, scores, lengths = (a[start:stop] for a in arrays)
+    recommendations = dict(RecommendationBatch(user_ids, item_ids, scores, _worker.data.private_users,
+                                               _worker.data.private_items, lengths).items())
+    # the lists are copies: the views on the shared blocks can be released
+    del arrays, user_ids, item_ids, scores, lengths
+    for segment in segments:
+        if segment is not None:
+            segment.close()
+    return recommendations
+
+
+def _map_shard(task):
+    """
+    States of all the tasks on the recommendations of a shard of users
+    """
+    split, tasks, shared = task
+    recommendations = _read_shard(shared)
+    eval_objs = _worker.eval_objs[split]
+
+    states = []
+    for metric_class, cutoff, additional_data in tasks:
+        metric = _build(metric_class, recommendations, _worker.config, _worker.params, eval_objs, cutoff,
+                        additional_data)
+        states.append(metric.partial() if metric.partial is not None else metric.eval_user_metric())
+    return states
@@ -88,6 +88,14 @@ class AUC(BaseMetric):
              for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))]
         return np.average([item for sublist in list_of_lists for item in sublist])
 
+    @staticmethod
+    def values_from_ranks(hits, cutoff):
+        """
+        Vectorized AUC on the full-ranking positions of the relevant items
+        :return: the AUC values of the relevant items of all the users, to be averaged
+        """
+        return hits.full_rank_auc()
+
     @staticmethod
     def needs_full_recommendations():
         _logger = logging.get_logger("Evaluator")
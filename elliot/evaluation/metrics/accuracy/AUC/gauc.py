@@ -101,6 +101,13 @@ class GAUC(BaseMetric):
         return {u: GAUC.__user_gauc(u_r, self._relevance.get_user_rel(u), self._num_items, len(self._evaluation_objects.data.train_dict[u]))
              for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))}
 
+    @staticmethod
+    def values_from_ranks(hits, cutoff):
+        """
+        Vectorized per-user GAUC on the full-ranking positions of the relevant items
+        """
+        return np.bincount(hits.full_rank_users(), weights=hits.full_rank_auc(), minlength=len(hits.users)) / \
+            hits.n_relevant
 
     @staticmethod
     def needs_full_recommendations():
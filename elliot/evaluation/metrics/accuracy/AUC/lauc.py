@@ -86,3 +86,11 @@ class LAUC(BaseMetric):
         return {u: LAUC.__user_auc_at_k(u_r, self._cutoff, self._relevance.get_user_rel(u), self._num_items, len(self._evaluation_objects.data.train_dict[u]))
              for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))}
 
+    @staticmethod
+    def values_from_ranks(hits, cutoff):
+        """
+        Vectorized per-user LAUC on the full-ranking positions of the relevant items in the first cutoff positions
+        """
+        in_cutoff = hits.full_ranks < cutoff
+        return np.bincount(hits.full_rank_users()[in_cutoff], weights=hits.full_rank_auc()[in_cutoff],
+                           minlength=len(hits.users)) / np.minimum(cutoff, hits.n_relevant)
@@ -85,3 +85,16 @@ class F1(BaseMetric):
         return {u: F1.__user_f1(u_r, self._cutoff, self._relevance.get_user_rel(u), self._squared_beta)
              for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))}
 
+    @staticmethod
+    def user_values_from_hits(hits, cutoff):
+        """
+        Vectorized evaluation function
+        :param hits: HitMatrix of the recommendations
+        :param cutoff: numerical threshold to limit the recommendation list
+        :return: the array of F-score values, aligned with hits.users
+        """
+        p = hits.hits_at(cutoff) / cutoff
+        r = hits.hits_at(cutoff) / hits.n_relevant
+        num = 2 * p * r
+        den = p + r
+        return np.divide(num, den, out=np.zeros_like(num), where=den != 0)
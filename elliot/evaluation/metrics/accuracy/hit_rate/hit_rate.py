@@ -83,3 +83,12 @@ class HR(BaseMetric):
         return {u: HR.__user_HR(u_r, self._cutoff, self._relevance.get_user_rel(u))
              for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))}
 
+    @staticmethod
+    def user_values_from_hits(hits, cutoff):
+        """
+        Vectorized evaluation function
+        :param hits: HitMatrix of the recommendations
+        :param cutoff: numerical threshold to limit the recommendation list
+        :return: the array of Hit Rate values, aligned with hits.users
+        """
+        return (hits.hits_at(cutoff) > 0).astype(int)
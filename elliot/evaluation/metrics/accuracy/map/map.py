@@ -97,3 +97,12 @@ class MAP(BaseMetric):
         return {u: MAP.__user_ap(u_r, self._cutoff, self._relevance.get_user_rel(u))
              for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))}
 
+    @staticmethod
+    def user_values_from_hits(hits, cutoff):
+        """
+        Vectorized evaluation function
+        :param hits: HitMatrix of the recommendations
+        :param cutoff: numerical threshold to limit the recommendation list
+        :return: the array of Mean Average Precision values, aligned with hits.users
+        """
+        return (hits.cumulative_hits(cutoff) / np.arange(1, cutoff + 1)).mean(axis=1)
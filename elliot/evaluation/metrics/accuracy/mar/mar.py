@@ -92,3 +92,12 @@ class MAR(BaseMetric):
         return {u: MAR.__user_ar(u_r, self._cutoff, self._relevance.get_user_rel(u))
              for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))}
 
+    @staticmethod
+    def user_values_from_hits(hits, cutoff):
+        """
+        Vectorized evaluation function
+        :param hits: HitMatrix of the recommendations
+        :param cutoff: numerical threshold to limit the recommendation list
+        :return: the array of Mean Average Recall values, aligned with hits.users
+        """
+        return hits.cumulative_hits(cutoff).mean(axis=1) / hits.n_relevant
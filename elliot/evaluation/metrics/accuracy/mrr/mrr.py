@@ -87,3 +87,12 @@ class MRR(BaseMetric):
         return {u: MRR.__user_mrr(u_r, self._cutoff, self._relevance.get_user_rel(u))
              for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))}
 
+    @staticmethod
+    def user_values_from_hits(hits, cutoff):
+        """
+        Vectorized evaluation function
+        :param hits: HitMatrix of the recommendations
+        :param cutoff: numerical threshold to limit the recommendation list
+        :return: the array of Mean Reciprocal Rank values, aligned with hits.users
+        """
+        return np.where(hits.first_hit < cutoff, 1 / (hits.first_hit + 1), 0)
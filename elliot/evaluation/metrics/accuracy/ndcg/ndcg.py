@@ -9,6 +9,8 @@ __email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it, alejandro.bell
 
 import typing as t
 
+import numpy as np
+
 from elliot.evaluation.metrics.base_metric import BaseMetric
 
 
@@ -72,10 +74,7 @@ class nDCG(BaseMetric):
         :param cutoff:
         :return:
         """
-        gains: t.List = sorted(list(self._relevance.get_user_rel_gains(user).values()))
-        n: int = min(len(gains), cutoff)
-        m: int = len(gains)
-        return sum(map(lambda g, r: gains[m - r - 1] * self._relevance.logarithmic_ranking_discount(r), gains, range(n)))
+        return self._relevance.get_user_idcg(user, cutoff)
 
     def compute_user_ndcg(self, user_recommendations: t.List, user, cutoff: int) -> float:
         """
@@ -124,7 +123,13 @@ class nDCG(BaseMetric):
         return {u: self.__user_ndcg(u_r, u, self._cutoff)
              for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))}
 
-
-
-
-
+    @staticmethod
+    def user_values_from_hits(hits, cutoff):
+        """
+        Vectorized evaluation function
+        :param hits: HitMatrix of the recommendations
+        :param cutoff: numerical threshold to limit the recommendation list
+        :return: the array of normalized Discounted Cumulative Gain values, aligned with hits.users
+        """
+        dcg = hits.dcg(cutoff)
+        return np.divide(dcg, hits.idcg(cutoff), out=np.zeros_like(dcg), where=dcg > 0)
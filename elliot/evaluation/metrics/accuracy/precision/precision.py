@@ -83,3 +83,12 @@ class Precision(BaseMetric):
         return {u: self.__user_precision(u_r, u, self._cutoff)
              for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))}
 
+    @staticmethod
+    def user_values_from_hits(hits, cutoff):
+        """
+        Vectorized evaluation function
+        :param hits: HitMatrix of the recommendations
+        :param cutoff: numerical threshold to limit the recommendation list
+        :return: the array of Precision values, aligned with hits.users
+        """
+        return hits.hits_at(cutoff) / cutoff
@@ -38,6 +38,27 @@ class BaseMetric(ABC):
     def eval(self):
         return np.average(list(self.eval_user_metric().values()))
 
+    # Metrics computable from the hits of the recommendations override it with a staticmethod
+    # user_values_from_hits(hits: HitMatrix, cutoff) returning the array of per-user values (see hit_matrix)
+    user_values_from_hits = None
+
+    # Metrics computable from the full-ranking positions of the relevant items override it with a staticmethod
+    # values_from_ranks(hits: HitMatrix, cutoff) returning the array of values to average (see hit_matrix). It is used
+    # when the recommendations carry the positions, in place of needs_full_recommendations
+    values_from_ranks = None
+
+    # Metrics computable from the item exposure histograms of the recommendations override it with a staticmethod
+    # value_from_exposure(exposure: ItemExposure, cutoff) returning the metric value (see item_exposure)
+    value_from_exposure = None
+
+    # Map/reduce protocol of the evaluation on shards of users (see evaluation/executor): partial(self) returns the state
+    # of the metric object on its recommendations (a shard of the users), and merge(self, partials), called on the
+    # metric object built with no recommendations, returns the metric objects (as get) of all the users from the states
+    # of consecutive shards, in user order. The metrics averaging eval_user_metric need neither: their state is
+    # the per-user values
+    partial = None
+    merge = None
+
     @staticmethod
     def needs_full_recommendations():
         return False
@@ -47,7 +47,7 @@ class ACLT(BaseMetric):
         """
         super().__init__(recommendations, config, params, eval_objects)
         self._cutoff = self._evaluation_objects.cutoff
-        self._long_tail = self._evaluation_objects.pop.get_long_tail()
+        self._long_tail = self._evaluation_objects.pop.get_long_tail_set()
 
     @staticmethod
     def name():
@@ -66,7 +66,7 @@ class ACLT(BaseMetric):
         :param user_relevant_items: list of user relevant items in the form [item1,...]
         :return: the value of the Average Recommendation Popularity metric for the specific user
         """
-        return len(set([i for i,v in user_recommendations[:cutoff]]) & set(long_tail))
+        return len(set([i for i,v in user_recommendations[:cutoff]]) & long_tail)
 
     # def eval(self):
     #     """
@@ -43,8 +43,8 @@ class ExtendedPopREO(BaseMetric):
         self._pop_ratio = self._additional_data.get("pop_ratio", 0.8)
         self._pop_obj = self._evaluation_objects.pop.get_custom_pop_obj(self._pop_ratio)
 
-        self._short_head = set(self._pop_obj.get_short_head())
-        self._long_tail = set(self._pop_obj.get_long_tail())
+        self._short_head = self._pop_obj.get_short_head_set()
+        self._long_tail = self._pop_obj.get_long_tail_set()
         self._train = self._evaluation_objects.data.train_dict
         self._num = []
         self._den = []
@@ -54,8 +54,8 @@ class PopREO(BaseMetric):
         super().__init__(recommendations, config, params, eval_objects)
         self._cutoff = self._evaluation_objects.cutoff
         self._relevance = self._evaluation_objects.relevance.binary_relevance
-        self._short_head = set(self._evaluation_objects.pop.get_short_head())
-        self._long_tail = set(self._evaluation_objects.pop.get_long_tail())
+        self._short_head = self._evaluation_objects.pop.get_short_head_set()
+        self._long_tail = self._evaluation_objects.pop.get_long_tail_set()
         self._train = self._evaluation_objects.data.train_dict
         self._num = []
         self._den = []
@@ -51,9 +51,9 @@ class PopRSP(BaseMetric):
         """
         super().__init__(recommendations, config, params, eval_objects)
         self._cutoff = self._evaluation_objects.cutoff
-        self._short_head = set(self._evaluation_objects.pop.get_short_head())
-        self._long_tail = set(self._evaluation_objects.pop.get_long_tail())
-        self._train = self._evaluation_objects.data.train_dict
+        self._short_head = self._evaluation_objects.pop.get_short_head_set()
+        self._long_tail = self._evaluation_objects.pop.get_long_tail_set()
+        self._head_train, self._tail_train = self._evaluation_objects.pop.get_user_train_counts()
         self._num = []
         self._den = []
 
@@ -65,7 +65,7 @@ class PopRSP(BaseMetric):
         """
         return "PopRSP"
 
-    def __user_pop_rsp(self, user_recommendations, cutoff, long_tail, short_head, u_train):
+    def __user_pop_rsp(self, user_recommendations, cutoff, long_tail, short_head, user):
         """
         Per User Popularity-based Ranking-based Statistical Parity (RSP)
         :param user_recommendations: list of user recommendation in the form [(item1,value1),...]
@@ -76,8 +76,8 @@ class PopRSP(BaseMetric):
         recommended_items = set([i for i, _ in user_recommendations[:cutoff]])
         num_h = len(recommended_items & short_head)
         num_t = len(recommended_items & long_tail)
-        den_h = len(short_head-u_train)
-        den_t = len(long_tail-u_train)
+        den_h = len(short_head) - self._head_train[user]
+        den_t = len(long_tail) - self._tail_train[user]
         return num_h, num_t, den_h, den_t
 
     def eval(self):
@@ -86,7 +86,7 @@ class PopRSP(BaseMetric):
         :return: the overall averaged value of PopRSP
         """
         for u, u_r in self._recommendations.items():
-            num_h, num_t, den_h, den_t = self.__user_pop_rsp(u_r, self._cutoff, self._long_tail, self._short_head, set(self._train[u].keys()))
+            num_h, num_t, den_h, den_t = self.__user_pop_rsp(u_r, self._cutoff, self._long_tail, self._short_head, u)
             self._num.append([num_h, num_t])
             self._den.append([den_h, den_t])
         self._num = np.sum(np.array(self._num), axis = 0)
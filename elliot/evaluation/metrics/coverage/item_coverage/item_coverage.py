@@ -7,6 +7,7 @@ __version__ = '0.3.1'
 __author__ = 'Vito Walter Anelli, Claudio Pomo'
 __email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
 
+import numpy as np
 from elliot.evaluation.metrics.base_metric import BaseMetric
 
 
@@ -54,3 +55,13 @@ class ItemCoverage(BaseMetric):
         :return: the overall averaged value of Item Coverage
         """
         return len({i[0] for u_r in self._recommendations.values() for i in u_r[:self._cutoff]})
+
+    @staticmethod
+    def value_from_exposure(exposure, cutoff):
+        """
+        Evaluation function from the item exposure histograms
+        :param exposure: ItemExposure of the recommendations
+        :param cutoff: numerical threshold to limit the recommendation list
+        :return: the overall value of Item Coverage
+        """
+        return int(np.count_nonzero(exposure.counts(cutoff)))
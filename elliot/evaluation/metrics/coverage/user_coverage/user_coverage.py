@@ -54,3 +54,13 @@ class UserCoverage(BaseMetric):
         :return: the overall averaged value of User Coverage
         """
         return sum([1 if len(u_r) > 0 else 0 for u_r in self._recommendations.values()])
+
+    @staticmethod
+    def value_from_exposure(exposure, cutoff):
+        """
+        Evaluation function from the item exposure histograms
+        :param exposure: ItemExposure of the recommendations
+        :param cutoff: numerical threshold to limit the recommendation list
+        :return: the overall value of User Coverage
+        """
+        return exposure.n_covered_users
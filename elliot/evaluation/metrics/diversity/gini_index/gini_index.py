@@ -83,4 +83,19 @@ class GiniIndex(BaseMetric):
 
         return gini
 
+    @staticmethod
+    def value_from_exposure(exposure, cutoff):
+        """
+        Evaluation function from the item exposure histograms
+        :param exposure: ItemExposure of the recommendations
+        :param cutoff: numerical threshold to limit the recommendation list
+        :return: the overall value of Gini Index
+        """
+        counts = exposure.counts(cutoff)
+        counts = np.sort(counts[counts > 0])
+        num_items = exposure.num_items
+        positions = np.arange(len(counts)) + (num_items - len(counts)) + 1
+        gini = np.sum((2 * positions - num_items - 1) * (counts / exposure.n_recommended(cutoff)))
+        return 1 - gini / (num_items - 1)
+
 
@@ -9,6 +9,8 @@ __email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
 
 import math
 
+import numpy as np
+
 from elliot.evaluation.metrics.base_metric import BaseMetric
 
 
@@ -82,4 +84,17 @@ class ShannonEntropy(BaseMetric):
 
         return sum([w * self.__sales_novelty(i) for i, w in self._item_weights.items()])/len(self._recommendations)
 
+    @staticmethod
+    def value_from_exposure(exposure, cutoff):
+        """
+        Evaluation function from the item exposure histograms
+        :param exposure: ItemExposure of the recommendations
+        :param cutoff: numerical threshold to limit the recommendation list
+        :return: the overall value of Shannon Entropy
+        """
+        counts = exposure.counts(cutoff)
+        recommended = counts > 0
+        novelty = -np.log2(counts[recommended] / exposure.n_recommended(cutoff))
+        return np.sum(exposure.weights(cutoff)[recommended] * novelty) / exposure.n_users
+
 
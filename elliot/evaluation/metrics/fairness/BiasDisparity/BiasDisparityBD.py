@@ -78,8 +78,8 @@ class BiasDisparityBD(BaseMetric):
 
         self._category_sum = np.zeros((self._user_n_clusters,self._item_n_clusters))
         self._total_sum = np.zeros(self._user_n_clusters)
-
-        self.process()
+        # computed on demand (get), the sharded evaluation merges the Bias Recommendations of the shards first
+        self._metric_objs_list = None
 
     def name(self):
         """
@@ -98,6 +98,9 @@ class BiasDisparityBD(BaseMetric):
         """
 
         BR = BiasDisparityBR(self._recommendations, self._config, self._params, self._evaluation_objects, self._additional_data).get_BR()
+        self.__compute_bd(BR)
+
+    def __compute_bd(self, BR):
         BS = BiasDisparityBS(self._recommendations, self._config, self._params, self._evaluation_objects, self._additional_data).get_BS()
 
         BD = (BR - BS) / BS
@@ -109,6 +112,20 @@ class BiasDisparityBD(BaseMetric):
                                                           val=BD[u_group, i_category],
                                                           needs_full_recommendations=False))
 
+    def partial(self):
+        """
+        State of the Bias Recommendations on the shard
+        """
+        return BiasDisparityBR(self._recommendations, self._config, self._params, self._evaluation_objects, self._additional_data).partial()
+
+    def merge(self, partials):
+        BR = BiasDisparityBR(self._recommendations, self._config, self._params, self._evaluation_objects, self._additional_data)
+        BR.merge(partials)
+        self.__compute_bd(BR.get_BR())
+        return self._metric_objs_list
+
     def get(self):
+        if self._metric_objs_list is None:
+            self.process()
         return self._metric_objs_list
 
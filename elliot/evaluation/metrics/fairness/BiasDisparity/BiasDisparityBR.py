@@ -75,8 +75,8 @@ class BiasDisparityBR(BaseMetric):
 
         self._category_sum = np.zeros((self._user_n_clusters,self._item_n_clusters))
         self._total_sum = np.zeros(self._user_n_clusters)
-
-        self.process()
+        # computed on demand (get, get_BR), the sharded evaluation merges the sums of the shards first
+        self._BR = None
 
     def name(self):
         """
@@ -108,10 +108,14 @@ class BiasDisparityBR(BaseMetric):
         Evaluation function
         :return: the overall value of Bias Disparity - Bias Recommendations
         """
+        self.__accumulate()
+        self.__compute_br()
 
+    def __accumulate(self):
         for u, u_r in self._recommendations.items():
             self.__item_bias_disparity_br(u, u_r, self._cutoff)
 
+    def __compute_br(self):
         clustering_count = Counter(self._item_clustering.values())
         PC = np.array([clustering_count.get(c, 0)/ len(self._item_clustering) if self._item_clustering else 1 for c in range(self._item_n_clusters)])
         self._BR = ((self._category_sum.T/self._total_sum).T)/PC
@@ -123,9 +127,27 @@ class BiasDisparityBR(BaseMetric):
                                                           val=self._BR[u_group, i_category],
                                                           needs_full_recommendations=False))
 
+    def partial(self):
+        """
+        Recommendations per user group and item category of the shard
+        """
+        self.__accumulate()
+        return self._category_sum, self._total_sum
+
+    def merge(self, partials):
+        for category_sum, total_sum in partials:
+            self._category_sum += category_sum
+            self._total_sum += total_sum
+        self.__compute_br()
+        return self._metric_objs_list
+
     def get_BR(self):
+        if self._BR is None:
+            self.process()
         return self._BR
 
     def get(self):
+        if self._BR is None:
+            self.process()
         return self._metric_objs_list
 
@@ -10,6 +10,7 @@ __email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
 import numpy as np
 import pandas as pd
 from elliot.evaluation.metrics.base_metric import BaseMetric
+from elliot.evaluation.metrics.metrics_utils import ProxyMetric
 
 
 class ItemMADrating(BaseMetric):
@@ -80,16 +81,12 @@ class ItemMADrating(BaseMetric):
             self._item_count[i] = self._item_count.get(i, 0) + 1
             self._item_gain[i] = self._item_gain.get(i, 0) + (r if i in user_relevant_items else 0)
 
-    def eval(self):
-        """
-        Evaluation function
-        :return: the overall averaged value of Item MAD rating
-        """
-
+    def __accumulate(self):
         for u, u_r in self._recommendations.items():
             if len(self._relevance.get_user_rel(u)):
                 self.__item_mad(u_r, self._cutoff, self._relevance.get_user_rel(u))
 
+    def __mad(self):
         for item, gain in self._item_gain.items():
             v = gain/self._item_count[item]
             cluster = self._item_clustering.get(item, None)
@@ -105,6 +102,29 @@ class ItemMADrating(BaseMetric):
                 differences.append(abs(avg[i] - avg[j]))
         return np.average(differences)
 
+    def eval(self):
+        """
+        Evaluation function
+        :return: the overall averaged value of Item MAD rating
+        """
+        self.__accumulate()
+        return self.__mad()
+
+    def partial(self):
+        """
+        Recommendations and gains of the items in the shard
+        """
+        self.__accumulate()
+        return self._item_count, self._item_gain
+
+    def merge(self, partials):
+        for item_count, item_gain in partials:
+            for i, c in item_count.items():
+                self._item_count[i] = self._item_count.get(i, 0) + c
+            for i, g in item_gain.items():
+                self._item_gain[i] = self._item_gain.get(i, 0) + g
+        return [ProxyMetric(name=self.name(), val=self.__mad())]
+
     def get(self):
         return [self]
 
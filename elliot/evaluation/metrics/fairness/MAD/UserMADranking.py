@@ -8,11 +8,13 @@ __author__ = 'Vito Walter Anelli, Claudio Pomo'
 __email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
 
 import math
+from itertools import chain
 
 import typing as t
 import numpy as np
 import pandas as pd
 from elliot.evaluation.metrics.base_metric import BaseMetric
+from elliot.evaluation.metrics.metrics_utils import ProxyMetric
 
 
 class UserMADranking(BaseMetric):
@@ -114,18 +116,23 @@ class UserMADranking(BaseMetric):
              for r, x in enumerate([item for item, _ in user_recommendations]) if r < cutoff])
         return dcg / idcg if dcg > 0 else 0
 
-    def eval(self):
+    def __user_values(self):
         """
-        Evaluation function
-        :return: the overall averaged value of User MAD ranking
+        Cluster and value of the users with relevant items, in recommendation order
         """
+        user_values = []
         for u, u_r in self._recommendations.items():
             if len(self._relevance.get_user_rel(u)):
                 v = self.__user_mad(u_r, u, self._cutoff)
                 cluster = self._user_clustering.get(u, None)
                 if cluster is not None:
-                    self._sum[cluster] += v
-                    self._n_users[cluster] += 1
+                    user_values.append((cluster, v))
+        return user_values
+
+    def __mad(self, user_values):
+        for cluster, v in user_values:
+            self._sum[cluster] += v
+            self._n_users[cluster] += 1
 
         avg = [self._sum[i]/self._n_users[i] for i in range(self._n_clusters)]
         differences = []
@@ -134,6 +141,19 @@ class UserMADranking(BaseMetric):
                 differences.append(abs(avg[i] - avg[j]))
         return np.average(differences)
 
+    def eval(self):
+        """
+        Evaluation function
+        :return: the overall averaged value of User MAD ranking
+        """
+        return self.__mad(self.__user_values())
+
+    def partial(self):
+        return self.__user_values()
+
+    def merge(self, partials):
+        return [ProxyMetric(name=self.name(), val=self.__mad(chain.from_iterable(partials)))]
+
     def get(self):
         return [self]
 
@@ -7,9 +7,12 @@ __version__ = '0.3.1'
 __author__ = 'Vito Walter Anelli, Claudio Pomo'
 __email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
 
+from itertools import chain
+
 import numpy as np
 import pandas as pd
 from elliot.evaluation.metrics.base_metric import BaseMetric
+from elliot.evaluation.metrics.metrics_utils import ProxyMetric
 
 
 class UserMADrating(BaseMetric):
@@ -77,18 +80,23 @@ class UserMADrating(BaseMetric):
         # return np.average([i[1] for i in user_recommendations if i[0] in user_relevant_items])
         return np.average([i[1] for i in user_recommendations[:cutoff]])
 
-    def eval(self):
+    def __user_values(self):
         """
-        Evaluation function
-        :return: the overall averaged value of User MAD rating
+        Cluster and value of the users with relevant items, in recommendation order
         """
+        user_values = []
         for u, u_r in self._recommendations.items():
             if len(self._relevance.get_user_rel(u)):
                 v = UserMADrating.__user_mad(u_r, self._cutoff, self._relevance.get_user_rel(u))
                 cluster = self._user_clustering.get(u, None)
                 if cluster is not None:
-                    self._sum[cluster] += v
-                    self._n_users[cluster] += 1
+                    user_values.append((cluster, v))
+        return user_values
+
+    def __mad(self, user_values):
+        for cluster, v in user_values:
+            self._sum[cluster] += v
+            self._n_users[cluster] += 1
 
         avg = [self._sum[i]/self._n_users[i] for i in range(self._n_clusters)]
         differences = []
@@ -97,6 +105,19 @@ class UserMADrating(BaseMetric):
                 differences.append(abs(avg[i] - avg[j]))
         return np.average(differences)
 
+    def eval(self):
+        """
+        Evaluation function
+        :return: the overall averaged value of User MAD rating
+        """
+        return self.__mad(self.__user_values())
+
+    def partial(self):
+        return self.__user_values()
+
+    def merge(self, partials):
+        return [ProxyMetric(name=self.name(), val=self.__mad(chain.from_iterable(partials)))]
+
     def get(self):
         return [self]
 
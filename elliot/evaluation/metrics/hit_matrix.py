@@ -0,0 +1,156 @@
+"""
+Module description:
+Vectorized evaluation backend of the accuracy metrics.
+
+The recommendation lists of a split are matched once against the relevant items, in a users x cutoff matrix of hits
+and discounted gains. The metrics exposing user_values_from_hits (see BaseMetric) compute their per-user values from
+that matrix with NumPy reductions, instead of walking every recommendation list.
+
+When the recommendations carry the full-ranking positions of the relevant items (RecommendationBatch.item_positions),
+the matrix also holds their ranks in the whole catalog, for the metrics exposing values_from_ranks (e.g., AUC), so
+that they do not need full length recommendation lists.
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+import typing as t
+from itertools import chain
+
+import numpy as np
+
+from elliot.evaluation.relevance.relevance import RelevanceIndex, logarithmic_ranking_discounts
+from elliot.utils.recommendation_batch import RecommendationBatch
+
+
+class HitMatrix(object):
+    """
+    Hits and discounted gains of the top-width recommendations of the users with at least a relevant item.
+    Shorter recommendation lists are padded with misses.
+    The prefix sums along the rank axis are computed once, so every cutoff up to width is evaluated by slicing them.
+    """
+
+    def __init__(self, recommendations: t.Union[RecommendationBatch, t.Dict[t.Any, t.List[t.Tuple[t.Any, float]]]],
+                 index: RelevanceIndex, width: int, train_sizes: np.ndarray = None):
+        """
+        :param recommendations: recommendation lists
+        :param index: relevant items of the split
+        :param width: number of ranks to match
+        :param train_sizes: number of training items of every user (by private id), to read the full-ranking
+        positions of the relevant items when the recommendations carry them
+        """
+        self.width = width
+        # list, rank and item column of every recommended item (the users with relevant items define the rows)
+        if isinstance(recommendations, RecommendationBatch):
+            list_rows, ranks, items = self._from_batch(recommendations, index, width)
+        else:
+            list_rows, ranks, items = self._from_dict(recommendations, index, width)
+
+        hits, gains = index.match(self.rows[list_rows], items)
+        self.hits = np.zeros((len(self.users), width), dtype=bool)
+        self.hits[list_rows, ranks] = hits
+        self.gains = np.zeros((len(self.users), width), dtype=np.float64)
+        self.gains[list_rows, ranks] = gains
+        self.n_relevant = index.n_relevant[self.rows]
+
+        self._index = index
+        self._cumulative_hits = np.cumsum(self.hits, axis=1)
+        self._dcg = np.cumsum(self.gains * logarithmic_ranking_discounts(np.arange(width)), axis=1)
+        self.first_hit = np.where(self.hits.any(axis=1), self.hits.argmax(axis=1), width)
+
+        self.full_ranks = None
+        if isinstance(recommendations, RecommendationBatch) and recommendations.item_positions is not None and \
+                train_sizes is not None:
+            self._read_full_ranks(recommendations, index, train_sizes)
+
+    def _from_dict(self, recommendations: t.Dict, index: RelevanceIndex, width: int):
+        rows = index.users.get_indexer(list(recommendations.keys()))
+        kept = rows >= 0
+        self.users = [u for u, k in zip(recommendations.keys(), kept) if k]
+        self.private_users = None
+        self.rows = rows[kept]
+
+        lists = [recommendations[u][:width] for u in self.users]
+        lengths = np.fromiter(map(len, lists), dtype=np.int64, count=len(lists))
+        items = index.items.get_indexer([i for i, _ in chain.from_iterable(lists)]) if lengths.sum() else \
+            np.zeros(0, dtype=np.int64)
+        list_rows = np.repeat(np.arange(len(lists)), lengths)
+        ranks = np.arange(len(items)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return list_rows, ranks, items
+
+    def _from_batch(self, recommendations: RecommendationBatch, index: RelevanceIndex, width: int):
+        rows = index.users.get_indexer(recommendations.public_users)
+        kept = rows >= 0
+        self._kept = kept
+        self.users = [u for u, k in zip(recommendations.public_users, kept) if k]
+        self.private_users = recommendations.user_ids[kept].astype(np.int64)
+        self.rows = rows[kept]
+
+        block = recommendations.item_ids[kept, :width]
+        list_rows, ranks = np.nonzero(np.arange(block.shape[1]) < recommendations.lengths[kept, None])
+        items = index.item_columns(recommendations.private_items)[block[list_rows, ranks]]
+        return list_rows, ranks, items
+
+    def _read_full_ranks(self, recommendations: RecommendationBatch, index: RelevanceIndex, train_sizes: np.ndarray):
+        positions = recommendations.item_positions[self._kept].tocoo()
+        columns = index.item_columns(recommendations.private_items)[positions.col]
+        # the positions may cover the relevant items of other splits too
+        relevant, _ = index.match(self.rows[positions.row], columns)
+        list_rows, ranks = positions.row[relevant], positions.data[relevant] - 1
+        order = np.lexsort((ranks, list_rows))
+
+        # 0-based ranks of the relevant items of every user, in increasing order
+        self.full_ranks = ranks[order].astype(np.int64)
+        self.full_ranks_indptr = np.zeros(len(self.users) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(list_rows, minlength=len(self.users)), out=self.full_ranks_indptr[1:])
+        self.n_negatives = len(recommendations.private_items) - train_sizes[self.private_users] - self.n_relevant + 1
+
+    @property
+    def has_full_ranks(self) -> bool:
+        return self.full_ranks is not None
+
+    def full_rank_users(self) -> np.ndarray:
+        """
+        Row of the user of every entry of full_ranks
+        """
+        return np.repeat(np.arange(len(self.users)), np.diff(self.full_ranks_indptr))
+
+    def full_rank_auc(self) -> np.ndarray:
+        """
+        AUC term (n_negatives - rank + p) / n_negatives of every entry of full_ranks, where p is the number of relevant
+        items ranked before it
+        """
+        users = self.full_rank_users()
+        preceding = np.arange(len(self.full_ranks)) - self.full_ranks_indptr[users]
+        return (self.n_negatives[users] - self.full_ranks + preceding) / self.n_negatives[users]
+
+    def hits_at(self, cutoff: int) -> np.ndarray:
+        """
+        Number of hits in the first cutoff positions
+        """
+        return self._cumulative_hits[:, cutoff - 1]
+
+    def cumulative_hits(self, cutoff: int) -> np.ndarray:
+        """
+        Number of hits in the first 1, ..., cutoff positions
+        """
+        return self._cumulative_hits[:, :cutoff]
+
+    def dcg(self, cutoff: int) -> np.ndarray:
+        """
+        Discounted Cumulative Gain at cutoff of the users
+        """
+        return self._dcg[:, cutoff - 1]
+
+    def idcg(self, cutoff: int) -> np.ndarray:
+        """
+        Ideal DCG at cutoff of the users
+        """
+        return self._index.idcg(cutoff)[self.rows]
+
+    def user_metric(self, values: np.ndarray) -> t.Dict:
+        """
+        Per-user values in the {user: value} form of eval_user_metric
+        """
+        return dict(zip(self.users, values))
@@ -0,0 +1,80 @@
+"""
+Module description:
+Item exposure histograms of the recommendation lists.
+
+The number of recommendations of every item (and the normalized per-user exposure) is accumulated block by block,
+at every cutoff. The metrics exposing value_from_exposure (see BaseMetric) compute their value from the histograms,
+so they do not need the recommendation lists of all the users at once.
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+import typing as t
+
+import numpy as np
+
+from elliot.utils.recommendation_batch import RecommendationBatch
+
+
+class ItemExposure(object):
+    """
+    Item histograms, indexed by private item id, of the recommendation lists added so far
+    """
+
+    def __init__(self, num_items: int, cutoffs: t.List[int], public_items: t.Dict):
+        """
+        :param num_items: number of items of the dataset
+        :param cutoffs: cutoffs of the histograms
+        :param public_items: map from public to private item ids, to read recommendations in the dictionary format
+        """
+        self.num_items = num_items
+        self.n_users = 0
+        self.n_covered_users = 0
+        self._public_items = public_items
+        self._counts = {cutoff: np.zeros(num_items, dtype=np.int64) for cutoff in cutoffs}
+        self._weights = {cutoff: np.zeros(num_items) for cutoff in cutoffs}
+        self._n_recommended = dict.fromkeys(cutoffs, 0)
+
+    def add(self, recommendations: t.Union[RecommendationBatch, t.Dict[t.Any, t.List[t.Tuple[t.Any, float]]]]):
+        if isinstance(recommendations, RecommendationBatch):
+            item_ids, lengths = recommendations.item_ids, recommendations.lengths
+        else:
+            item_ids, lengths = self._from_dict(recommendations)
+        self.n_users += len(lengths)
+        self.n_covered_users += int(np.count_nonzero(lengths))
+
+        for cutoff in self._counts:
+            norms = np.minimum(lengths, cutoff)
+            items = item_ids[:, :cutoff][np.arange(min(item_ids.shape[1], cutoff)) < norms[:, None]]
+            norms = norms[norms > 0]
+            self._counts[cutoff] += np.bincount(items, minlength=self.num_items)
+            self._weights[cutoff] += np.bincount(items, weights=np.repeat(1 / norms, norms), minlength=self.num_items)
+            self._n_recommended[cutoff] += int(norms.sum())
+
+    def _from_dict(self, recommendations: t.Dict) -> t.Tuple[np.ndarray, np.ndarray]:
+        lengths = np.fromiter(map(len, recommendations.values()), dtype=np.int64, count=len(recommendations))
+        width = int(lengths.max()) if len(lengths) else 0
+        item_ids = np.zeros((len(lengths), width), dtype=np.int64)
+        item_ids[np.arange(width) < lengths[:, None]] = [self._public_items[i] for u_r in recommendations.values()
+                                                         for i, _ in u_r]
+        return item_ids, lengths
+
+    def counts(self, cutoff: int) -> np.ndarray:
+        """
+        Number of top-cutoff lists recommending every item
+        """
+        return self._counts[cutoff]
+
+    def weights(self, cutoff: int) -> np.ndarray:
+        """
+        Exposure of every item, where an item in a list of n recommendations weights 1 / n
+        """
+        return self._weights[cutoff]
+
+    def n_recommended(self, cutoff: int) -> int:
+        """
+        Number of recommendations in the top-cutoff lists
+        """
+        return self._n_recommended[cutoff]
@@ -102,15 +102,7 @@ class EFD(BaseMetric):
         :return: the overall averaged value of Expected Free Discovery per user
         """
 
-        self._item_count = {}
-        for u_h in self._evaluation_objects.data.train_dict.values():
-            for i in u_h.keys():
-                self._item_count[i] = self._item_count.get(i, 0) + 1
-
-        novelty_profile = self._item_count.values()
-        norm = sum(novelty_profile)
-        self._max_nov = -math.log(min(novelty_profile) / norm) / math.log(2)
-        self._item_novelty_dict = {i: -math.log(v / norm) / math.log(2) for i, v in self._item_count.items()}
+        self._item_novelty_dict, self._max_nov = self._evaluation_objects.pop.get_free_discovery()
 
         return {u: self.__user_EFD(u_r, u, self._cutoff)
                 for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))}
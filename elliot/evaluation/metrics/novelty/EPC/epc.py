@@ -102,13 +102,7 @@ class EPC(BaseMetric):
         """
 
 
-        item_count = {}
-        for u_h in self._evaluation_objects.data.train_dict.values():
-            for i in u_h.keys():
-                item_count[i] = item_count.get(i, 0) + 1
-
-        num_users = len(self._evaluation_objects.data.train_dict)
-        self._item_novelty_dict = {i: 1 - (v / num_users) for i, v in item_count.items()}
+        self._item_novelty_dict = self._evaluation_objects.pop.get_complement_popularity()
 
         return {u: self.__user_EPC(u_r, u, self._cutoff)
              for u, u_r in self._recommendations.items() if len(self._relevance.get_user_rel(u))}
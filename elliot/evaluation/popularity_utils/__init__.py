@@ -1 +1 @@
-from .popularity import Popularity
\ No newline at end of file
+from .popularity import Popularity, get_popularity
\ No newline at end of file
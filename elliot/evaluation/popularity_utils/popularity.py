@@ -8,51 +8,141 @@ __version__ = '0.3.1'
 __author__ = 'Vito Walter Anelli, Claudio Pomo, Alejandro Bellogín'
 __email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it, alejandro.bellogin@uam.es'
 
-import operator
-
+import math
 import typing as t
 
+import numpy as np
+
+
+def get_popularity(data, pop_ratio=0.8):
+    """
+    Popularity of the items of a DataSet. The item statistics are computed once per DataSet and shared by all the
+    evaluators (models and hyperparameter trials) built on it
+    """
+    popularity = getattr(data, "_popularity", None)
+    if popularity is None:
+        popularity = Popularity(data)
+        data._popularity = popularity
+    return popularity.get_custom_pop_obj(pop_ratio)
+
 
 class Popularity(object):
+    """
+    Item popularity statistics, as arrays indexed by private item id.
+    Short head and long tail depend on pop_ratio: the objects of the other ratios (get_custom_pop_obj) are cached,
+    and share the item statistics.
+    """
+
     def __init__(self, data, pop_ratio=0.8):
         self._data = data
-        self._pop_items = {}
-        self._sorted_pop_items = {}
-        self._short_head = []
-        self._long_tail = []
         self._pop_ratio = pop_ratio
+        self._shared = {"ratios": {pop_ratio: self}}
+        self._short_head_mask = None
+        self._cache = {}
+
+    ############## Item statistics (shared by all the ratios) ##############
+
+    def _shared_value(self, name, compute):
+        if name not in self._shared:
+            self._shared[name] = compute()
+        return self._shared[name]
+
+    @property
+    def item_counts(self) -> np.ndarray:
+        """
+        Number of users who experienced every item
+        """
+        return self._shared_value("item_counts", lambda: np.asarray(
+            self._data.sp_i_train.astype(bool).sum(axis=0)).ravel().astype(np.int64))
+
+    @property
+    def ranking(self) -> np.ndarray:
+        """
+        Private item ids by decreasing popularity (ties by id)
+        """
+        return self._shared_value("ranking", lambda: np.argsort(-self.item_counts, kind="stable"))
 
     def get_pop_items(self):
-        if not self._pop_items:
-            self._pop_items = {self._data.private_items[p]: pop for p, pop in
-                               enumerate(self._data.sp_i_train.astype(bool).sum(axis=0).tolist()[0])}
-        return self._pop_items
+        return self._shared_value("pop_items", lambda: dict(zip(self._public_items(np.arange(len(self.item_counts))),
+                                                                self.item_counts.tolist())))
 
     def get_sorted_pop_items(self):
-        if (not self._pop_items) or (not self._sorted_pop_items):
-            self.get_pop_items()
-            self._sorted_pop_items = dict(sorted(self._pop_items.items(), key=operator.itemgetter(1), reverse=True))
-        return self._sorted_pop_items
+        return self._shared_value("sorted_pop_items", lambda: dict(zip(self._public_items(self.ranking),
+                                                                       self.item_counts[self.ranking].tolist())))
+
+    def get_complement_popularity(self) -> t.Dict:
+        """
+        Expected Popularity Complement novelty 1 - count / num_users of every item
+        """
+        return self._shared_value("complement_popularity", lambda: {
+            i: 1 - (v / self._data.num_users) for i, v in self.get_pop_items().items() if v})
+
+    def get_free_discovery(self) -> t.Tuple[t.Dict, float]:
+        """
+        Expected Free Discovery novelty -log2(count / total count) of every item, and its maximum
+        """
+        def compute():
+            counts = {i: v for i, v in self.get_pop_items().items() if v}
+            norm = sum(counts.values())
+            return ({i: -math.log(v / norm) / math.log(2) for i, v in counts.items()},
+                    -math.log(min(counts.values()) / norm) / math.log(2))
+        return self._shared_value("free_discovery", compute)
+
+    def _public_items(self, items: np.ndarray) -> t.List:
+        private_items = self._data.private_items
+        return [private_items[i] for i in items.tolist()]
+
+    ############## Short head and long tail ##############
+
+    @property
+    def short_head_mask(self) -> np.ndarray:
+        """
+        Boolean mask (by private item id) of the most popular items that cover pop_ratio of the transactions
+        """
+        if self._short_head_mask is None:
+            ranked_counts = np.cumsum(self.item_counts[self.ranking])
+            short_head_size = min(int(np.searchsorted(ranked_counts, self._data.transactions * self._pop_ratio)) + 1,
+                                  len(self.ranking))
+            self._short_head_mask = np.zeros(len(self.ranking), dtype=bool)
+            self._short_head_mask[self.ranking[:short_head_size]] = True
+        return self._short_head_mask
+
+    @property
+    def long_tail_mask(self) -> np.ndarray:
+        return ~self.short_head_mask
+
+    def _cached(self, name, compute):
+        if name not in self._cache:
+            self._cache[name] = compute()
+        return self._cache[name]
 
     def get_short_head(self):
-        if not self._short_head:
-            self.get_sorted_pop_items()
-            short_head_limit = self._data.transactions * self._pop_ratio
-            self._short_head = []
-            for i, pop in self._sorted_pop_items.items():
-                self._short_head.append(i)
-                short_head_limit -= pop
-                if short_head_limit <= 0:
-                    break
-        return self._short_head
+        return self._cached("short_head", lambda: self._public_items(self.ranking[self.short_head_mask[self.ranking]]))
 
     def get_long_tail(self):
-        if not self._long_tail:
-            self.get_short_head()
-            self._long_tail = [i for i in self._sorted_pop_items.keys() if i not in self._short_head]
-        return self._long_tail
+        return self._cached("long_tail", lambda: self._public_items(self.ranking[self.long_tail_mask[self.ranking]]))
 
-    def get_custom_pop_obj(self, pop_ratio=.8):
-        return Popularity(self._data, pop_ratio)
+    def get_short_head_set(self) -> t.FrozenSet:
+        return self._cached("short_head_set", lambda: frozenset(self.get_short_head()))
 
+    def get_long_tail_set(self) -> t.FrozenSet:
+        return self._cached("long_tail_set", lambda: frozenset(self.get_long_tail()))
 
+    def get_user_train_counts(self) -> t.Tuple[t.Dict, t.Dict]:
+        """
+        Number of training items of every user in the short head and in the long tail
+        """
+        def compute():
+            train = self._data.sp_i_train.astype(bool).astype(np.int64)
+            users = [self._data.private_users[u] for u in range(train.shape[0])]
+            return (dict(zip(users, (train @ self.short_head_mask.astype(np.int64)).tolist())),
+                    dict(zip(users, (train @ self.long_tail_mask.astype(np.int64)).tolist())))
+        return self._cached("user_train_counts", compute)
+
+    def get_custom_pop_obj(self, pop_ratio=.8):
+        ratios = self._shared["ratios"]
+        if pop_ratio not in ratios:
+            custom = Popularity(self._data, pop_ratio)
+            custom._shared = self._shared
+            ratios[pop_ratio] = custom
+        return ratios[pop_ratio]
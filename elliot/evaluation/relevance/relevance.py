@@ -11,6 +11,9 @@ import typing as t
 import math
 from abc import ABC, abstractmethod
 
+import numpy as np
+import pandas as pd
+
 
 class Relevance(object):
     def __init__(self, test, rel_threshold):
@@ -18,6 +21,7 @@ class Relevance(object):
         self._rel_threshold = rel_threshold
         self._binary_relevance = None
         self._discounted_relevance = None
+        self._index = None
 
     def get_test(self):
         return self._test
@@ -27,7 +31,7 @@ class Relevance(object):
     @property
     def discounted_relevance(self):
         if self._discounted_relevance is None:
-            self._discounted_relevance = DiscountedRelevance(self._test, self._rel_threshold)
+            self._discounted_relevance = DiscountedRelevance(self._test, self._rel_threshold, self.index)
         return self._discounted_relevance
 
     ############## Binary relevance ##############
@@ -38,6 +42,117 @@ class Relevance(object):
             self._binary_relevance = BinaryRelevance(self._test, self._rel_threshold)
         return self._binary_relevance
 
+    ############## CSR relevance ##############
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = RelevanceIndex(self._test, self._rel_threshold)
+        return self._index
+
+
+def logarithmic_ranking_discounts(ranks: np.ndarray) -> np.ndarray:
+    """
+    Vectorized AbstractRelevanceSingleton.logarithmic_ranking_discount
+    """
+    return 1 / np.log(ranks + 2) * math.log(2)
+
+
+class RelevantItems(list):
+    """
+    List of the relevant items of a user, with hash-based membership tests
+    """
+    __slots__ = ("_items",)
+
+    def __init__(self, items=()):
+        super().__init__(items)
+        self._items = frozenset(self)
+
+    def __contains__(self, item):
+        return item in self._items
+
+
+class RelevanceIndex(object):
+    """
+    CSR representation of the relevant items (rating >= threshold) of a split, for batched access.
+    Rows are the users with at least a relevant item (users), columns the relevant items (items), and the row entries
+    are sorted by column. The stored values are the discounted gains 2 ** (rating - threshold + 1) - 1.
+    """
+
+    def __init__(self, test, rel_threshold):
+        users, items, ratings = [], [], []
+        for u, test_items in test.items():
+            for i, r in test_items.items():
+                if r >= rel_threshold:
+                    users.append(u)
+                    items.append(i)
+                    ratings.append(r)
+        user_codes, self.users = pd.factorize(pd.Series(users, dtype=object))
+        item_codes, self.items = pd.factorize(pd.Series(items, dtype=object))
+        ratings = np.array(ratings, dtype=np.float64)
+
+        order = np.lexsort((item_codes, user_codes))
+        self.indices = item_codes[order]
+        self.gains = 2 ** (ratings[order] - rel_threshold + 1) - 1
+        self.n_relevant = np.bincount(user_codes, minlength=len(self.users))
+        self.indptr = np.zeros(len(self.users) + 1, dtype=np.int64)
+        np.cumsum(self.n_relevant, out=self.indptr[1:])
+        self._keys = user_codes[order].astype(np.int64) * len(self.items) + self.indices
+
+        # the gains of every user in decreasing order, for the ideal DCG
+        ideal_order = np.lexsort((-ratings, user_codes))
+        self.ideal_gains = 2 ** (ratings[ideal_order] - rel_threshold + 1) - 1
+        self._idcg = {}
+        self._item_columns = None
+
+    def user_row(self, user) -> int:
+        """
+        Row of a user, -1 if the user has no relevant items
+        """
+        try:
+            return self.users.get_loc(user)
+        except KeyError:
+            return -1
+
+    def item_columns(self, private_items: t.Dict) -> np.ndarray:
+        """
+        Column of every private item id, -1 for the items that are relevant to nobody
+        :param private_items: map from private to public item ids
+        """
+        if self._item_columns is None or self._item_columns[0] is not private_items:
+            columns = self.items.get_indexer([private_items[i] for i in range(len(private_items))])
+            self._item_columns = (private_items, columns)
+        return self._item_columns[1]
+
+    def match(self, rows: np.ndarray, items: np.ndarray) -> t.Tuple[np.ndarray, np.ndarray]:
+        """
+        Relevance of recommended items
+        :param rows: user rows, one per recommended item
+        :param items: item columns (see items), -1 for items that are relevant to nobody
+        :return: boolean hits and discounted gains
+        """
+        if not len(self._keys):
+            return np.zeros(len(items), dtype=bool), np.zeros(len(items))
+        keys = rows * len(self.items) + items
+        position = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        hits = (items >= 0) & (self._keys[position] == keys)
+        return hits, np.where(hits, self.gains[position], 0.)
+
+    def idcg(self, cutoff: int) -> np.ndarray:
+        """
+        Ideal DCG at cutoff of every user, computed once per cutoff
+        """
+        if cutoff not in self._idcg:
+            idcg = np.zeros(len(self.users))
+            discounts = logarithmic_ranking_discounts(np.arange(cutoff))
+            for r in range(cutoff):
+                rows = np.flatnonzero(self.n_relevant > r)
+                if not len(rows):
+                    break
+                idcg[rows] += self.ideal_gains[self.indptr[rows] + r] * discounts[r]
+            self._idcg[cutoff] = idcg
+        return self._idcg[cutoff]
+
 
 class AbstractRelevanceSingleton(ABC):
 
@@ -56,18 +171,27 @@ class AbstractRelevanceSingleton(ABC):
 
 
 class DiscountedRelevance(AbstractRelevanceSingleton):
-    def __init__(self, test, rel_threshold):
+    def __init__(self, test, rel_threshold, index: RelevanceIndex = None):
         self._discounted_relevance = self._compute_user_gain_map(test, rel_threshold)
+        self._relevant_items = {u: RelevantItems(gains) for u, gains in self._discounted_relevance.items()}
+        self._index = index if index is not None else RelevanceIndex(test, rel_threshold)
 
     def get_user_rel_gains(self, user):
         return self._discounted_relevance.get(user, {})
 
     def get_user_rel(self, user):
-        return list(self._discounted_relevance.get(user, {}).keys())
+        return self._relevant_items.get(user, RelevantItems())
 
     def get_rel(self, user, item):
         return self._discounted_relevance.get(user, {}).get(item, 0)
 
+    def get_user_idcg(self, user, cutoff: int) -> float:
+        """
+        Ideal Discounted Cumulative Gain of a user at cutoff
+        """
+        row = self._index.user_row(user)
+        return self._index.idcg(cutoff)[row] if row >= 0 else 0
+
     def _compute_user_gain_map(self, test, rel_threshold) -> t.Dict:
         """
         Method to compute the Gain Map:
@@ -84,14 +208,17 @@ class DiscountedRelevance(AbstractRelevanceSingleton):
 
 class BinaryRelevance(AbstractRelevanceSingleton):
     def __init__(self, test, rel_threshold):
-        self._binary_relevance = {u: [i for i, r in test_items.items() if r >= rel_threshold] for u, test_items in test.items()}
+        self._binary_relevance = {u: RelevantItems(i for i, r in test_items.items() if r >= rel_threshold)
+                                  for u, test_items in test.items()}
+        self._binary_gains = {}
 
     def get_user_rel_gains(self, user):
-        return dict.fromkeys(self._binary_relevance.get(user, []), 1)
+        if user not in self._binary_gains:
+            self._binary_gains[user] = dict.fromkeys(self._binary_relevance.get(user, []), 1)
+        return self._binary_gains[user]
 
     def get_user_rel(self, user):
-        return self._binary_relevance.get(user, [])
+        return self._binary_relevance.get(user, RelevantItems())
 
     def get_rel(self, user, item):
-        return 1 if item in self._binary_relevance.get(user, []) else 0
-
+        return 1 if item in self._binary_relevance.get(user, ()) else 0
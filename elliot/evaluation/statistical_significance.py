@@ -11,27 +11,55 @@ import typing as t
 import numpy as np
 
 
+class UserMetricArray:
+    """
+    Per-user values of a metric, stored as the sorted private indices of the users and their float32 values
+    """
+    __slots__ = ("users", "values")
+
+    def __init__(self, users: np.ndarray, values: np.ndarray):
+        order = np.argsort(users, kind="stable")
+        self.users = np.asarray(users, dtype=np.int64)[order]
+        self.values = np.asarray(values, dtype=np.float32)[order]
+
+    @classmethod
+    def from_dict(cls, user_values: t.Dict, public_users: t.Dict):
+        """
+        :param user_values: per-user values in the {user: value} form of eval_user_metric
+        :param public_users: map from public to private user ids
+        """
+        return cls(np.fromiter(map(public_users.get, user_values.keys()), dtype=np.int64, count=len(user_values)),
+                   np.fromiter(user_values.values(), dtype=np.float32, count=len(user_values)))
+
+    def __len__(self):
+        return len(self.users)
+
+    def get(self, users: np.ndarray) -> np.ndarray:
+        """
+        Values of the given users, that must be in the array
+        """
+        return self.values[np.searchsorted(self.users, users)]
+
+
 class PairedTTest:
     @staticmethod
-    def common_users(arr_0: t.Dict[int, float], arr_1:  t.Dict[int, float]):
-        return list(arr_0.keys() & arr_1.keys())
+    def common_users(arr_0: UserMetricArray, arr_1: UserMetricArray):
+        return np.intersect1d(arr_0.users, arr_1.users, assume_unique=True)
 
     @staticmethod
-    def compare(arr_0: t.Dict[int, float], arr_1:  t.Dict[int, float], users: t.List[int]):
-        list_0 = list(map(arr_0.get, users))
-        list_1 = list(map(arr_1.get, users))
+    def compare(arr_0: UserMetricArray, arr_1: UserMetricArray, users: np.ndarray):
+        list_0 = arr_0.get(users).astype(np.float64)
+        list_1 = arr_1.get(users).astype(np.float64)
         return stats.ttest_rel(list_0, list_1)[1]
 
 
 class WilcoxonTest:
     @staticmethod
-    def common_users(arr_0: t.Dict[int, float], arr_1:  t.Dict[int, float]):
-        return list(arr_0.keys() & arr_1.keys())
+    def common_users(arr_0: UserMetricArray, arr_1: UserMetricArray):
+        return np.intersect1d(arr_0.users, arr_1.users, assume_unique=True)
 
     @staticmethod
-    def compare(arr_0: t.Dict[int, float], arr_1:  t.Dict[int, float], users: t.List[int]):
-        list_0 = list(map(arr_0.get, users))
-        list_1 = list(map(arr_1.get, users))
-        return stats.wilcoxon(list_0, list_1)[1] if any(np.array(list_0) - np.array(list_1)) else np.nan
-
-
+    def compare(arr_0: UserMetricArray, arr_1: UserMetricArray, users: np.ndarray):
+        list_0 = arr_0.get(users).astype(np.float64)
+        list_1 = arr_1.get(users).astype(np.float64)
+        return stats.wilcoxon(list_0, list_1)[1] if any(list_0 - list_1) else np.nan
@@ -60,7 +60,10 @@ class ModelCoordinator(object):
             self.logger.info(f"Exploration: Test Fold exploration number {self.test_fold_index+1}")
             self.logger.info(f"Exploration: Train-Validation Fold exploration number {trainval_index+1}")
             model = self.model_class(data=data_obj, config=self.base, params=model_params)
-            model.train()
+            try:
+                model.train()
+            finally:
+                model.evaluator.close()
             losses.append(model.get_loss())
             results.append(model.get_results())
 
@@ -98,7 +101,10 @@ class ModelCoordinator(object):
             self.logger.info(f"Exploration: Test Fold exploration number {self.test_fold_index+1}")
             self.logger.info(f"Exploration: Train-Validation Fold exploration number {trainval_index+1}")
             model = self.model_class(data=data_obj, config=self.base, params=self.params)
-            model.train()
+            try:
+                model.train()
+            finally:
+                model.evaluator.close()
             losses.append(model.get_loss())
             results.append(model.get_results())
 
@@ -192,8 +192,10 @@ class NameSpaceModel:
                                                     for k, v in self.config[_experiment][p].items()})
                 self.config[_experiment][p] = SimpleNamespace(**self.config[_experiment][p])
                 if getattr(self.config[_experiment][p], 'strategy', '') == 'random':
+                    file_name = "negative" if getattr(self.config[_experiment][p], 'file_format', 'tsv') == 'binary' \
+                        else "negative.tsv"
                     path = os.path.abspath(os.sep.join([self._base_folder_path_config, "..", "data",
-                                                         self.config[_experiment][_dataset], "negative.tsv"]))
+                                                         self.config[_experiment][_dataset], file_name]))
                     setattr(self.config[_experiment][p], 'file_path', path)
                 setattr(self.base_namespace, p, self.config[_experiment][p])
             elif p == _evaluation and self.config[_experiment].get(p, {}):
@@ -1,3 +1,4 @@
+import os
 import pandas as pd
 from types import SimpleNamespace
 import typing as t
@@ -47,7 +48,7 @@ class NegativeSampler:
         i_test = sp.csr_matrix((np.ones_like(rows), (rows, cols)), dtype='float32',
                                shape=(len(public_users.keys()), len(public_items.keys())))
 
-        candidate_negatives = ((i_test + i_train).astype('bool') != True)
+        positive_items = (i_test + i_train).astype('bool')
         ns = ns.negative_sampling
 
         strategy = getattr(ns, "strategy", None)
@@ -57,19 +58,22 @@ class NegativeSampler:
             file_path = getattr(ns, "file_path", None)
             if num_items is not None:
                 if str(num_items).isdigit():
-                    negative_items = NegativeSampler.sample_by_random_uniform(candidate_negatives, num_items)
+                    negative_items = NegativeSampler.sample_by_random_uniform(positive_items, int(num_items))
 
-                    nnz = negative_items.nonzero()
-                    old_ind = 0
-                    basic_negative = []
-                    for u, v in enumerate(negative_items.indptr[1:]):
-                        basic_negative.append([(private_users[u],), list(map(private_items.get, nnz[1][old_ind:v]))])
-                        old_ind = v
+                    if getattr(ns, "file_format", "tsv") == "binary":
+                        NegativeSampler.write_binary(file_path, negative_items, private_users, private_items)
+                    else:
+                        nnz = negative_items.nonzero()
+                        old_ind = 0
+                        basic_negative = []
+                        for u, v in enumerate(negative_items.indptr[1:]):
+                            basic_negative.append([(private_users[u],), list(map(private_items.get, nnz[1][old_ind:v]))])
+                            old_ind = v
 
-                    with open(file_path, "w") as file:
-                        for ele in basic_negative:
-                            line = str(ele[0]) + '\t' + '\t'.join(map(str, ele[1]))+'\n'
-                            file.write(line)
+                        with open(file_path, "w") as file:
+                            for ele in basic_negative:
+                                line = str(ele[0]) + '\t' + '\t'.join(map(str, ele[1]))+'\n'
+                                file.write(line)
 
                     pass
                 else:
@@ -82,7 +86,10 @@ class NegativeSampler:
                 if not isinstance(files, list):
                     files = [files]
                 file_ = files[0] if validation == False else files[1]
-                negative_items = NegativeSampler.read_from_files(public_users, public_items, file_)
+                if os.path.isdir(file_):
+                    negative_items = NegativeSampler.read_binary(public_users, public_items, file_)
+                else:
+                    negative_items = NegativeSampler.read_from_files(public_users, public_items, file_)
             pass
         else:
             raise Exception("Missing strategy")
@@ -90,17 +97,73 @@ class NegativeSampler:
         return negative_items
 
     @staticmethod
-    def sample_by_random_uniform(data: sp.csr_matrix, num_items=99) -> sp.csr_matrix:
-        rows = []
-        cols = []
-        for row in range(data.shape[0]):
-            candidate_negatives = list(zip(*data.getrow(row).nonzero()))
-            sampled_negatives = np.array(candidate_negatives)[random.sample(range(len(candidate_negatives)), num_items)]
-            rows.extend(list(np.ones(len(sampled_negatives), dtype=int) * row))
-            cols.extend(sampled_negatives[:, 1])
-        negative_samples = sp.csr_matrix((np.ones_like(rows), (rows, cols)), dtype='bool',
-                                         shape=(data.shape[0], data.shape[1]))
-        return negative_samples
+    def sample_by_random_uniform(positives: sp.csr_matrix, num_items=99, block_draws=2 ** 22) -> sp.csr_matrix:
+        """
+        Draws for each user num_items items, uniformly without replacement, among the items that are not stored in
+        positives (all of them if they are fewer). The candidate negatives are never materialized: uniform draws are
+        rejected against the positives, in batches of users
+        :param positives: users x items matrix of the items that cannot be sampled (e.g., training and test items)
+        :param num_items: number of negative items per user
+        :param block_draws: approximate number of draws of a batch of users
+        """
+        positives = positives.tocsr().astype(bool)
+        positives.sum_duplicates()
+        n_users, n_items = positives.shape
+        available = n_items - np.diff(positives.indptr)
+        needed = np.minimum(available, num_items)
+        positive_keys = np.repeat(np.arange(n_users, dtype=np.int64), np.diff(positives.indptr)) * n_items + \
+            positives.indices
+
+        block_size = max(1, block_draws // max(num_items, 1))
+        keys = [NegativeSampler._sample_block(positives, positive_keys, available, needed, start,
+                                              min(start + block_size, n_users))
+                for start in range(0, n_users, block_size)]
+        keys = np.concatenate(keys) if keys else np.array([], dtype=np.int64)
+
+        indptr = np.zeros(n_users + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // n_items, minlength=n_users), out=indptr[1:])
+        return sp.csr_matrix((np.ones(len(keys), dtype=bool), keys % n_items, indptr), shape=(n_users, n_items))
+
+    @staticmethod
+    def _sample_block(positives: sp.csr_matrix, positive_keys: np.ndarray, available: np.ndarray,
+                      needed: np.ndarray, start: int, stop: int) -> np.ndarray:
+        """
+        Sorted user * n_items + item keys of the negative items of the users in [start, stop)
+        """
+        n_items = positives.shape[1]
+        users = np.arange(start, stop)
+        # users that need most of their free items are served from the explicit complement of their row
+        dense = needed[users] * 2 > available[users]
+        keys = [np.int64(u) * n_items + np.random.choice(
+                np.setdiff1d(np.arange(n_items), positives.indices[positives.indptr[u]:positives.indptr[u + 1]],
+                             assume_unique=True), needed[u], replace=False)
+                for u in users[dense]]
+
+        accepted = np.array([], dtype=np.int64)
+        have = np.zeros(stop - start, dtype=np.int64)
+        pending = users[~dense & (needed[users] > 0)]
+        while len(pending):
+            # expected number of draws to cover the missing items, with a margin
+            missing = needed[pending] - have[pending - start]
+            draws = np.ceil(missing * n_items / available[pending] * 1.1).astype(np.int64) + 1
+            drawn = np.repeat(pending.astype(np.int64), draws) * n_items + np.random.randint(n_items, size=draws.sum())
+            # sorted keys: duplicates are adjacent and the positives lookup is cache friendly
+            accepted = np.sort(np.concatenate([accepted, drawn]))
+            accepted = accepted[np.concatenate([[True], accepted[1:] != accepted[:-1]])]
+            if len(positive_keys):
+                position = np.minimum(np.searchsorted(positive_keys, accepted), len(positive_keys) - 1)
+                accepted = accepted[positive_keys[position] != accepted]
+            have = np.bincount(accepted // n_items - start, minlength=stop - start)
+            pending = pending[have[pending - start] < needed[pending]]
+
+        # the distinct draws of a user are a uniform subset of the candidates: a uniform subset of them is kept
+        owners = accepted // n_items
+        order = np.argsort(owners - start + np.random.random_sample(len(accepted)))
+        accepted, owners = accepted[order], owners[order]
+        group_starts = np.cumsum(have) - have
+        keep = np.arange(len(accepted)) - group_starts[owners - start] < needed[owners]
+        keys.append(accepted[keep])
+        return np.sort(np.concatenate(keys))
 
     @staticmethod
     def read_from_files(public_users: t.Dict, public_items: t.Dict, filepath: str) -> sp.csr_matrix:
@@ -120,6 +183,62 @@ class NegativeSampler:
                              shape=(len(public_users), len(public_items)))
         return negative_samples
 
+    @staticmethod
+    def write_binary(folder: str, negative_items: sp.csr_matrix, private_users: t.Dict, private_items: t.Dict):
+        """
+        Stores negative samples as CSR arrays of public identifiers (users.npy, indptr.npy, items.npy)
+        """
+        user_ids = np.array([private_users[u] for u in range(negative_items.shape[0])])
+        item_ids = np.array([private_items[i] for i in range(negative_items.shape[1])])
+        NegativeSampler._save_binary(folder, user_ids, negative_items.indptr, item_ids[negative_items.indices])
+
+    @staticmethod
+    def _save_binary(folder: str, user_ids: np.ndarray, indptr: np.ndarray, item_ids: np.ndarray):
+        os.makedirs(folder, exist_ok=True)
+        for name, array in (("users", user_ids), ("indptr", indptr), ("items", item_ids)):
+            np.save(os.path.join(folder, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+
+    @staticmethod
+    def read_binary(public_users: t.Dict, public_items: t.Dict, folder: str) -> sp.csr_matrix:
+        """
+        Loads negative samples stored by write_binary or convert_to_binary. The arrays are memory-mapped and
+        mapped to private identifiers without parsing. Unknown users and items are discarded
+        """
+        def load(name):
+            return np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r")
+
+        def private(public: t.Dict, ids: np.ndarray) -> np.ndarray:
+            codes = pd.Index(list(public.keys())).get_indexer(ids)
+            return np.where(codes >= 0, np.fromiter(public.values(), dtype=np.int64, count=len(public))[codes], -1)
+
+        indptr = load("indptr")
+        rows = np.repeat(private(public_users, load("users")), np.diff(indptr))
+        cols = private(public_items, load("items"))
+        known = (rows >= 0) & (cols >= 0)
+        negative_samples = sp.csr_matrix((np.ones(known.sum(), dtype=bool), (rows[known], cols[known])), dtype='bool',
+                                         shape=(len(public_users), len(public_items)))
+        negative_samples.sum_duplicates()
+        return negative_samples
+
+    @staticmethod
+    def convert_to_binary(filepath: str, folder: str):
+        """
+        Converts a negative samples file in the tab-separated layout ``(user_id, item_test_id)  neg_item1  ...``
+        to the binary layout read by read_binary
+        """
+        user_ids, lengths, item_ids = [], [], []
+        with open(filepath) as file:
+            for line in file:
+                line = line.rstrip("\n").split('\t')
+                user_ids.append(int(make_tuple(line[0])[0]))
+                items = [int(i) for i in line[1:] if i]
+                lengths.append(len(items))
+                item_ids.extend(items)
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        NegativeSampler._save_binary(folder, np.array(user_ids, dtype=np.int64), indptr,
+                                     np.array(item_ids, dtype=np.int64))
+
     @staticmethod
     def build_sparse(map_ : t.Dict, nusers: int, nitems: int):
 
@@ -128,4 +247,14 @@ class NegativeSampler:
         cols = [i for _, i in rows_cols]
         data = sp.csr_matrix((np.ones_like(rows), (rows, cols)), dtype='float32',
                              shape=(nusers, nitems))
-        return data
\ No newline at end of file
+        return data
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert a negative samples tsv file to the binary layout.")
+    parser.add_argument('tsv', type=str)
+    parser.add_argument('folder', type=str)
+    args = parser.parse_args()
+    NegativeSampler.convert_to_binary(args.tsv, args.folder)
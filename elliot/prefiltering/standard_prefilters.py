@@ -1,7 +1,10 @@
 
+import numpy as np
 import pandas as pd
 from types import SimpleNamespace
 
+from elliot.prefiltering.incidence import Incidence
+
 """
 prefiltering:
     strategy: global_threshold|user_average|user_k_core|item_k_core|iterative_k_core|n_rounds_k_core|cold_users
@@ -123,15 +126,14 @@ class PreFilter:
     @staticmethod
     def filter_ratings_by_user_average(d: pd.DataFrame) -> pd.DataFrame:
         data = d.copy()
-        user_groups = data.groupby(['userId'])
-        for name, group in user_groups:
-            threshold = group["rating"].mean()
-            data.loc[group.index, 'accept_flag'] = data.loc[group.index, 'rating'] >= threshold
+        incidence = Incidence(data)
+        ratings = data["rating"].to_numpy(dtype=float)
+        accept_flag = ratings >= incidence.user_mean(ratings)[incidence.user_codes]
 
         print("\nPrefiltering with user average")
-        print(f"The transactions above threshold are {data[data['accept_flag']]['rating'].count()}")
-        print(f"The transactions below threshold are {data[data['accept_flag'] == False]['rating'].count()}\n")
-        return data[data["accept_flag"] == True].drop(columns=["accept_flag"]).reset_index(drop=True)
+        print(f"The transactions above threshold are {np.count_nonzero(accept_flag)}")
+        print(f"The transactions below threshold are {np.count_nonzero(~accept_flag)}\n")
+        return data[accept_flag].reset_index(drop=True)
 
     @staticmethod
     def filter_users_by_profile_size(d: pd.DataFrame, threshold) -> pd.DataFrame:
@@ -139,8 +141,8 @@ class PreFilter:
         print(f"\nPrefiltering with user {threshold}-core")
         print(f"The transactions before filtering are {len(data)}")
         print(f"The users before filtering are {data['userId'].nunique()}")
-        user_groups = data.groupby(['userId'])
-        data = user_groups.filter(lambda x: len(x) >= threshold)
+        incidence = Incidence(data)
+        data = data[PreFilter._by_degree(incidence.user_codes, incidence.user_degree >= threshold)]
         print(f"The transactions after filtering are {len(data)}")
         print(f"The users after filtering are {data['userId'].nunique()}")
         return data
@@ -151,42 +153,46 @@ class PreFilter:
         print(f"\nPrefiltering with item {threshold}-core")
         print(f"The transactions before filtering are {len(data)}")
         print(f"The items before filtering are {data['itemId'].nunique()}")
-        item_groups = data.groupby(['itemId'])
-        data = item_groups.filter(lambda x: len(x) >= threshold)
+        incidence = Incidence(data)
+        data = data[PreFilter._by_degree(incidence.item_codes, incidence.item_degree >= threshold)]
         print(f"The transactions after filtering are {len(data)}")
         print(f"The items after filtering are {data['itemId'].nunique()}")
         return data
 
+    @staticmethod
+    def _by_degree(codes: np.ndarray, accepted: np.ndarray) -> np.ndarray:
+        """
+        Row mask of the accepted users (items). Rows with a missing identifier are discarded, as groupby does
+        """
+        return (codes >= 0) & accepted[np.maximum(codes, 0)] if len(accepted) else np.zeros(len(codes), dtype=bool)
+
     @staticmethod
     def filter_iterative_k_core(d: pd.DataFrame, threshold) -> pd.DataFrame:
-        data = d.copy()
-        check_var = True
-        original_length = len(data)
         print("\n**************************************")
         print(f"Iterative {threshold}-core")
-        while check_var:
-            data = PreFilter.filter_users_by_profile_size(data, threshold)
-            data = PreFilter.filter_items_by_popularity(data, threshold)
-            new_length = len(data)
-            if original_length == new_length:
-                check_var = False
-            else:
-                original_length = new_length
+        data = PreFilter._k_core(d, threshold)
         print("**************************************\n")
-
         return data
 
     @staticmethod
     def filter_rounds_k_core(d: pd.DataFrame, threshold, n_rounds) -> pd.DataFrame:
-        data = d.copy()
         print("\n**************************************")
         print(f"{n_rounds} rounds of user/item {threshold}-core")
-        for i in range(n_rounds):
-            print(f"Iteration:\t{i}")
-            data = PreFilter.filter_users_by_profile_size(data, threshold)
-            data = PreFilter.filter_items_by_popularity(data, threshold)
+        data = PreFilter._k_core(d, threshold, n_rounds)
         print("**************************************\n")
+        return data
 
+    @staticmethod
+    def _k_core(d: pd.DataFrame, threshold, n_rounds=None) -> pd.DataFrame:
+        data = d.copy()
+        print(f"The transactions before filtering are {len(data)}")
+        alive, removed_per_round = Incidence(data).k_core(threshold, n_rounds)
+        for i, removed in enumerate(removed_per_round):
+            print(f"Iteration:\t{i}\tRemoved transactions:\t{removed}")
+        data = data[alive]
+        print(f"The transactions after filtering are {len(data)}")
+        print(f"The users after filtering are {data['userId'].nunique()}")
+        print(f"The items after filtering are {data['itemId'].nunique()}")
         return data
 
     @staticmethod
@@ -195,8 +201,8 @@ class PreFilter:
         print(f"\nPrefiltering retaining cold users with {threshold} or less ratings")
         print(f"The transactions before filtering are {len(data)}")
         print(f"The users before filtering are {data['userId'].nunique()}")
-        user_groups = data.groupby(['userId'])
-        data = user_groups.filter(lambda x: len(x) <= threshold)
+        incidence = Incidence(data)
+        data = data[PreFilter._by_degree(incidence.user_codes, incidence.user_degree <= threshold)]
         print(f"The transactions after filtering are {len(data)}")
         print(f"The users after filtering are {data['userId'].nunique()}")
         return data
@@ -191,7 +191,7 @@ class AMR(RecMixin, BaseRecommenderModel):
                 delta_temp = self._model.build_msap_perturbation(batch, self._eps_iter, self._nb_iter, delta_features[pos])
                 delta_features[pos] = delta_temp.numpy()
 
-            adversarial_iterative_recs = self.get_recommendations(self.evaluator.get_needed_recommendations(), delta_features)
+            adversarial_iterative_recs = self.get_recommendations(self.get_needed_recommendations(), delta_features)
 
             self._model.init_delta_f()
             delta_features = np.empty(shape=(self._num_items, self._side.visual_features_shape), dtype='float32')
@@ -199,7 +199,7 @@ class AMR(RecMixin, BaseRecommenderModel):
                 self._model.build_perturbation(batch, delta_features[pos])
                 delta_features[pos] = delta_temp.numpy()
 
-            adversarial_single_recs = self.get_recommendations(self.evaluator.get_needed_recommendations(), delta_features)
+            adversarial_single_recs = self.get_recommendations(self.get_needed_recommendations(), delta_features)
             clean_result_dict = self._results[-1]
             adversarial_single_result_dict = self.evaluator.eval(adversarial_single_recs)
             adversarial_iterative_result_dict = self.evaluator.eval(adversarial_iterative_recs)
@@ -209,8 +209,8 @@ class AMR(RecMixin, BaseRecommenderModel):
                                               "adversarial_msap": adversarial_iterative_result_dict}
 
     def get_recommendations(self, k, delta_features=None):
-        predictions_top_k_test = {}
-        predictions_top_k_val = {}
+        predictions_top_k_test = []
+        predictions_top_k_val = []
         for index, offset in enumerate(range(0, self._num_users, self._batch_eval)):
             offset_stop = min(offset + self._batch_eval, self._num_users)
             predictions = np.empty((offset_stop - offset, self._num_items))
@@ -221,9 +221,9 @@ class AMR(RecMixin, BaseRecommenderModel):
                                                    tf.Variable(feat), delta_features)
                 predictions[:(offset_stop - offset), item_rel] = p
             recs_val, recs_test = self.process_protocol(k, predictions, offset, offset_stop)
-            predictions_top_k_val.update(recs_val)
-            predictions_top_k_test.update(recs_test)
-        return predictions_top_k_val, predictions_top_k_test
+            predictions_top_k_val.append(recs_val)
+            predictions_top_k_test.append(recs_test)
+        return self.merge_recommendations(predictions_top_k_val, predictions_top_k_test)
 
     def get_results(self):
         if getattr(self._params.meta, "eval_perturbations", False):
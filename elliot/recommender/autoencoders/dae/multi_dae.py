@@ -55,7 +55,7 @@ class MultiDAE(RecMixin, BaseRecommenderModel):
         """
 
         self._ratings = self._data.train_dict
-        self._sampler = sp.Sampler(self._data.sp_i_train)
+        self._sampler = sp.Sampler(self._data.sp_i_train, sparse=self._sparse_batches)
         self._iteration = 0
 
         if self._batch_size < 1:
@@ -14,6 +14,8 @@ import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 
+from elliot.recommender import sparse_input
+
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
 
@@ -41,11 +43,21 @@ class Encoder(layers.Layer):
                                        kernel_initializer=keras.initializers.GlorotNormal(),
                                        kernel_regularizer=keras.regularizers.l2(regularization_lambda))
 
+    def build(self, input_shape):
+        self.dense_proj.build(input_shape)
+        self.dense_mean.build((None, self.dense_proj.units))
+        super().build(input_shape)
+
     @tf.function
     def call(self, inputs, training=None):
-        i_normalized = self.l2_normalizer(inputs, 1)
-        i_drop = self.input_dropout(i_normalized, training=training)
-        x = self.dense_proj(i_drop)
+        if isinstance(inputs, tf.SparseTensor):
+            i_drop = sparse_input.dropout_values(self.input_dropout, sparse_input.l2_normalize_rows(inputs),
+                                                 training=training)
+            x = sparse_input.dense_layer(self.dense_proj, i_drop, inputs.shape)
+        else:
+            i_normalized = self.l2_normalizer(inputs, 1)
+            i_drop = self.input_dropout(i_normalized, training=training)
+            x = self.dense_proj(i_drop)
         z_mean = self.dense_mean(x)
         return z_mean
 
@@ -65,6 +77,11 @@ class Decoder(layers.Layer):
                                          kernel_initializer=keras.initializers.GlorotNormal(),
                                          kernel_regularizer=keras.regularizers.l2(regularization_lambda))
 
+    def build(self, input_shape):
+        self.dense_proj.build(input_shape)
+        self.dense_output.build((None, self.dense_proj.units))
+        super().build(input_shape)
+
     @tf.function
     def call(self, inputs, **kwargs):
         x = self.dense_proj(inputs)
@@ -97,6 +114,10 @@ class DenoisingAutoEncoder(keras.Model):
                                intermediate_dim=intermediate_dim,
                                regularization_lambda=regularization_lambda,
                                random_seed=random_seed)
+        # The variables are created here, outside the tf.function of train_step, so that the gradient tape watches
+        # them also on the sparse input path
+        self.encoder.build((None, original_dim))
+        self.decoder.build((None, latent_dim))
         self.optimizer = tf.optimizers.Adam(learning_rate)
 
     def get_config(self):
@@ -117,8 +138,11 @@ class DenoisingAutoEncoder(keras.Model):
             log_softmax_var = tf.nn.log_softmax(logits)
 
             # per-user average negative log-likelihood
-            loss = -tf.reduce_mean(tf.reduce_sum(
-                log_softmax_var * batch, axis=1))
+            if isinstance(batch, tf.SparseTensor):
+                loss = -tf.reduce_mean(sparse_input.row_dot(batch, log_softmax_var))
+            else:
+                loss = -tf.reduce_mean(tf.reduce_sum(
+                    log_softmax_var * batch, axis=1))
 
         grads = tape.gradient(loss, self.trainable_weights)
         self.optimizer.apply_gradients(zip(grads, self.trainable_weights))
@@ -63,7 +63,7 @@ class MultiVAE(RecMixin, BaseRecommenderModel):
         self.autoset_params()
 
         self._ratings = self._data.train_dict
-        self._sampler = sp.Sampler(self._data.sp_i_train)
+        self._sampler = sp.Sampler(self._data.sp_i_train, sparse=self._sparse_batches)
 
         if self._batch_size < 1:
             self._batch_size = self._num_users
@@ -14,6 +14,8 @@ from tensorflow import keras
 from tensorflow.keras import layers
 import numpy as np
 
+from elliot.recommender import sparse_input
+
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
 
@@ -53,11 +55,22 @@ class Encoder(layers.Layer):
                                        kernel_regularizer=keras.regularizers.l2(regularization_lambda))
         self.sampling = Sampling()
 
+    def build(self, input_shape):
+        self.dense_proj.build(input_shape)
+        self.dense_mean.build((None, self.dense_proj.units))
+        self.dense_log_var.build((None, self.dense_proj.units))
+        super().build(input_shape)
+
     @tf.function
     def call(self, inputs, training=None):
-        i_normalized = self.l2_normalizer(inputs, 1)
-        i_drop = self.input_dropout(i_normalized, training=training)
-        x = self.dense_proj(i_drop)
+        if isinstance(inputs, tf.SparseTensor):
+            i_drop = sparse_input.dropout_values(self.input_dropout, sparse_input.l2_normalize_rows(inputs),
+                                                 training=training)
+            x = sparse_input.dense_layer(self.dense_proj, i_drop, inputs.shape)
+        else:
+            i_normalized = self.l2_normalizer(inputs, 1)
+            i_drop = self.input_dropout(i_normalized, training=training)
+            x = self.dense_proj(i_drop)
         z_mean = self.dense_mean(x)
         z_log_var = self.dense_log_var(x)
         z = self.sampling((z_mean, z_log_var))
@@ -77,6 +90,11 @@ class Decoder(layers.Layer):
                                        kernel_initializer=keras.initializers.GlorotNormal(),
                                        kernel_regularizer=keras.regularizers.l2(regularization_lambda))
 
+    def build(self, input_shape):
+        self.dense_proj.build(input_shape)
+        self.dense_output.build((None, self.dense_proj.units))
+        super().build(input_shape)
+
     @tf.function
     def call(self, inputs, **kwargs):
         x = self.dense_proj(inputs)
@@ -106,6 +124,10 @@ class VariationalAutoEncoder(keras.Model):
         self.decoder = Decoder(original_dim,
                                intermediate_dim=intermediate_dim,
                                regularization_lambda=regularization_lambda)
+        # The variables are created here, outside the tf.function of train_step, so that the gradient tape watches
+        # them also on the sparse input path
+        self.encoder.build((None, original_dim))
+        self.decoder.build((None, latent_dim))
         self.optimizer = tf.optimizers.Adam(learning_rate)
 
     def get_config(self):
@@ -131,8 +153,11 @@ class VariationalAutoEncoder(keras.Model):
             log_softmax_var = tf.nn.log_softmax(logits)
 
             # per-user average negative log-likelihood
-            neg_ll = -tf.reduce_mean(tf.reduce_sum(
-                log_softmax_var * batch, axis=-1))
+            if isinstance(batch, tf.SparseTensor):
+                neg_ll = -tf.reduce_mean(sparse_input.row_dot(batch, log_softmax_var))
+            else:
+                neg_ll = -tf.reduce_mean(tf.reduce_sum(
+                    log_softmax_var * batch, axis=-1))
 
             loss = neg_ll + anneal_ph * KL
 
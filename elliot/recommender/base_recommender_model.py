@@ -9,6 +9,7 @@ import os
 import numpy as np
 import random
 
+from elliot.dataset.samplers.prefetch_sampler import prefetch
 from elliot.evaluation.evaluator import Evaluator
 from elliot.utils.folder import build_model_folder
 
@@ -25,6 +26,10 @@ from elliot.recommender.early_stopping import EarlyStopping
 
 
 class BaseRecommenderModel(ABC):
+    # DataSet attributes read by the model (see DataSet.lazy_attributes), built in advance by the dataset loader.
+    # None means that the model may read any of them
+    data_requirements = None
+
     def __init__(self, data, config, params, *args, **kwargs):
         """
         This class represents a recommender model. You can load a pretrained model
@@ -72,6 +77,8 @@ class BaseRecommenderModel(ABC):
             raise Exception(f"The first validation epoch ({self._validation_rate}) "
                             f"is later than the overall number of epochs ({self._epochs}).")
         self._batch_size = getattr(self._params, "batch_size", -1)
+        self._prefetch = getattr(self._params.meta, "prefetch", 0)
+        self._sparse_batches = getattr(self._params.meta, "sparse_batches", False)
 
 
         self.best_metric_value = 0
@@ -155,6 +162,9 @@ def init_charger(init):
 
         init(self, *args, **kwargs)
 
+        if hasattr(self, "_sampler"):
+            self._sampler = prefetch(self._sampler, self._prefetch, self._seed)
+
         self.evaluator = Evaluator(self._data, self._params)
         self._params.name = self.name
         build_model_folder(self._config.path_output_rec_weight, self.name)
@@ -134,12 +134,12 @@ class CFGAN(RecMixin, BaseRecommenderModel):
             self.evaluate(it, dis_loss.numpy()/(it + 1))
 
     def get_recommendations(self, k: int = 100):
-        predictions_top_k_test = {}
-        predictions_top_k_val = {}
+        predictions_top_k_test = []
+        predictions_top_k_val = []
         for index, offset in enumerate(range(0, self._num_users, self._batch_size)):
             offset_stop = min(offset + self._batch_size, self._num_users)
             predictions = self._model.predict(offset, offset_stop)
             recs_val, recs_test = self.process_protocol(k, predictions, offset, offset_stop)
-            predictions_top_k_val.update(recs_val)
-            predictions_top_k_test.update(recs_test)
-        return predictions_top_k_val, predictions_top_k_test
\ No newline at end of file
+            predictions_top_k_val.append(recs_val)
+            predictions_top_k_test.append(recs_test)
+        return self.merge_recommendations(predictions_top_k_val, predictions_top_k_test)
\ No newline at end of file
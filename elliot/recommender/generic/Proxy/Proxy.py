@@ -5,6 +5,7 @@ import pandas as pd
 from elliot.recommender.base_recommender_model import BaseRecommenderModel
 from elliot.recommender.recommender_utils_mixin import RecMixin
 from elliot.recommender.base_recommender_model import init_charger
+from elliot.utils.recommendation_batch import RecommendationBatch
 
 
 class ProxyRecommender(RecMixin, BaseRecommenderModel):
@@ -38,41 +39,30 @@ class ProxyRecommender(RecMixin, BaseRecommenderModel):
         self.evaluate()
 
     def get_recommendations(self, top_k):
-        predictions_top_k_val = {}
-        predictions_top_k_test = {}
-
-        recs_val, recs_test = self.process_protocol(top_k)
-
-        predictions_top_k_val.update(recs_val)
-        predictions_top_k_test.update(recs_test)
-
-        return predictions_top_k_val, predictions_top_k_test
+        return self.process_protocol(top_k)
 
     def get_single_recommendation(self, mask, k):
-
-        nonzero = mask.nonzero()
-        candidate_items = {}
-        [candidate_items.setdefault(self._data.private_users[user], set()).add(self._data.private_items[item]) for user, item in zip(*nonzero)]
-        recs = {}
-        for u, user_recs in self._recommendations.items():
-            user_cleaned_recs = []
-            user_candidate_items = candidate_items[u]
-            for p, (item, prediction) in enumerate(user_recs):
-                if p >= k:
-                    break
-                if item in user_candidate_items:
-                    user_cleaned_recs.append((item, prediction))
-            recs[u] = user_cleaned_recs
-        return recs
+        recs = self._recommendations
+        # the first k entries of every list, without the items missing from the dataset and the masked ones
+        rows, positions = np.nonzero((np.arange(recs.width) < np.minimum(recs.lengths, k)[:, None]) & (recs.item_ids >= 0))
+        items = recs.item_ids[rows, positions]
+        kept = np.asarray(mask[recs.user_ids[rows], items], dtype=bool).ravel()
+        rows, positions = rows[kept], positions[kept]
+        return RecommendationBatch.from_lists(recs.user_ids, rows, recs.item_ids[rows, positions],
+                                              recs.scores[rows, positions], self._data.private_users,
+                                              self._data.private_items)
 
     def read_recommendations(self, path):
-        recs = {}
+        """
+        Recommendation lists of the file, sorted by decreasing prediction.
+        The items missing from the dataset keep their position in the lists, with private id -1
+        """
         column_names = ["userId", "itemId", "prediction", "timestamp"]
         data = pd.read_csv(path, sep="\t", header=None, names=column_names)
-        user_groups = data.groupby(['userId'])
-        for name, group in user_groups:
-            recs[name] = sorted(data.loc[group.index][['itemId', 'prediction']].apply(tuple, axis=1).to_list(), key=lambda x: x[1], reverse=True)
-        return recs
-
-
-
+        user_codes, users = pd.factorize(data["userId"], sort=True)
+        predictions = data["prediction"].to_numpy(dtype=np.float64)
+        order = np.lexsort((-predictions, user_codes))
+        items = data["itemId"].map(self._data.public_items).fillna(-1).to_numpy(dtype=np.int64)
+        return RecommendationBatch.from_lists(np.array([self._data.public_users[u] for u in users]), user_codes[order],
+                                              items[order], predictions[order], self._data.private_users,
+                                              self._data.private_items)
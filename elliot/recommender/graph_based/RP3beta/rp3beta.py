@@ -19,6 +19,7 @@ from elliot.recommender.recommender_utils_mixin import RecMixin
 
 
 class RP3beta(RecMixin, BaseRecommenderModel):
+    data_requirements = ("sp_i_train_ratings", "public_users", "private_items", "allunrated_mask")
 
     @init_charger
     def __init__(self, data, config, params, *args, **kwargs):
@@ -51,7 +52,7 @@ class RP3beta(RecMixin, BaseRecommenderModel):
         return predictions_top_k_val, predictions_top_k_test
 
     def get_single_recommendation(self, mask, k, *args):
-        return {u: self.get_user_predictions(u, mask, k) for u in self._data.train_dict.keys()}
+        return {u: self.get_user_predictions(u, mask, k) for u in self._data.users}
 
     def get_user_predictions(self, user_id, mask, top_k=10):
         user_id = self._data.public_users.get(user_id)
@@ -12,6 +12,7 @@ __email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it,' \
 import pickle
 
 import numpy as np
+import scipy.sparse as sp
 from tqdm import tqdm
 
 from elliot.dataset.samplers import pointwise_pos_neg_ratings_sampler as pws
@@ -71,9 +72,10 @@ class FM(RecMixin, BaseRecommenderModel):
 
         if (hasattr(self._side, "nfeatures")) and (hasattr(self._side, "feature_map")):
             self._nfeatures = self._side.nfeatures
-            self._item_array = self.get_item_fragment()
+            self._item_features = self.get_item_features()
         else:
             self._nfeatures = 0
+            self._item_features = None
 
         self._field_dims = [self._num_users, self._num_items, self._nfeatures]
 
@@ -85,7 +87,8 @@ class FM(RecMixin, BaseRecommenderModel):
                                                 self._factors,
                                                 self._l_w,
                                                 self._learning_rate,
-                                                self._seed)
+                                                self._seed,
+                                                self._item_features)
 
 
     @property
@@ -107,61 +110,43 @@ class FM(RecMixin, BaseRecommenderModel):
             with tqdm(total=int(self._data.transactions // self._batch_size), disable=not self._verbose) as t:
                 for batch in self._sampler.step(self._data.transactions, self._batch_size):
                     steps += 1
-                    if self._nfeatures:
-                        prepared_batch = self.prepare_fm_transaction(batch)
-                        loss += self._model.train_step(prepared_batch)
-                    else:
-                        u,i,r = batch
-                        loss += self._model.train_step(((u, i), r))
+                    u, i, r = batch
+                    loss += self._model.train_step(((u, i), r))
                     t.set_postfix({'loss': f'{loss.numpy() / steps:.5f}'})
                     t.update()
 
             self.evaluate(it, loss.numpy()/(it + 1))
 
-    def prepare_fm_transaction(self, batch):
-        batch_users = np.array(batch[0])
-        user_array = np.zeros((batch_users.size, self._num_users), dtype=np.float32)
-        user_array[np.arange(batch_users.size), batch_users] = 1
-        return np.hstack((user_array, self._item_array[batch[1]])), batch[2]
-
-    def get_item_fragment(self):
-        transactions = []
-
+    def get_item_features(self):
+        """
+        items x features binary matrix of the item side information
+        """
+        rows, cols = [], []
         for item in range(self._num_items):
-            item_oh = np.zeros(self._num_items, dtype=np.float32)  # item one-hot encoding
-            item_oh[item] = 1
-            if self._nfeatures:
-                feature_oh = np.zeros(self._side.nfeatures, dtype=np.float32)  # feature(s) one-hot encoding
-                i_features = [self._side.public_features[f] for f in
-                              self._side.feature_map[self._data.private_items[item]]]
-                feature_oh[i_features] = 1
-                transactions.append(np.concatenate((item_oh, feature_oh)))
-            else:
-                transactions.append(item_oh)
-        return np.array(transactions, dtype=np.float32)
-
-    def get_user_full_array(self, user):
-        user_oh = np.zeros(self._num_users, dtype=np.float32)  # user one-hot encoding
-        user_oh[user] = 1
-        return np.hstack((np.tile(user_oh, (self._num_items, 1)), self._item_array))
+            i_features = [self._side.public_features[f] for f in
+                          self._side.feature_map[self._data.private_items[item]]]
+            rows.extend([item] * len(i_features))
+            cols.extend(i_features)
+        return sp.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                             shape=(self._num_items, self._nfeatures))
 
     def get_recommendations(self, k: int = 100):
-        predictions_top_k_test = {}
-        predictions_top_k_val = {}
+        predictions_top_k_test = []
+        predictions_top_k_val = []
         local_batch = (self._batch_size)
         for index, offset in enumerate(range(0, self._num_users, local_batch)):
             offset_stop = min(offset + local_batch, self._num_users)
 
             if self._nfeatures:
-                predictions = self._model.get_recs([self.get_user_full_array(u) for u in range(offset, offset_stop)])
+                predictions = self._model.get_recs(np.arange(offset, offset_stop))
             else:
                 predictions = self._model.get_recs(
                     (np.repeat(np.array(list(range(offset, offset_stop)))[:, None], repeats=self._num_items, axis=1),
                      np.array([self._i_items_set for _ in range(offset, offset_stop)])))
             recs_val, recs_test = self.process_protocol(k, predictions, offset, offset_stop)
-            predictions_top_k_val.update(recs_val)
-            predictions_top_k_test.update(recs_test)
-        return predictions_top_k_val, predictions_top_k_test
+            predictions_top_k_val.append(recs_val)
+            predictions_top_k_test.append(recs_test)
+        return self.merge_recommendations(predictions_top_k_val, predictions_top_k_test)
 
     # def get_recommendations(self, k: int = 100):
     #     local_batch = (self._batch_size)
@@ -27,8 +27,14 @@ class FactorizationMachineModel(keras.Model):
                  lambda_weights,
                  learning_rate=0.01,
                  random_seed=42,
+                 item_features=None,
                  name="FM",
                  **kwargs):
+        """
+        :param item_features: items x features binary sparse matrix. If given, the inputs are (user, item) identifiers
+        and the active features of every item are looked up in it, otherwise the inputs are one-hot encoded
+        transactions
+        """
         super().__init__(name=name, **kwargs)
         tf.random.set_seed(random_seed)
         self.num_users = num_users
@@ -42,7 +48,10 @@ class FactorizationMachineModel(keras.Model):
         if self.num_features:
             self.factorization = FactorizationMachineLayer(field_dims=[self.num_users, self.num_items, self.num_features],
                                                            factors=self.factors, kernel_initializer=self.initializer,
-                                                           kernel_regularizer=keras.regularizers.l2(self.lambda_weights))
+                                                           kernel_regularizer=keras.regularizers.l2(self.lambda_weights),
+                                                           item_fields=item_fields(self.num_users, self.num_items,
+                                                                                   item_features)
+                                                           if item_features is not None else None)
         else:
             self.factorization = MatrixFactorizationLayer(num_users=self.num_users,num_items=num_items,
                                                           factors=self.factors, kernel_initializer=self.initializer,
@@ -90,7 +99,9 @@ class FactorizationMachineModel(keras.Model):
         Returns:
             The matrix of predicted values.
         """
-        if self.num_features:
+        if self.num_features and self.factorization.item_fields is not None:
+            return self.factorization.score_all_items(tf.convert_to_tensor(inputs))
+        elif self.num_features:
             output = tf.map_fn(lambda row: self.call(inputs=row, training=training),
                                tf.convert_to_tensor(inputs))
         else:
@@ -102,6 +113,22 @@ class FactorizationMachineModel(keras.Model):
     def get_top_k(self, preds, train_mask, k=100):
         return tf.nn.top_k(tf.where(train_mask, preds, -np.inf), k=k, sorted=True)
 
+def item_fields(num_users, num_items, item_features) -> tf.RaggedTensor:
+    """
+    Active fields of every item in the [users | items | features] field space: the item itself and its features
+    """
+    item_features = item_features.tocsr()
+    item_features.sort_indices()
+    nnz = np.diff(item_features.indptr)
+    splits = item_features.indptr + np.arange(num_items + 1)
+    fields = np.empty(splits[-1], dtype=np.int64)
+    fields[splits[:-1]] = num_users + np.arange(num_items)
+    features = np.ones(splits[-1], dtype=bool)
+    features[splits[:-1]] = False
+    fields[features] = num_users + num_items + item_features.indices
+    return tf.RaggedTensor.from_row_splits(fields, splits.astype(np.int64))
+
+
 ############################## Linear ####################
 
 @tf.keras.utils.register_keras_serializable()
@@ -205,21 +232,61 @@ class FactorizationMachineLayer(tf.keras.layers.Layer):
                 Text, tf.keras.initializers.Initializer] = "truncated_normal",
             kernel_regularizer: Union[Text, None,
                                       tf.keras.regularizers.Regularizer] = None,
+            item_fields: tf.RaggedTensor = None,
             **kwargs):
 
         super().__init__(**kwargs)
 
         self.embedding = Embedding(field_dims, factors, kernel_initializer, kernel_regularizer)
         self.linear = Linear(field_dims, tf.initializers.zeros())
+        # active fields of every item (see item_fields), needed by the (user, item) identifier inputs
+        self.item_fields = item_fields
 
         self._supports_masking = True
 
     @tf.function
     def call(self, inputs: tf.Tensor, training=False) -> tf.Tensor:
+        if isinstance(inputs, (tuple, list)):
+            user, item = inputs
+            user_weight, user_vector = self.user_terms(user)
+            item_weight, item_vector, item_interactions = self.item_terms(item)
+            output = self.linear._g_bias + user_weight + item_weight + item_interactions + \
+                tf.reduce_sum(user_vector * item_vector, axis=-1)
+            return tf.expand_dims(output, axis=-1)
         linear = self.linear(inputs, training)
         second_order = tf.expand_dims(self.embedding(inputs, training), axis=-1)
         return linear + second_order
 
+    def user_terms(self, user):
+        """
+        Linear weight and latent vector of the users
+        """
+        return tf.gather(self.linear._field_embedding.weights[0][:, 0], user), \
+            tf.gather(self.embedding._embedding.weights[0], user)
+
+    def item_terms(self, item):
+        """
+        Linear weight, latent vector, and pairwise interactions of the active fields of the items (item and features):
+        with the user, an FM scores w_0 + w_u + w_i + <v_u, v_i> + 0.5 * (||v_i||^2 - sum_f ||v_f||^2), where
+        w_i and v_i sum over the active item fields f
+        """
+        fields = tf.gather(self.item_fields, item)
+        weight = tf.reduce_sum(tf.gather(self.linear._field_embedding.weights[0][:, 0], fields), axis=1)
+        vectors = tf.gather(self.embedding._embedding.weights[0], fields)
+        vector = tf.reduce_sum(vectors, axis=1)
+        interactions = 0.5 * (tf.reduce_sum(vector ** 2, axis=-1) -
+                              tf.reduce_sum(tf.reduce_sum(vectors ** 2, axis=-1), axis=1))
+        return weight, vector, interactions
+
+    def score_all_items(self, users):
+        """
+        users x items scores: the item terms are computed once and shared by all the users
+        """
+        user_weight, user_vector = self.user_terms(users)
+        item_weight, item_vector, item_interactions = self.item_terms(tf.range(self.item_fields.nrows()))
+        return self.linear._g_bias + user_weight[:, None] + (item_weight + item_interactions)[None, :] + \
+            tf.matmul(user_vector, item_vector, transpose_b=True)
+
     @tf.function
     def get_config(self):
         config = {
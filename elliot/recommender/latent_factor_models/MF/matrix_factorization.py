@@ -98,8 +98,8 @@ class MF(RecMixin, BaseRecommenderModel):
             self.evaluate(it, loss.numpy()/(it + 1))
 
     def get_recommendations(self, k: int = 100):
-        predictions_top_k_test = {}
-        predictions_top_k_val = {}
+        predictions_top_k_test = []
+        predictions_top_k_val = []
         for index, offset in enumerate(range(0, self._num_users, self._batch_size)):
             offset_stop = min(offset + self._batch_size, self._num_users)
             predictions = self._model.get_recs(
@@ -110,9 +110,9 @@ class MF(RecMixin, BaseRecommenderModel):
             )
             recs_val, recs_test = self.process_protocol(k, predictions, offset, offset_stop)
 
-            predictions_top_k_val.update(recs_val)
-            predictions_top_k_test.update(recs_test)
-        return predictions_top_k_val, predictions_top_k_test
+            predictions_top_k_val.append(recs_val)
+            predictions_top_k_test.append(recs_test)
+        return self.merge_recommendations(predictions_top_k_val, predictions_top_k_test)
 
     def restore_weights(self):
         try:
@@ -120,7 +120,7 @@ class MF(RecMixin, BaseRecommenderModel):
                 self._model.set_model_state(pickle.load(f))
             print(f"Model correctly Restored")
 
-            recs = self.get_recommendations(self.evaluator.get_needed_recommendations())
+            recs = self.get_recommendations(self.get_needed_recommendations())
             result_dict = self.evaluator.eval(recs)
             self._results.append(result_dict)
 
@@ -131,7 +131,7 @@ class MF2020(RecMixin, BaseRecommenderModel):
                 self._model.set_model_state(pickle.load(f))
             print(f"Model correctly Restored")
 
-            recs = self.get_recommendations(self.evaluator.get_needed_recommendations())
+            recs = self.get_recommendations(self.get_needed_recommendations())
             result_dict = self.evaluator.eval(recs)
             self._results.append(result_dict)
 
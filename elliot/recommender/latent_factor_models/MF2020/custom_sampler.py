@@ -15,6 +15,8 @@ class Sampler:
     def __init__(self, indexed_ratings, m, sparse_matrix, seed):
         np.random.seed(seed)
         random.seed(seed)
+        self._nprandom = np.random
+        self._random = random
         self._sparse = sparse_matrix
         self._indexed_ratings = indexed_ratings
         self._users = list(self._indexed_ratings.keys())
@@ -26,7 +28,7 @@ class Sampler:
         self._m = m
 
     def step(self, batch_size):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_users = self._nusers
         n_items = self._nitems
         ui_dict = self._ui_dict
@@ -44,7 +46,7 @@ class Sampler:
 
         neg = list()
         for u, i, _ in pos:
-            neg_samples = random.sample(range(n_items), self._m)
+            neg_samples = self._random.sample(range(n_items), self._m)
             neg += list(zip(np.ones(len(neg_samples), dtype=np.int32) * u, neg_samples, np.zeros(len(neg_samples), dtype=np.int32)))
             pass
             # for _ in range(self._m):
@@ -52,7 +54,7 @@ class Sampler:
 
         # samples = list(pos)
         samples = pos + neg
-        samples = random.sample(samples, len(samples))
+        samples = self._random.sample(samples, len(samples))
 
         # def sample():
         #     u = r_int(n_users)
@@ -15,6 +15,8 @@ class Sampler:
     def __init__(self, indexed_ratings, m, sparse_matrix, seed):
         np.random.seed(seed)
         random.seed(seed)
+        self._nprandom = np.random
+        self._random = random
         self._sparse = sparse_matrix
         self._indexed_ratings = indexed_ratings
         self._users = list(self._indexed_ratings.keys())
@@ -27,7 +29,7 @@ class Sampler:
 
     def step(self, batch_size):
         # t1 = time()
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_users = self._nusers
         n_items = self._nitems
         ui_dict = self._ui_dict
@@ -45,7 +47,7 @@ class Sampler:
 
         # samples = list(pos)
         samples = pos + list(neg)
-        samples = random.sample(samples, len(samples))
+        samples = self._random.sample(samples, len(samples))
         # t2 = time()
         # print('Epoch sampling [%.1f s]', t2 - t1)
 
@@ -16,6 +16,8 @@ class Sampler:
     def __init__(self, indexed_ratings, m, sparse_matrix, seed):
         np.random.seed(seed)
         random.seed(seed)
+        self._nprandom = np.random
+        self._random = random
         self._sparse = sparse_matrix
         self._indexed_ratings = indexed_ratings
         self._users = list(self._indexed_ratings.keys())
@@ -44,7 +46,7 @@ class Sampler:
             uniformly at random.
         """
         time_start = time.time()
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         num_items = self._nitems
         num_negatives = self._m
         num_pos_examples = self._num_pos_examples
@@ -78,7 +80,7 @@ class Sampler:
         #
         # samples = list(pos)
         # samples += list(neg)
-        samples_indices = random.sample(range(training_matrix.shape[0]), training_matrix.shape[0])
+        samples_indices = self._random.sample(range(training_matrix.shape[0]), training_matrix.shape[0])
         training_matrix = training_matrix[samples_indices]
         print(f"Sampling has taken {round(time.time()-time_start, 2)} seconds")
         for start in range(0, training_matrix.shape[0], batch_size):
@@ -39,6 +39,8 @@ class PureSVD(RecMixin, BaseRecommenderModel):
           factors: 10
           seed: 42
     """
+    data_requirements = ("sp_i_train", "private_users", "public_users", "private_items", "public_items",
+                         "allunrated_mask")
 
     @init_charger
     def __init__(self, data, config, params, *args, **kwargs):
@@ -48,7 +50,6 @@ class PureSVD(RecMixin, BaseRecommenderModel):
         ]
         self.autoset_params()
 
-        self._ratings = self._data.train_dict
         self._sp_i_train = self._data.sp_i_train
         self._model = PureSVDModel(self._factors, self._data, self._seed)
 
@@ -64,7 +65,7 @@ class PureSVD(RecMixin, BaseRecommenderModel):
         return predictions_top_k_val, predictions_top_k_test
 
     def get_single_recommendation(self, mask, k, *args):
-        return {u: self._model.get_user_recs(u, mask, k) for u in self._ratings.keys()}
+        return {u: self._model.get_user_recs(u, mask, k) for u in self._data.users}
 
     def predict(self, u: int, i: int):
         """
@@ -94,7 +95,7 @@ class PureSVD(RecMixin, BaseRecommenderModel):
                 self._model.set_model_state(pickle.load(f))
             print(f"Model correctly Restored")
 
-            recs = self.get_recommendations(self.evaluator.get_needed_recommendations())
+            recs = self.get_recommendations(self.get_needed_recommendations())
             result_dict = self.evaluator.eval(recs)
             self._results.append(result_dict)
 
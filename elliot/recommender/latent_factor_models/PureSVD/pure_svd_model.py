@@ -28,7 +28,6 @@ class PureSVDModel(object):
         self._public_items = data.public_items
         self.factors = factors
         self.random_seed = random_seed
-        self.train_dict = self._data.train_dict
         self.user_num, self.item_num = self._data.num_users, self._data.num_items
 
         self.user_vec, self.item_vec = None, None
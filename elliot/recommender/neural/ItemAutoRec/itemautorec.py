@@ -65,7 +65,7 @@ class ItemAutoRec(RecMixin, BaseRecommenderModel):
         if self._batch_size < 1:
             self._batch_size = self._data.transactions
         self._data.sp_u_train = self._data.sp_i_train.transpose()  # transpose the Matrix
-        self._sampler = sp.Sampler(self._data.sp_u_train)
+        self._sampler = sp.Sampler(self._data.sp_u_train, sparse=self._sparse_batches)
 
         self._ratings = self._data.train_dict
         self._sp_i_train = self._data.sp_i_train
@@ -97,15 +97,15 @@ class ItemAutoRec(RecMixin, BaseRecommenderModel):
             self.evaluate(it, loss.numpy()/(it + 1))
 
     def get_recommendations(self, k: int = 100):
-        predictions_top_k_test = {}
-        predictions_top_k_val = {}
+        predictions_top_k_test = []
+        predictions_top_k_val = []
         for batch in self._sampler.step(self._num_items, self._num_items):
             predictions = self._model.get_recs(batch)
         predictions = np.transpose(np.array(predictions))  # We have to build the transpose since we query the model by items.
         recs_val, recs_test = self.process_protocol(k, predictions, 0, self._data.num_users)
-        predictions_top_k_val.update(recs_val)
-        predictions_top_k_test.update(recs_test)
-        return predictions_top_k_val, predictions_top_k_test
+        predictions_top_k_val.append(recs_val)
+        predictions_top_k_test.append(recs_test)
+        return self.merge_recommendations(predictions_top_k_val, predictions_top_k_test)
 
     # def get_recommendations(self, k: int = 100):
     #     predictions_top_k = {}
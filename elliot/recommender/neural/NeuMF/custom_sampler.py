@@ -15,6 +15,8 @@ class Sampler:
     def __init__(self, indexed_ratings, m):
         np.random.seed(42)
         random.seed(42)
+        self._nprandom = np.random
+        self._random = random
         self._indexed_ratings = indexed_ratings
         self._users = list(self._indexed_ratings.keys())
         self._nusers = len(self._users)
@@ -25,7 +27,7 @@ class Sampler:
         self._m = m
 
     def step(self, batch_size: int):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_items = self._nitems
         ui_dict = self._ui_dict
         pos = {(u, i, 1) for u, items in ui_dict.items() for i in items}
@@ -41,7 +43,7 @@ class Sampler:
 
         samples = list(pos)
         samples.extend(list(neg))
-        samples = random.sample(samples, len(samples))
+        samples = self._random.sample(samples, len(samples))
 
         for start in range(0, len(samples), batch_size):
             u, i, b = map(np.array, zip(*samples[start:min(start + batch_size, len(samples))]))
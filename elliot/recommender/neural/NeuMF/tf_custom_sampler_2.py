@@ -14,6 +14,8 @@ class Sampler():
     def __init__(self, indexed_ratings=None, m=None, num_users=None, num_items=None, transactions=None, batch_size=512, random_seed=42):
         np.random.seed(random_seed)
         random.seed(random_seed)
+        self._nprandom = np.random
+        self._random = random
         self._UIDICT = {u: list(set(indexed_ratings[u])) for u in indexed_ratings}
         self._POS = list({(u, i, 1) for u, items in self._UIDICT.items() for i in items})
         self._POS = random.sample(self._POS, len(self._POS))
@@ -24,7 +26,7 @@ class Sampler():
         self._batch_size = batch_size
 
     def _full_generator(self):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_items = self._NUM_ITEMS
         ui_dict = self._UIDICT
         neg = set()
@@ -38,7 +40,7 @@ class Sampler():
 
         samples = self._POS[:]
         samples.extend(list(neg))
-        samples = random.sample(samples, len(samples))
+        samples = self._random.sample(samples, len(samples))
 
         # u, i, b = map(np.array, zip(*samples))
         # yield u,i,b
@@ -47,7 +49,7 @@ class Sampler():
             yield u, i, b
 
     def step(self, batch_size: int):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_items = self._NUM_ITEMS
         ui_dict = self._UIDICT
 
@@ -64,7 +66,7 @@ class Sampler():
 
         samples = list(pos)
         samples.extend(list(neg))
-        samples = random.sample(samples, len(samples))
+        samples = self._random.sample(samples, len(samples))
 
         for start in range(0, len(samples), batch_size):
             u, i, b = map(np.array, zip(*samples[start:min(start + batch_size, len(samples))]))
@@ -66,7 +66,7 @@ class UserAutoRec(RecMixin, BaseRecommenderModel):
         if self._batch_size < 1:
             self._batch_size = self._data.transactions
 
-        self._sampler = sp.Sampler(self._data.sp_i_train)
+        self._sampler = sp.Sampler(self._data.sp_i_train, sparse=self._sparse_batches)
 
         self._ratings = self._data.train_dict
         self._sp_i_train = self._data.sp_i_train
@@ -13,6 +13,8 @@ import numpy as np
 import tensorflow as tf
 from tensorflow import keras
 
+from elliot.recommender import sparse_input
+
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
 
@@ -29,8 +31,14 @@ class Encoder(tf.keras.layers.Layer):
                                            kernel_regularizer=keras.regularizers.l2(regularization),
                                            bias_initializer=keras.initializers.Ones())
 
+    def build(self, input_shape):
+        self.dense.build(input_shape)
+        super().build(input_shape)
+
     @tf.function
     def call(self, inputs, training=None):
+        if isinstance(inputs, tf.SparseTensor):
+            return sparse_input.dense_layer(self.dense, inputs)
         x = self.dense(inputs)
         return x
 
@@ -77,6 +85,9 @@ class UserAutoRecModel(keras.Model):
                                )
         self.decoder = Decoder(num_items=self.num_items,
                                regularization=self.l_w)
+        # The encoder variables are created outside the tf.function of train_step, so that the gradient tape watches
+        # them also on the sparse input path
+        self.encoder.build((None, self.num_items))
 
         self.optimizer = tf.optimizers.Adam(self.lr)
 
@@ -95,11 +106,15 @@ class UserAutoRecModel(keras.Model):
             # Clean Inference
             reconstructed = self.call(inputs=batch, training=True)
 
-            # Observing the contribution of only training ratings
-            reconstructed = reconstructed * tf.sign(batch)
-            # error
-            error = batch - reconstructed
-            loss = tf.reduce_mean(tf.reduce_sum(error**2, axis=1))
+            if isinstance(batch, tf.SparseTensor):
+                # Only the stored training ratings are gathered
+                loss = tf.reduce_mean(sparse_input.observed_squared_error(batch, reconstructed))
+            else:
+                # Observing the contribution of only training ratings
+                reconstructed = reconstructed * tf.sign(batch)
+                # error
+                error = batch - reconstructed
+                loss = tf.reduce_mean(tf.reduce_sum(error**2, axis=1))
 
         grads = tape.gradient(loss, self.trainable_weights)
         self.optimizer.apply_gradients(zip(grads, self.trainable_weights))
@@ -13,6 +13,8 @@ import numpy as np
 import tensorflow as tf
 from tensorflow import keras
 
+from elliot.recommender import sparse_input
+
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
 
@@ -68,6 +70,10 @@ class WideAndDeepModel(tf.keras.Model):
                                                 kernel_regularizer=self.regularizer,
                                                 bias_regularizer=self.bias_regularizer)
 
+        # Built here since the sparse input path only reads the kernels of the first layers
+        self.wide.build((None, self._len_sparse_dimension))
+        self.deep.build((None, self._len_sparse_dimension))
+
         self.loss = keras.losses.BinaryCrossentropy()
 
         self.optimizer = tf.optimizers.Adam(self._lr)
@@ -76,11 +82,18 @@ class WideAndDeepModel(tf.keras.Model):
     def call(self, inputs, training=False, **kwargs):
         _, _, s = inputs
 
-        # Wide
-        wide_part = self.wide(s)
-
-        # Deep
-        deep_part = self.deep(s)
+        if isinstance(s, tf.SparseTensor):
+            # Sparse encodings (see the Wide&Deep sampler) only reach the first layers through sparse-dense products
+            wide_part = sparse_input.dense_layer(self.wide, s)
+            deep_part = sparse_input.dense_layer(self.deep.layers[0], s)
+            for layer in self.deep.layers[1:]:
+                deep_part = layer(deep_part)
+        else:
+            # Wide
+            wide_part = self.wide(s)
+
+            # Deep
+            deep_part = self.deep(s)
 
         concat = tf.concat([wide_part, deep_part], axis=1)
 
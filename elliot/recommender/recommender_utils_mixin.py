@@ -3,6 +3,8 @@ import os
 import numpy as np
 from tqdm import tqdm
 
+from elliot.dataset.samplers.prefetch_sampler import PrefetchSampler
+from elliot.utils.recommendation_batch import RecommendationBatch, ranking_positions
 from elliot.utils.write import store_recommendation
 
 
@@ -13,6 +15,7 @@ class RecMixin(object):
             return self.restore_weights()
 
         for it in range(self._num_iters):
+            self._start_epoch(it)
             loss = 0
             steps = 0
             with tqdm(total=int(self._data.transactions // self._batch_size), disable=not self._verbose) as t:
@@ -26,8 +29,17 @@ class RecMixin(object):
 
     def evaluate(self, it=None, loss=0):
         if (it is None) or (not (it + 1) % self._validation_rate):
-            recs = self.get_recommendations(self.evaluator.get_needed_recommendations())
-            result_dict = self.evaluator.eval(recs)
+            if self.evaluator.streaming:
+                # the recommendation blocks are evaluated as they are produced (see process_protocol)
+                self._evaluation_stream = self.evaluator.stream()
+                try:
+                    recs = self.get_recommendations(self.get_needed_recommendations())
+                    result_dict = self._evaluation_stream.results()
+                finally:
+                    self._evaluation_stream = None
+            else:
+                recs = self.get_recommendations(self.get_needed_recommendations())
+                result_dict = self.evaluator.eval(recs)
 
             self._losses.append(loss)
 
@@ -60,32 +72,66 @@ class RecMixin(object):
 
 
 
+    def get_needed_recommendations(self):
+        """
+        Length of the recommendation lists needed by the evaluator. The top-k lists of get_single_recommendation carry
+        the full-ranking positions of the relevant items, so the metrics computed from them (e.g., AUC) do not need
+        full length lists
+        """
+        return self.evaluator.get_needed_recommendations(
+            full_ranking=type(self).get_single_recommendation is RecMixin.get_single_recommendation)
+
     def get_recommendations(self, k: int = 100):
-        predictions_top_k_test = {}
-        predictions_top_k_val = {}
+        predictions_top_k_test = []
+        predictions_top_k_val = []
         for index, offset in enumerate(range(0, self._num_users, self._batch_size)):
             offset_stop = min(offset + self._batch_size, self._num_users)
             predictions = self._model.predict(self._data.sp_i_train[offset:offset_stop].toarray())
             recs_val, recs_test = self.process_protocol(k, predictions, offset, offset_stop)
-            predictions_top_k_val.update(recs_val)
-            predictions_top_k_test.update(recs_test)
-
-        return predictions_top_k_val, predictions_top_k_test
+            predictions_top_k_val.append(recs_val)
+            predictions_top_k_test.append(recs_test)
+
+        return self.merge_recommendations(predictions_top_k_val, predictions_top_k_test)
+
+    @staticmethod
+    def merge_recommendations(val_blocks, test_blocks):
+        """
+        Validation and test recommendations of the user blocks. When the protocol yields the same blocks for both,
+        the merged recommendations are shared
+        """
+        test = RecommendationBatch.concatenate(test_blocks)
+        if len(val_blocks) == len(test_blocks) and all(v is t for v, t in zip(val_blocks, test_blocks)):
+            return test, test
+        return RecommendationBatch.concatenate(val_blocks), test
 
     def process_protocol(self, k, *args):
 
         if not self._negative_sampling:
             recs = self.get_single_recommendation(self.get_candidate_mask(), k, *args)
-            return recs, recs
+            recs = recs, recs
         else:
-            return self.get_single_recommendation(self.get_candidate_mask(validation=True), k, *args) if hasattr(self._data, "val_dict") else {}, \
+            recs = self.get_single_recommendation(self.get_candidate_mask(validation=True), k, *args) if hasattr(self._data, "val_dict") else {}, \
                    self.get_single_recommendation(self.get_candidate_mask(), k, *args)
 
+        stream = getattr(self, "_evaluation_stream", None)
+        if stream is not None:
+            stream.add(recs)
+            # the evaluated blocks are kept only to store them
+            if not self._save_recs:
+                return {}, {}
+        return recs
+
     def get_single_recommendation(self, mask, k, predictions, offset, offset_stop):
-        v, i = self._model.get_top_k(predictions, mask[offset: offset_stop], k=k)
-        items_ratings_pair = [list(zip(map(self._data.private_items.get, u_list[0]), u_list[1]))
-                              for u_list in list(zip(i.numpy(), v.numpy()))]
-        return dict(zip(map(self._data.private_users.get, range(offset, offset_stop)), items_ratings_pair))
+        block_mask = mask[offset: offset_stop]
+        v, i = self._model.get_top_k(predictions, block_mask, k=k)
+        recs = RecommendationBatch(np.arange(offset, offset_stop), i.numpy(), v.numpy(), self._data.private_users,
+                                   self._data.private_items)
+        ranked_items = self.evaluator.get_ranked_items()
+        if ranked_items is not None:
+            # positions of the relevant items in the full rankings, in the order of top-k
+            recs.item_positions = ranking_positions(np.where(block_mask, np.asarray(predictions), -np.inf),
+                                                    ranked_items[offset:offset_stop])
+        return recs
 
     def restore_weights(self):
         try:
@@ -133,7 +179,16 @@ class RecMixin(object):
                 self.logger.info(f"Met Early Stopping conditions: {self._early_stopping}")
                 break
             else:
+                self._start_epoch(iteration)
                 yield iteration
 
+    def _start_epoch(self, epoch):
+        """
+        Sets the epoch of a prefetching sampler, which seeds its batches (see PrefetchSampler)
+        """
+        sampler = getattr(self, "_sampler", None)
+        if isinstance(sampler, PrefetchSampler):
+            sampler.set_epoch(epoch)
+
 
 
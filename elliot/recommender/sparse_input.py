@@ -0,0 +1,60 @@
+"""
+Module description:
+Operations of the models whose input batches may be tf.SparseTensor rows of the interaction matrix (see
+elliot.dataset.samplers.sparse_sampler). They only touch the stored entries, so they never build the dense batch.
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+import tensorflow as tf
+
+
+def dense_layer(layer, inputs: tf.SparseTensor, input_shape=None) -> tf.Tensor:
+    """
+    Applies a keras Dense layer to a sparse batch through a sparse-dense matmul
+    :param input_shape: shape used to build the layer, when the static shape of inputs is unknown (e.g., after the
+    values of a sparse input are transformed)
+    """
+    if not layer.built:
+        # as in Layer.__call__, the variables are created eagerly even when called from a tf.function, otherwise
+        # they are not tracked by the gradient tape of the training step
+        with tf.init_scope():
+            layer.build(tf.TensorShape(input_shape if input_shape is not None else inputs.shape))
+    outputs = tf.sparse.sparse_dense_matmul(inputs, layer.kernel)
+    if layer.use_bias:
+        outputs = tf.nn.bias_add(outputs, layer.bias)
+    return layer.activation(outputs)
+
+
+def l2_normalize_rows(inputs: tf.SparseTensor, epsilon=1e-12) -> tf.SparseTensor:
+    """
+    Rows scaled to unit L2 norm, as keras.backend.l2_normalize(x, axis=1)
+    """
+    rows = inputs.indices[:, 0]
+    square_norms = tf.math.unsorted_segment_sum(tf.square(inputs.values), rows, inputs.dense_shape[0])
+    return inputs.with_values(inputs.values * tf.gather(tf.math.rsqrt(tf.maximum(square_norms, epsilon)), rows))
+
+
+def dropout_values(dropout, inputs: tf.SparseTensor, training=None) -> tf.SparseTensor:
+    """
+    Applies a keras Dropout layer to the stored entries (the missing ones are zeros anyway)
+    """
+    return inputs.with_values(dropout(inputs.values, training=training))
+
+
+def row_dot(inputs: tf.SparseTensor, dense: tf.Tensor) -> tf.Tensor:
+    """
+    Row-wise sum of the element-wise product of a sparse batch and a dense tensor of the same shape
+    """
+    return tf.math.unsorted_segment_sum(inputs.values * tf.gather_nd(dense, inputs.indices), inputs.indices[:, 0],
+                                        inputs.dense_shape[0])
+
+
+def observed_squared_error(inputs: tf.SparseTensor, reconstructed: tf.Tensor) -> tf.Tensor:
+    """
+    Row-wise sum of the squared reconstruction errors of the stored (observed) entries
+    """
+    error = inputs.values - tf.gather_nd(reconstructed, inputs.indices)
+    return tf.math.unsorted_segment_sum(tf.square(error), inputs.indices[:, 0], inputs.dense_shape[0])
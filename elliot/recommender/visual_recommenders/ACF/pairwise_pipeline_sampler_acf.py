@@ -18,6 +18,7 @@ class Sampler:
     def __init__(self, indexed_ratings, cnn_features_path, cnn_features_shape, epochs):
         np.random.seed(42)
         random.seed(42)
+        self._nprandom = np.random
         self._indexed_ratings = indexed_ratings
         self._users = list(self._indexed_ratings.keys())
         self._nusers = len(self._users)
@@ -39,7 +40,7 @@ class Sampler:
         return user.numpy(), pos.numpy(), neg.numpy(), user_pos.numpy(), item_pos
 
     def step(self, events: int, batch_size: int):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_users = self._nusers
         n_items = self._nitems
         ui_dict = self._ui_dict
@@ -19,6 +19,7 @@ class Sampler:
     def __init__(self, indexed_ratings, item_indices, images_path, output_image_size, epochs):
         np.random.seed(42)
         random.seed(42)
+        self._nprandom = np.random
         self._indexed_ratings = indexed_ratings
         self._item_indices = item_indices
         self._users = list(self._indexed_ratings.keys())
@@ -57,7 +58,7 @@ class Sampler:
         return user.numpy(), pos.numpy(), im_pos, neg.numpy(), im_neg
 
     def step(self, events: int, batch_size: int):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_users = self._nusers
         n_items = self._nitems
         ui_dict = self._ui_dict
@@ -127,8 +127,8 @@ class VBPR(RecMixin, BaseRecommenderModel):
                     loss = 0
 
     def get_recommendations(self, k: int = 100):
-        predictions_top_k_test = {}
-        predictions_top_k_val = {}
+        predictions_top_k_test = []
+        predictions_top_k_val = []
         for index, offset in enumerate(range(0, self._num_users, self._batch_eval)):
             offset_stop = min(offset + self._batch_eval, self._num_users)
             predictions = np.empty((offset_stop - offset, self._num_items))
@@ -139,8 +139,8 @@ class VBPR(RecMixin, BaseRecommenderModel):
                                                    tf.Variable(feat))
                 predictions[:(offset_stop - offset), item_rel] = p
             recs_val, recs_test = self.process_protocol(k, predictions, offset, offset_stop)
-            predictions_top_k_val.update(recs_val)
-            predictions_top_k_test.update(recs_test)
-        return predictions_top_k_val, predictions_top_k_test
+            predictions_top_k_val.append(recs_val)
+            predictions_top_k_test.append(recs_test)
+        return self.merge_recommendations(predictions_top_k_val, predictions_top_k_test)
 
 
@@ -18,6 +18,7 @@ random.seed(42)
 
 class Sampler:
     def __init__(self, indexed_ratings, item_indices, cnn_features_path, epochs):
+        self._nprandom = np.random
         self._indexed_ratings = indexed_ratings
         self._item_indices = item_indices
         self._users = list(self._indexed_ratings.keys())
@@ -38,7 +39,7 @@ class Sampler:
         return user.numpy(), pos.numpy(), feat_pos, neg.numpy(), feat_neg
 
     def step(self, events: int, batch_size: int):
-        r_int = np.random.randint
+        r_int = self._nprandom.randint
         n_users = self._nusers
         n_items = self._nitems
         ui_dict = self._ui_dict
@@ -58,21 +58,13 @@ def run_experiment(config_path: str = ''):
     hyper_handler = HyperParameterStudy(rel_threshold=base.base_namespace.evaluation.relevance_threshold)
     dataloader_class = getattr(importlib.import_module("elliot.dataset"), base.base_namespace.data_config.dataloader)
     dataloader = dataloader_class(config=base.base_namespace)
-    data_test_list = dataloader.generate_dataobjects()
+    data_test_list = dataloader.generate_dataobjects(_data_requirements(builder, base.base_namespace))
     for key, model_base in builder.models():
         test_results = []
         test_trials = []
         for test_fold_index, data_test in enumerate(data_test_list):
             logging_project.prepare_logger(key, base.base_namespace.path_log_folder)
-            if key.startswith("external."):
-                spec = importlib.util.spec_from_file_location("external",
-                                                              path.relpath(base.base_namespace.external_models_path))
-                external = importlib.util.module_from_spec(spec)
-                sys.modules[spec.name] = external
-                spec.loader.exec_module(external)
-                model_class = getattr(importlib.import_module("external"), key.split(".", 1)[1])
-            else:
-                model_class = getattr(importlib.import_module("elliot.recommender"), key)
+            model_class = _get_model_class(key, base.base_namespace)
 
             model_placeholder = ho.ModelCoordinator(data_test, base.base_namespace, model_base, model_class,
                                                     test_fold_index)
@@ -148,6 +140,31 @@ def run_experiment(config_path: str = ''):
     logger.info("End experiment")
 
 
+def _get_model_class(key, base_namespace):
+    if key.startswith("external."):
+        spec = importlib.util.spec_from_file_location("external",
+                                                      path.relpath(base_namespace.external_models_path))
+        external = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = external
+        spec.loader.exec_module(external)
+        return getattr(importlib.import_module("external"), key.split(".", 1)[1])
+    else:
+        return getattr(importlib.import_module("elliot.recommender"), key)
+
+
+def _data_requirements(builder, base_namespace):
+    """
+    Union of the dataset attributes required by the configured models, None if any of them does not declare them
+    """
+    requirements = set()
+    for key, _ in builder.models():
+        model_requirements = getattr(_get_model_class(key, base_namespace), "data_requirements", None)
+        if model_requirements is None:
+            return None
+        requirements.update(model_requirements)
+    return sorted(requirements)
+
+
 def _reset_verbose_option(model):
     if isinstance(model, tuple):
         model[0].meta.verbose = False
@@ -177,16 +194,7 @@ def config_test(builder, base):
             test_results = []
             test_trials = []
             for data_test in data_test_list:
-                if key.startswith("external."):
-                    spec = importlib.util.spec_from_file_location("external",
-                                                                  path.relpath(
-                                                                      base.base_namespace.external_models_path))
-                    external = importlib.util.module_from_spec(spec)
-                    sys.modules[spec.name] = external
-                    spec.loader.exec_module(external)
-                    model_class = getattr(importlib.import_module("external"), key.split(".", 1)[1])
-                else:
-                    model_class = getattr(importlib.import_module("elliot.recommender"), key)
+                model_class = _get_model_class(key, base.base_namespace)
 
                 model_base_mock = model_base
                 model_base_mock = _reset_verbose_option(model_base_mock)
@@ -1,7 +1,7 @@
 import typing as t
+from collections.abc import Sequence
 import pandas as pd
 import numpy as np
-import math
 import shutil
 import os
 
@@ -60,6 +60,75 @@ Nested Hold-Out
 """
 
 
+class FoldList(Sequence):
+    """
+    Sequence of the (train, test) folds of a dataframe. Only the fold assignment is kept: the train and test dataframes
+    of a fold are built when the fold is accessed, so the folds are never all in memory at the same time
+    """
+
+    def __init__(self, data: pd.DataFrame, test_flag: t.Callable[[int], np.ndarray], folds: int):
+        """
+        :param data: dataframe to split
+        :param test_flag: function returning the boolean test mask of the rows of a fold (picklable, as the
+        FoldList itself)
+        :param folds: number of folds
+        """
+        self._data = data
+        self._test_flag = test_flag
+        self._folds = folds
+
+    def __len__(self):
+        return self._folds
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("fold index out of range")
+        test_flag = self._test_flag(index)
+        return (self._data[~test_flag].reset_index(drop=True), self._data[test_flag].reset_index(drop=True))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class _KFoldFlag(object):
+    """
+    Test mask of the rows of a k-fold split, given the fold of every row
+    """
+
+    def __init__(self, row_folds: np.ndarray):
+        self.row_folds = row_folds
+
+    def __call__(self, fold: int) -> np.ndarray:
+        return self.row_folds == fold
+
+
+class _RandomSubsamplingFlag(object):
+    """
+    Test mask of the rows of a random subsampling fold: for each user, the rows at the first user_test positions of
+    a random permutation seeded by the fold seed
+    """
+
+    def __init__(self, user_codes: np.ndarray, user_test: np.ndarray, fold_seeds: np.ndarray):
+        self.user_codes = user_codes
+        self.fold_seeds = fold_seeds
+        self.group_starts = np.cumsum(np.bincount(user_codes)) - np.bincount(user_codes)
+        self.train_size = np.bincount(user_codes) - user_test
+
+    def __call__(self, fold: int) -> np.ndarray:
+        user_codes = self.user_codes
+        # one random permutation per user: rows are sorted by user code plus a random key in [0, 1)
+        keys = np.random.RandomState(self.fold_seeds[fold]).random_sample(len(user_codes))
+        order = np.argsort(user_codes + keys)
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order)) - self.group_starts[user_codes[order]]
+        return position >= self.train_size[user_codes]
+
+
 class Splitter:
     def __init__(self, data: pd.DataFrame, splitting_ns: SimpleNamespace, random_seed=42):
         self.random_seed = random_seed
@@ -113,7 +182,7 @@ class Splitter:
         for i, (train_val, test) in enumerate(tuple_list):
             actual_test_folder = create_folder_by_index(self.save_folder, str(i))
             test.to_csv(os.path.abspath(os.sep.join([actual_test_folder, "test.tsv"])), sep='\t', index=False, header=False)
-            if isinstance(train_val, list):
+            if isinstance(train_val, Sequence):
                 for j, (train, val) in enumerate(train_val):
                     actual_val_folder = create_folder_by_index(actual_test_folder, str(j))
                     val.to_csv(os.path.abspath(os.sep.join([actual_val_folder, "val.tsv"])), sep='\t', index=False, header=False)
@@ -145,6 +214,8 @@ class Splitter:
                             kwargs["min_below"] = int(valtest_splitting_ns.min_below)
                         if hasattr(valtest_splitting_ns, "min_over"):
                             kwargs["min_over"] = int(valtest_splitting_ns.min_over)
+                        if hasattr(valtest_splitting_ns, "granularity"):
+                            kwargs["granularity"] = int(valtest_splitting_ns.granularity)
                         tuple_list = self.splitting_best_timestamp(data, **kwargs)
 
                     else:
@@ -199,118 +270,118 @@ class Splitter:
     def generic_split_function(self, data: pd.DataFrame, **kwargs) -> t.List[t.Tuple[pd.DataFrame, pd.DataFrame]]:
         pass
 
-    def fold_list_generator(self, length, folds=5):
-        def infinite_looper(folds=5):
-            while True:
-                for f in range(folds):
-                    yield f
-
-        looper = infinite_looper(folds)
-        return [next(looper) for _ in range(length)]
-
     def splitting_kfolds(self, data: pd.DataFrame, folds=5):
-        tuple_list = []
-        user_groups = data.groupby(['userId'])
-        for name, group in user_groups:
-            data.loc[group.index, 'fold'] = self.fold_list_generator(len(group), folds)
-        data["fold"] = pd.to_numeric(data["fold"], downcast='integer')
-        for i in range(folds):
-            test = data[data["fold"] == i].drop(columns=["fold"]).reset_index(drop=True)
-            train = data[data["fold"] != i].drop(columns=["fold"]).reset_index(drop=True)
-            tuple_list.append((train, test))
-        return tuple_list
+        # the rows of each user are dealt to the folds in turn
+        fold = data.groupby(['userId']).cumcount().to_numpy() % folds
+        return FoldList(data, _KFoldFlag(fold), folds)
 
     def splitting_temporal_holdout(self, d: pd.DataFrame, ratio=0.2):
         tuple_list = []
-        data = d.copy()
-        user_size = data.groupby(['userId'], as_index=True).size()
-        user_threshold = user_size.apply(lambda x: math.floor(x * (1 - ratio)))
-        data['rank_first'] = data.groupby(['userId'])['timestamp'].rank(method='first', ascending=True, axis=1)
-        data["test_flag"] = data.apply(
-            lambda x: x["rank_first"] > user_threshold.loc[x["userId"]], axis=1)
-        test = data[data["test_flag"] == True].drop(columns=["rank_first", "test_flag"]).reset_index(drop=True)
-        train = data[data["test_flag"] == False].drop(columns=["rank_first", "test_flag"]).reset_index(drop=True)
+        user_codes, rank = self._temporal_rank(d, ascending=True)
+        user_threshold = np.floor(np.bincount(user_codes) * (1 - ratio))
+        test_flag = rank > user_threshold[user_codes]
+        test = d[test_flag].reset_index(drop=True)
+        train = d[~test_flag].reset_index(drop=True)
         tuple_list.append((train, test))
         return tuple_list
 
     def splitting_temporal_leavenout(self, d: pd.DataFrame, n=1):
         tuple_list = []
-        data = d.copy()
-        data['rank_first'] = data.groupby(['userId'])['timestamp'].rank(method='first', ascending=False, axis=1)
-        data["test_flag"] = data.apply(
-            lambda x: x["rank_first"] <= n, axis=1)
-        test = data[data["test_flag"] == True].drop(columns=["rank_first", "test_flag"]).reset_index(drop=True)
-        train = data[data["test_flag"] == False].drop(columns=["rank_first", "test_flag"]).reset_index(drop=True)
+        _, rank = self._temporal_rank(d, ascending=False)
+        test_flag = (rank > 0) & (rank <= n)
+        test = d[test_flag].reset_index(drop=True)
+        train = d[~test_flag].reset_index(drop=True)
         tuple_list.append((train, test))
         return tuple_list
 
     def splitting_passed_timestamp(self, d: pd.DataFrame, timestamp=1):
         tuple_list = []
-        data = d.copy()
-        data["test_flag"] = data.apply(lambda x: x["timestamp"] >= timestamp, axis=1)
-        test = data[data["test_flag"] == True].drop(columns=["test_flag"]).reset_index(drop=True)
-        train = data[data["test_flag"] == False].drop(columns=["test_flag"]).reset_index(drop=True)
+        test_flag = (d["timestamp"] >= timestamp).to_numpy()
+        test = d[test_flag].reset_index(drop=True)
+        train = d[~test_flag].reset_index(drop=True)
         tuple_list.append((train, test))
         return tuple_list
 
-    def subsampling_list_generator(self, length, ratio=0.2):
-        train = int(math.floor(length * (1 - ratio)))
-        test = length - train
-        list_ = [0] * train + [1] * test
-        np.random.shuffle(list_)
-        return list_
+    @staticmethod
+    def _temporal_rank(data: pd.DataFrame, ascending=True) -> t.Tuple[np.ndarray, np.ndarray]:
+        """
+        Position of each row in the timeline of its user, as pandas rank(method='first') per user: ties keep the row
+        order. Rows are sorted once by user and timestamp instead of ranking every group.
+        :return: user codes and 1-based ranks (0 for missing timestamps)
+        """
+        user_codes = pd.factorize(data["userId"])[0]
+        ts_codes, uniques = pd.factorize(data["timestamp"], sort=True)
+        missing = ts_codes < 0
+        ts_codes = ts_codes if ascending else len(uniques) - 1 - ts_codes
+        # missing timestamps are sorted after every other row of their user
+        ts_codes[missing] = len(uniques)
+        order = np.lexsort((ts_codes, user_codes))
+        group_starts = np.cumsum(np.bincount(user_codes)) - np.bincount(user_codes)
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(1, len(order) + 1) - group_starts[user_codes[order]]
+        rank[missing] = 0
+        return user_codes, rank
 
     def splitting_randomsubsampling_kfolds(self, d: pd.DataFrame, folds=5, ratio=0.2):
-        tuple_list = []
-        data = d.copy()
-        user_groups = data.groupby(['userId'])
-        for i in range(folds):
-            for name, group in user_groups:
-                data.loc[group.index, 'test_flag'] = self.subsampling_list_generator(len(group), ratio)
-            data["test_flag"] = pd.to_numeric(data["test_flag"], downcast='integer')
-            test = data[data["test_flag"] == 1].drop(columns=["test_flag"]).reset_index(drop=True)
-            train = data[data["test_flag"] == 0].drop(columns=["test_flag"]).reset_index(drop=True)
-            tuple_list.append((train, test))
-        return tuple_list
-
-    def subsampling_leavenout_list_generator(self, length, n=1):
-        test = n
-        train = length - test
-        list_ = [0] * train + [1] * test
-        np.random.shuffle(list_)
-        return list_
+        user_codes = pd.factorize(d["userId"])[0]
+        user_size = np.bincount(user_codes)
+        user_test = user_size - np.floor(user_size * (1 - ratio)).astype(np.int64)
+        return self._random_subsampling_folds(d, user_codes, user_test, folds)
 
     def splitting_randomsubsampling_kfolds_leavenout(self, d: pd.DataFrame, folds=5, n=1):
-        tuple_list = []
-        data = d.copy()
-        user_groups = data.groupby(['userId'])
-        for i in range(folds):
-            for name, group in user_groups:
-                data.loc[group.index, 'test_flag'] = self.subsampling_leavenout_list_generator(len(group), n)
-            data["test_flag"] = pd.to_numeric(data["test_flag"], downcast='integer')
-            test = data[data["test_flag"] == 1].drop(columns=["test_flag"]).reset_index(drop=True)
-            train = data[data["test_flag"] == 0].drop(columns=["test_flag"]).reset_index(drop=True)
-            tuple_list.append((train, test))
-        return tuple_list
-
-    def splitting_best_timestamp(self, d: pd.DataFrame, min_below=1, min_over=1):
-        data = d.copy()
-        unique_timestamps = data["timestamp"].unique()
-        user_groups = data.groupby(['userId'])
-        ts_dict = {}
-        nuniques = len(unique_timestamps)
-        i = 0
-        for ts in unique_timestamps:
-            print(nuniques - i)
-            i += 1
-            ts_dict[ts] = 0
-            for name, group in user_groups:
-                below = group[group["timestamp"] < ts]["timestamp"].count()
-                over = len(group) - below
-                if (below >= min_below) and (over >= min_over):
-                    ts_dict[ts] += 1
-        max_val = max(ts_dict.values())
-        best_tie = [ts for ts,v in ts_dict.items() if v == max_val]
-        max_ts = max(best_tie)
+        user_codes = pd.factorize(d["userId"])[0]
+        user_test = np.minimum(np.bincount(user_codes), n)
+        return self._random_subsampling_folds(d, user_codes, user_test, folds)
+
+    @staticmethod
+    def _random_subsampling_folds(d: pd.DataFrame, user_codes: np.ndarray, user_test: np.ndarray, folds: int):
+        """
+        Every fold draws, for each user, user_test[user] random test rows. The fold seeds are drawn in advance from the
+        global random state, so each fold is reproducible when it is materialized
+        """
+        fold_seeds = np.random.randint(np.iinfo(np.int32).max, size=folds)
+        return FoldList(d, _RandomSubsamplingFlag(user_codes, user_test, fold_seeds), folds)
+
+    def splitting_best_timestamp(self, d: pd.DataFrame, min_below=1, min_over=1, granularity=None):
+        """
+        Splits at the timestamp that leaves at least min_below training and min_over test interactions to the largest
+        number of users (the latest one in case of ties).
+        The candidate cuts are swept in sorted order: a cut is valid for a user while it falls in an interval bounded
+        by two order statistics of the user timeline, so every user adds +1/-1 at two positions and a cumulative sum
+        gives the number of valid users of every candidate.
+        :param granularity: if set, the candidate cuts are the timestamps rounded down to multiples of granularity
+        """
+        user_codes = pd.factorize(d["userId"])[0]
+        sizes = np.bincount(user_codes)
+        known = d["timestamp"].notna().to_numpy()
+        timestamps = d["timestamp"].to_numpy()[known]
+        user_codes = user_codes[known]
+        order = np.lexsort((timestamps, user_codes))
+        timestamps = timestamps[order]
+        known_sizes = np.bincount(user_codes, minlength=len(sizes))
+        starts = np.cumsum(known_sizes) - known_sizes
+
+        if granularity:
+            candidates = np.unique(timestamps // granularity * granularity)
+        else:
+            candidates = np.unique(timestamps)
+
+        # a cut ts is valid when min_below <= #(timestamps < ts) <= max_below
+        max_below = sizes - min_over
+        valid = (max_below >= min_below) & (known_sizes >= min_below)
+        first = np.zeros(len(sizes), dtype=np.int64)
+        if min_below > 0:
+            # ts must be greater than the min_below-th timestamp of the user
+            first[valid] = np.searchsorted(candidates, timestamps[starts[valid] + min_below - 1], side="right")
+        # ts must not be greater than the (max_below + 1)-th timestamp of the user, if any
+        last = np.full(len(sizes), len(candidates), dtype=np.int64)
+        bounded = valid & (max_below < known_sizes)
+        last[bounded] = np.searchsorted(candidates, timestamps[starts[bounded] + max_below[bounded]], side="right")
+        valid &= first < last
+
+        sweep = np.bincount(first[valid], minlength=len(candidates) + 1) - \
+            np.bincount(last[valid], minlength=len(candidates) + 1)
+        valid_users = np.cumsum(sweep)[:-1]
+        max_ts = candidates[np.flatnonzero(valid_users == valid_users.max())[-1]]
         print(f"Best Timestamp: {max_ts}")
         return self.splitting_passed_timestamp(d, max_ts)
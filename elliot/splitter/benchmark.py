@@ -0,0 +1,79 @@
+"""
+Module description:
+Benchmark of the splitting strategies on synthetic data.
+
+python -m elliot.splitter.benchmark --rows 1000000 --users 10000 --items 5000
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+import argparse
+import time
+import typing as t
+
+import numpy as np
+import pandas as pd
+
+from elliot.splitter.base_splitter import Splitter
+
+STRATEGIES = {
+    "temporal_hold_out_ratio": lambda s, d: s.splitting_temporal_holdout(d, 0.2),
+    "temporal_hold_out_leave_n_out": lambda s, d: s.splitting_temporal_leavenout(d, 1),
+    "fixed_timestamp": lambda s, d: s.splitting_passed_timestamp(d, int(d["timestamp"].median())),
+    "fixed_timestamp_best": lambda s, d: s.splitting_best_timestamp(d),
+    # fold lists are lazy: every fold is materialized to time the whole protocol
+    "random_subsampling_ratio": lambda s, d: list(s.splitting_randomsubsampling_kfolds(d, 5, 0.2)),
+    "random_subsampling_leave_n_out": lambda s, d: list(s.splitting_randomsubsampling_kfolds_leavenout(d, 5, 1)),
+    "random_cross_validation": lambda s, d: list(s.splitting_kfolds(d, 5)),
+}
+
+
+def synthetic_data(rows: int, users: int, items: int, timestamps: int = 10 ** 6, random_seed=42) -> pd.DataFrame:
+    """
+    Random interactions with the columns of an Elliot dataset
+    """
+    rng = np.random.RandomState(random_seed)
+    return pd.DataFrame({"userId": rng.randint(0, users, rows),
+                         "itemId": rng.randint(0, items, rows),
+                         "rating": rng.randint(1, 6, rows),
+                         "timestamp": rng.randint(0, timestamps, rows)})
+
+
+def benchmark(data: pd.DataFrame, strategies: t.Optional[t.Iterable[str]] = None, repeat: int = 1,
+              random_seed=42) -> t.Dict[str, float]:
+    """
+    Best wall-clock time (seconds) of each splitting strategy
+    :param data: interactions dataframe
+    :param strategies: names of the strategies in STRATEGIES (all of them if None)
+    :param repeat: number of runs per strategy
+    """
+    splitter = Splitter(data, None, random_seed)
+    timings = {}
+    for name in strategies or STRATEGIES:
+        runs = []
+        for _ in range(repeat):
+            np.random.seed(random_seed)
+            start = time.perf_counter()
+            STRATEGIES[name](splitter, data)
+            runs.append(time.perf_counter() - start)
+        timings[name] = min(runs)
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the splitting strategies on synthetic data.")
+    parser.add_argument('--rows', type=int, default=10 ** 6)
+    parser.add_argument('--users', type=int, default=10 ** 4)
+    parser.add_argument('--items', type=int, default=10 ** 4)
+    parser.add_argument('--timestamps', type=int, default=10 ** 6)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--strategies', nargs='*', choices=list(STRATEGIES), default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    dataset = synthetic_data(args.rows, args.users, args.items, args.timestamps, args.seed)
+    print(f"Rows:\t{args.rows}\tUsers:\t{args.users}\tItems:\t{args.items}")
+    for strategy, seconds in benchmark(dataset, args.strategies, args.repeat, args.seed).items():
+        print(f"{strategy}\t{seconds:.3f}s")
@@ -0,0 +1,27 @@
+"""
+Module description:
+Attributes computed on first access and cached on the instance.
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+
+class lazy_property(object):
+    """
+    Read-once property (functools.cached_property is not available before Python 3.8).
+    The computed value is stored in the instance dictionary, so it can be reassigned and it is pickled as a plain
+    attribute
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.name = function.__name__
+        self.__doc__ = function.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__[self.name] = self.function(instance)
+        return value
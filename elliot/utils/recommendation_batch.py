@@ -0,0 +1,173 @@
+"""
+Module description:
+Array-based container of top-k recommendation lists.
+"""
+
+__version__ = '0.3.1'
+__author__ = 'Vito Walter Anelli, Claudio Pomo'
+__email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
+
+import typing as t
+from collections.abc import Mapping
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def ranking_positions(scores: np.ndarray, items: sp.csr_matrix, chunk_size: int = 2 ** 22) -> sp.csr_matrix:
+    """
+    Positions of the given items in the full rankings of the scores, without sorting them: the position of an item is
+    1 + the number of items scoring higher + the number of items with the same score and a lower id (the order of
+    top-k)
+    :param scores: (n_users, n_items) scores, masked items set to -inf
+    :param items: (n_users, n_items) CSR matrix of the items to rank
+    :param chunk_size: maximum number of scores compared at once
+    :return: CSR matrix with the same structure of items, storing the (1-based) positions
+    """
+    items = items.tocsr()
+    rows = np.repeat(np.arange(items.shape[0]), np.diff(items.indptr))
+    columns = items.indices[items.indptr[0]:items.indptr[-1]]
+    positions = np.empty(len(rows), dtype=np.int64)
+    item_ids = np.arange(scores.shape[1])
+    step = max(1, chunk_size // max(scores.shape[1], 1))
+    for start in range(0, len(rows), step):
+        chunk_rows, chunk_columns = rows[start:start + step], columns[start:start + step]
+        row_scores = scores[chunk_rows]
+        item_scores = scores[chunk_rows, chunk_columns][:, None]
+        ahead = (row_scores > item_scores) | ((row_scores == item_scores) & (item_ids < chunk_columns[:, None]))
+        positions[start:start + step] = ahead.sum(axis=1) + 1
+    return sp.csr_matrix((positions, columns, items.indptr - items.indptr[0]), shape=items.shape)
+
+
+class RecommendationBatch(Mapping):
+    """
+    Recommendation lists of a set of users, stored as an array of private user ids and two (n_users, k) arrays of
+    private item ids (int32) and scores (float32). Lists shorter than k are padded with item -1 and score -inf.
+
+    The batch is also a read-only {public user: [(public item, score), ...]} mapping: the lists of the dictionary
+    format are built on access, and never stored.
+
+    The batch may also carry the positions of some items (e.g., the relevant ones) in the full rankings of the users,
+    as a (n_users, n_items) CSR matrix (see ranking_positions).
+    """
+
+    def __init__(self, user_ids: np.ndarray, item_ids: np.ndarray, scores: np.ndarray, private_users: t.Dict,
+                 private_items: t.Dict, lengths: np.ndarray = None, item_positions: sp.csr_matrix = None):
+        """
+        :param user_ids: private user ids, one per row
+        :param item_ids: private item ids of the recommendation lists, one row per user
+        :param scores: scores of the recommended items
+        :param private_users: map from private to public user ids
+        :param private_items: map from private to public item ids
+        :param lengths: length of every list, all the lists are k long if missing
+        :param item_positions: full-ranking positions of some items, one row per user
+        """
+        self.user_ids = np.asarray(user_ids, dtype=np.int32)
+        self.item_ids = np.asarray(item_ids, dtype=np.int32).reshape(len(self.user_ids), -1)
+        self.scores = np.asarray(scores, dtype=np.float32).reshape(self.item_ids.shape)
+        self.lengths = np.full(len(self.user_ids), self.item_ids.shape[1], dtype=np.int64) if lengths is None else \
+            np.asarray(lengths, dtype=np.int64)
+        self.private_users = private_users
+        self.private_items = private_items
+        self.item_positions = item_positions
+        self._public_users = None
+        self._rows = None
+
+    @classmethod
+    def from_lists(cls, user_ids: np.ndarray, list_users: np.ndarray, item_ids: np.ndarray, scores: np.ndarray,
+                   private_users: t.Dict, private_items: t.Dict):
+        """
+        Batch of recommendation lists given as flat arrays, with the entries of every list contiguous and sorted
+        :param user_ids: private user ids, one per list
+        :param list_users: position in user_ids of the list of every entry, non decreasing
+        :param item_ids: private item ids of the entries
+        :param scores: scores of the entries
+        """
+        lengths = np.bincount(list_users, minlength=len(user_ids))
+        ranks = np.arange(len(item_ids)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        width = int(lengths.max()) if len(lengths) else 0
+        padded_items = np.full((len(user_ids), width), -1, dtype=np.int32)
+        padded_items[list_users, ranks] = item_ids
+        padded_scores = np.full((len(user_ids), width), -np.inf, dtype=np.float32)
+        padded_scores[list_users, ranks] = scores
+        return cls(user_ids, padded_items, padded_scores, private_users, private_items, lengths)
+
+    @staticmethod
+    def concatenate(batches: t.List):
+        """
+        Recommendations of consecutive blocks of users in a single batch.
+        Blocks in the dictionary format (and empty ones) are merged in a dictionary.
+        """
+        batches = [b for b in batches if len(b)]
+        if not batches or not all(isinstance(b, RecommendationBatch) for b in batches):
+            merged = {}
+            for b in batches:
+                merged.update(b)
+            return merged
+        if len(batches) == 1:
+            return batches[0]
+        width = max(b.item_ids.shape[1] for b in batches)
+        item_positions = sp.vstack([b.item_positions for b in batches], format="csr") \
+            if all(b.item_positions is not None for b in batches) else None
+        return RecommendationBatch(np.concatenate([b.user_ids for b in batches]),
+                                   np.concatenate([b._padded(b.item_ids, width, -1) for b in batches]),
+                                   np.concatenate([b._padded(b.scores, width, -np.inf) for b in batches]),
+                                   batches[0].private_users, batches[0].private_items,
+                                   np.concatenate([b.lengths for b in batches]), item_positions)
+
+    @staticmethod
+    def _padded(values: np.ndarray, width: int, fill) -> np.ndarray:
+        if values.shape[1] == width:
+            return values
+        return np.pad(values, ((0, 0), (0, width - values.shape[1])), constant_values=fill)
+
+    @property
+    def width(self) -> int:
+        return self.item_ids.shape[1]
+
+    @property
+    def public_users(self) -> t.List:
+        """
+        Public ids of the users, in row order
+        """
+        if self._public_users is None:
+            self._public_users = [self.private_users[u] for u in self.user_ids.tolist()]
+        return self._public_users
+
+    def select(self, rows: np.ndarray):
+        """
+        Batch with the given rows (boolean mask or positions)
+        """
+        item_positions = self.item_positions[np.arange(len(self.user_ids))[rows]] \
+            if self.item_positions is not None else None
+        return RecommendationBatch(self.user_ids[rows], self.item_ids[rows], self.scores[rows], self.private_users,
+                                   self.private_items, self.lengths[rows], item_positions)
+
+    def user_lists(self) -> t.Iterator[t.Tuple[t.Any, t.List, np.ndarray]]:
+        """
+        Public user, public items and scores of every recommendation list
+        """
+        private_items = self.private_items
+        for u, items, scores, length in zip(self.public_users, self.item_ids, self.scores, self.lengths.tolist()):
+            yield u, [private_items[i] for i in items[:length].tolist()], scores[:length]
+
+    ############## Dictionary view ##############
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def __iter__(self):
+        return iter(self.public_users)
+
+    def __contains__(self, user):
+        return user in self._user_rows()
+
+    def __getitem__(self, user) -> t.List[t.Tuple[t.Any, float]]:
+        row = self._user_rows()[user]
+        length = self.lengths[row]
+        return list(zip(map(self.private_items.get, self.item_ids[row, :length].tolist()), self.scores[row, :length]))
+
+    def _user_rows(self) -> t.Dict:
+        if self._rows is None:
+            self._rows = dict(zip(self.public_users, range(len(self.user_ids))))
+        return self._rows
@@ -10,6 +10,8 @@ __email__ = 'vitowalter.anelli@poliba.it, claudio.pomo@poliba.it'
 import numpy as np
 import pickle
 
+from elliot.utils.recommendation_batch import RecommendationBatch
+
 
 def save_obj(obj, name):
     """
@@ -35,10 +37,15 @@ def save_np(npy, filename):
 def store_recommendation(recommendations, path=""):
     """
     Store recommendation list (top-k)
+    :param recommendations: RecommendationBatch or {user: [(item, score), ...]} dictionary
     :return:
     """
 
     with open(path, 'w') as out:
+        if isinstance(recommendations, RecommendationBatch):
+            for u, items, scores in recommendations.user_lists():
+                out.writelines(f"{u}\t{i}\t{value!s}\n" for i, value in zip(items, scores))
+            return
         for u, recs in recommendations.items():
             for i, value in recs:
                 out.write(str(u) + '\t' + str(i) + '\t' + str(value) + '\n')
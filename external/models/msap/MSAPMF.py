@@ -162,15 +162,15 @@ class MSAPMF(RecMixin, BaseRecommenderModel):
                                               "adversarial_msap": adversarial_iterative_result_dict}
 
     def get_recommendations(self, k: int = 100, adversarial: bool = False):
-        predictions_top_k_test = {}
-        predictions_top_k_val = {}
+        predictions_top_k_test = []
+        predictions_top_k_val = []
         for index, offset in enumerate(range(0, self._num_users, self._batch_size)):
             offset_stop = min(offset + self._batch_size, self._num_users)
             predictions = self._model.predict(offset, offset_stop, adversarial)
             recs_val, recs_test = self.process_protocol(k, predictions, offset, offset_stop)
-            predictions_top_k_val.update(recs_val)
-            predictions_top_k_test.update(recs_test)
-        return predictions_top_k_val, predictions_top_k_test
+            predictions_top_k_val.append(recs_val)
+            predictions_top_k_test.append(recs_test)
+        return self.merge_recommendations(predictions_top_k_val, predictions_top_k_test)
 
     def get_results(self):
         if getattr(self._params.meta, "eval_perturbations", False):